@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing a large export: to_dict() + json.dump versus ExportEncoder.
+
+Usage:
+    python benchmarks/encoder.py
+    python benchmarks/encoder.py --posts 1000 --comments 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.encoder import save_export
+from src.models import Author, Channel, Comment, OutputFile, Post
+from src.utils import save_to_json
+
+
+def make_output(num_posts: int, comments_per_post: int) -> OutputFile:
+    """Build an export with a comment every few seconds from a pool of authors."""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    authors = [
+        Author(user_id=i, username=f'user{i}' if i % 3 else None, first_name='Имя', last_name=None)
+        for i in range(1, 5001)
+    ]
+    posts = []
+    comment_id = 0
+    for p in range(num_posts):
+        comments = []
+        for _ in range(comments_per_post):
+            comment_id += 1
+            comments.append(Comment(
+                id=comment_id,
+                text='Looks great, does it support "CSV" export? ✓',
+                date=base + timedelta(seconds=comment_id * 7 // 3),
+                author=authors[comment_id % len(authors)],
+                reply_to=comment_id - 1 if comment_id % 4 == 0 else None
+            ))
+        posts.append(Post(
+            id=p + 1, text='Release notes', date=base + timedelta(hours=p), views=1000,
+            comments=comments, replies=len(comments)
+        ))
+    return OutputFile(
+        version='1.0', status='complete', exported_at=base, posts_count=num_posts,
+        comments_count=comment_id, channel=Channel(id=1, username='bench', title='Bench', posts=posts)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark export serialization.')
+    parser.add_argument('--posts', type=int, default=1000, help='Posts (default: 1000)')
+    parser.add_argument('--comments', type=int, default=1000, help='Comments per post (default: 1000)')
+    args = parser.parse_args()
+
+    output = make_output(args.posts, args.comments)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        runs = {
+            'to_dict + json.dump': lambda path: save_to_json(output.to_dict(), path),
+            'ExportEncoder': lambda path: save_export(output, path),
+            'ExportEncoder compact': lambda path: save_export(output, path, pretty=False),
+        }
+        times = {}
+        for name, run in runs.items():
+            path = os.path.join(tmpdir, f'{len(times)}.json')
+            start = time.perf_counter()
+            run(path)
+            times[name] = time.perf_counter() - start
+            print(f"{name:<22} {times[name]:7.2f}s  {os.path.getsize(path) / 1e6:7.1f} MB")
+
+        with open(os.path.join(tmpdir, '0.json'), 'rb') as a, open(os.path.join(tmpdir, '1.json'), 'rb') as b:
+            identical = a.read() == b.read()
+    print(f"Identical output: {identical}; speedup {times['to_dict + json.dump'] / times['ExportEncoder']:.1f}x")
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
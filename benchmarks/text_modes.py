@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CPU cost per message of each --text-mode.
+
+Builds Telethon messages with typical formatting and times converting them
+to Posts, as get_posts does, with the markdown, raw and raw+entities modes.
+Every run uses fresh messages, since Telethon caches the rendered text.
+
+Usage:
+    python benchmarks/text_modes.py
+    python benchmarks/text_modes.py --messages 50000 --repeat 5
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from telethon.extensions import markdown
+from telethon.tl.custom.message import Message
+from telethon.tl.types import (
+    MessageEntityBold,
+    MessageEntityItalic,
+    MessageEntityMention,
+    MessageEntityTextUrl,
+    PeerChannel,
+)
+
+from src.telegram_client import TEXT_MODES, _to_post
+
+
+PARAGRAPH = (
+    'New release is out! Grab it at the link below, and tell @support what you think. '
+    'We rewrote the sync engine from scratch, so imports are much faster now. '
+)
+
+
+def make_messages(count: int) -> list:
+    """Create formatted channel messages bound to a markdown-rendering client."""
+    client = SimpleNamespace(parse_mode=markdown)
+    text = PARAGRAPH * 3
+    entities = [
+        MessageEntityBold(0, 11),
+        MessageEntityMention(63, 8),
+        MessageEntityItalic(100, 14),
+        MessageEntityTextUrl(len(PARAGRAPH) + 4, 7, 'https://example.com/release'),
+        MessageEntityBold(2 * len(PARAGRAPH), 20),
+    ]
+    messages = []
+    for i in range(count):
+        message = Message(
+            id=i + 1,
+            peer_id=PeerChannel(1),
+            date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            message=text,
+            entities=entities,
+            views=100,
+        )
+        message._client = client
+        messages.append(message)
+    return messages
+
+
+def bench(text_mode: str, count: int, repeat: int) -> float:
+    """Return the best CPU time per message in microseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        messages = make_messages(count)
+        start = time.process_time()
+        for message in messages:
+            _to_post(message, text_mode)
+        best = min(best, time.process_time() - start)
+    return best / count * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the CPU cost of each text mode.')
+    parser.add_argument('--messages', type=int, default=20000, help='Messages per run (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode; the best is reported (default: 3)')
+    args = parser.parse_args()
+
+    results = {mode: bench(mode, args.messages, args.repeat) for mode in TEXT_MODES}
+    baseline = results[TEXT_MODES[0]]
+    for mode, micros in results.items():
+        print(f"{mode:<14} {micros:8.2f} us/message  ({baseline / micros:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
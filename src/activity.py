@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Activity Matrix - Memory-mapped author x channel (x week) comment counts.
+
+Authors get a stable row number (authors.i8 holds the user id of each row).
+Every channel keeps two sparse columns sorted by row: total comments per
+author, and (week, row, count) records sorted by week for time windows.
+All files use the int64 layout of src.columnar and are mapped on demand,
+so queries read only the channels they touch.
+
+Usage:
+    python -m src.activity build
+    python -m src.activity top --channel @channel_a --since 2026-01-01 --top 50
+"""
+import argparse
+import heapq
+import json
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from src.columnar import MappedFiles, int64_bytes
+from src.models import ANONYMOUS_USER_ID
+from src.utils import ensure_dir, file_lock, find_exports, print_error, print_progress, replace_file
+
+
+# Matrix location, next to the channel exports (see loader.OUTPUT_DIR)
+ACTIVITY_PATH = Path('.specify-for-tg-analysis/memory/activity')
+EXPORTS_DIR = ACTIVITY_PATH.parent / 'channels'
+
+ACTIVITY_FORMAT_VERSION = 1
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+WEEK_OFFSET_DAYS = 3
+ROW_BITS = 32
+ROW_MASK = (1 << ROW_BITS) - 1
+
+
+def week_of(epoch: int) -> int:
+    """Return the Monday-based week number of a Unix timestamp."""
+    return (epoch // SECONDS_PER_DAY + WEEK_OFFSET_DAYS) // 7
+
+
+def _to_epoch(value: str) -> int:
+    """Convert an ISO 8601 date or datetime to epoch seconds (UTC)."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class ActivityMatrix:
+    """
+    Persisted author x channel activity with weekly buckets.
+
+    Re-adding a channel export replaces that channel's columns, so the
+    matrix can be updated after every load without double counting. New
+    comments alone can be merged into the columns instead (see add_export).
+    Several processes may share the matrix: writes and queries take a lock
+    on meta.lock and re-read meta.json first.
+    """
+
+    def __init__(self, path: Path = ACTIVITY_PATH):
+        """
+        Open (or create) the matrix directory.
+
+        Args:
+            path: Directory holding the matrix files
+        """
+        self.path = Path(path)
+        ensure_dir(str(self.path))
+        self._lock_path = self.path / 'meta.lock'
+        self._rows: Optional[dict[int, int]] = None
+        self._load_meta()
+
+    def _load_meta(self) -> None:
+        """Read meta.json, dropping the author lookup if other writers added rows."""
+        meta_path = self.path / 'meta.json'
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('format_version') != ACTIVITY_FORMAT_VERSION:
+                raise ValueError(f"Unsupported activity matrix format in {self.path}")
+        else:
+            self.meta = {'format_version': ACTIVITY_FORMAT_VERSION, 'authors': 0, 'channels': {}}
+        if self._rows is not None and len(self._rows) != self.meta['authors']:
+            self._rows = None
+
+    def close(self) -> None:
+        """Drop the cached author lookup."""
+        self._rows = None
+
+    @property
+    def num_authors(self) -> int:
+        """Number of author rows."""
+        return self.meta['authors']
+
+    def _user_ids(self) -> array:
+        """Read the user id of every row."""
+        user_ids = array('q')
+        path = self.path / 'authors.i8'
+        if self.num_authors:
+            user_ids.frombytes(path.read_bytes()[:8 * self.num_authors])
+            if sys.byteorder != 'little':
+                user_ids.byteswap()
+        return user_ids
+
+    def _row_lookup(self) -> dict[int, int]:
+        """Map user id -> row, built once per instance."""
+        if self._rows is None:
+            self._rows = {user_id: row for row, user_id in enumerate(self._user_ids())}
+        return self._rows
+
+    def _channel_ids(self, channels: Optional[list[str]]) -> list[str]:
+        """Resolve channel usernames to stored channel keys (all channels if None)."""
+        stored = self.meta['channels']
+        if not channels:
+            return list(stored)
+        names = {c.replace('https://t.me/', '').lstrip('@') for c in channels}
+        return [key for key, info in stored.items() if info['username'] in names]
+
+    def add_export(self, data: dict, merge: bool = False) -> int:
+        """
+        Replace one channel's columns with the counts from its export.
+
+        Args:
+            data: Export dictionary (OutputFile.to_dict() or the parsed JSON)
+            merge: Add the counts to the channel's columns instead; data then
+                holds only comments that were not added before
+
+        Returns:
+            Number of distinct authors in the channel
+        """
+        # Other processes may have added authors or channels since this
+        # instance last looked, so re-read what they wrote under the lock
+        with file_lock(self._lock_path):
+            self._load_meta()
+            return self._write_channel(data, merge)
+
+    def _write_channel(self, data: dict, merge: bool) -> int:
+        """Write one channel's columns and meta.json; the caller holds the lock."""
+        rows = self._row_lookup()
+        first_new = len(rows)
+        new_ids = array('q')
+        comment_rows = array('q')
+        # (week, row) packed into one int, so buckets sort by week then row
+        buckets = array('q')
+        weeks: dict[str, int] = {}
+
+        for post in data['channel']['posts']:
+            for comment in post['comments']:
+                user_id = comment['author']['user_id']
+                if user_id == ANONYMOUS_USER_ID:
+                    continue
+                row = rows.get(user_id)
+                if row is None:
+                    row = rows[user_id] = first_new + len(new_ids)
+                    new_ids.append(user_id)
+                stamp = comment['date']
+                # Exports are in UTC, so the week only depends on the day
+                day = stamp[:10] if stamp.endswith('+00:00') else stamp
+                week = weeks.get(day)
+                if week is None:
+                    week = weeks[day] = week_of(_to_epoch(stamp))
+                comment_rows.append(row)
+                buckets.append(week << ROW_BITS | row)
+
+        if new_ids:
+            user_ids = self._user_ids()
+            user_ids.extend(new_ids)
+            replace_file(self.path / 'authors.i8', int64_bytes(user_ids))
+
+        key = str(data['channel']['id'])
+        totals = Counter(comment_rows)
+        weekly = Counter(buckets)
+        comments = len(comment_rows)
+        if merge and key in self.meta['channels']:
+            with MappedFiles(self.path) as files:
+                totals.update(dict(zip(files.map_int64(f"{key}.rows.i8"), files.map_int64(f"{key}.counts.i8"))))
+                weekly.update({
+                    week << ROW_BITS | row: count
+                    for week, row, count in zip(
+                        files.map_int64(f"{key}.week.i8"),
+                        files.map_int64(f"{key}.week_rows.i8"),
+                        files.map_int64(f"{key}.week_counts.i8"),
+                    )
+                })
+            comments += self.meta['channels'][key]['comments']
+        totals = sorted(totals.items())
+        weekly = sorted(weekly.items())
+        columns = {
+            'rows': array('q', (row for row, _ in totals)),
+            'counts': array('q', (count for _, count in totals)),
+            'week': array('q', (bucket >> ROW_BITS for bucket, _ in weekly)),
+            'week_rows': array('q', (bucket & ROW_MASK for bucket, _ in weekly)),
+            'week_counts': array('q', (count for _, count in weekly)),
+        }
+        for name, values in columns.items():
+            replace_file(self.path / f"{key}.{name}.i8", int64_bytes(values))
+
+        self.meta['authors'] = len(rows)
+        self.meta['channels'][key] = {
+            'username': data['channel'].get('username'),
+            'comments': comments,
+        }
+        # Written last, so new authors and channels only show up once their
+        # files are in place; readers take the lock, so they never see a
+        # channel whose columns are half replaced
+        replace_file(self.path / 'meta.json', json.dumps(self.meta, ensure_ascii=False, indent=2).encode('utf-8'))
+        return len(totals)
+
+    def _channel_counts(
+        self,
+        files: MappedFiles,
+        key: str,
+        since: Optional[str],
+        until: Optional[str],
+    ) -> tuple:
+        """Return (rows, counts) of a channel, summed over the weeks in the window."""
+        if since is None and until is None:
+            return files.map_int64(f"{key}.rows.i8"), files.map_int64(f"{key}.counts.i8")
+
+        weeks = files.map_int64(f"{key}.week.i8")
+        lo = bisect_left(weeks, week_of(_to_epoch(since))) if since else 0
+        hi = bisect_right(weeks, week_of(_to_epoch(until))) if until else len(weeks)
+        sums: dict[int, int] = {}
+        week_rows = files.map_int64(f"{key}.week_rows.i8")[lo:hi]
+        week_counts = files.map_int64(f"{key}.week_counts.i8")[lo:hi]
+        for row, count in zip(week_rows, week_counts):
+            sums[row] = sums.get(row, 0) + count
+        return list(sums), list(sums.values())
+
+    def top(
+        self,
+        k: int = 20,
+        channels: Optional[list[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Find the most active authors.
+
+        Uses heap selection, so the cost is linear in the number of
+        (author, channel) entries read rather than a full sort. Time windows
+        are rounded outward to whole Monday-based weeks.
+
+        Args:
+            k: Number of authors to return
+            channels: Channel usernames to sum over (default: all)
+            since: Only weeks containing or after this ISO date
+            until: Only weeks containing or before this ISO date
+
+        Returns:
+            (user_id, comments) pairs, most active first
+        """
+        with file_lock(self._lock_path, shared=True):
+            self._load_meta()
+            keys = self._channel_ids(channels)
+            with MappedFiles(self.path) as files:
+                user_ids = files.map_int64('authors.i8') if self.num_authors else array('q')
+                if len(keys) == 1:
+                    rows, counts = self._channel_counts(files, keys[0], since, until)
+                    best = heapq.nlargest(k, range(len(rows)), key=counts.__getitem__)
+                    return [(user_ids[rows[i]], counts[i]) for i in best]
+
+                totals = array('q', bytes(8 * self.num_authors))
+                for key in keys:
+                    rows, counts = self._channel_counts(files, key, since, until)
+                    for row, count in zip(rows, counts):
+                        totals[row] += count
+                best = heapq.nlargest(k, range(len(totals)), key=totals.__getitem__)
+                return [(user_ids[row], totals[row]) for row in best if totals[row]]
+
+    def activity(
+        self,
+        user_id: int,
+        channels: Optional[list[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> dict[str, int]:
+        """
+        Get one author's comment counts per channel.
+
+        Args:
+            user_id: Telegram user ID
+            channels: Channel usernames to look at (default: all)
+            since: Only weeks containing or after this ISO date
+            until: Only weeks containing or before this ISO date
+
+        Returns:
+            Channel username -> comments, for channels with any activity
+        """
+        with file_lock(self._lock_path, shared=True):
+            self._load_meta()
+            row = self._row_lookup().get(user_id)
+            if row is None:
+                return {}
+
+            result = {}
+            with MappedFiles(self.path) as files:
+                for key in self._channel_ids(channels):
+                    if since is None and until is None:
+                        rows = files.map_int64(f"{key}.rows.i8")
+                        i = bisect_left(rows, row)
+                        count = files.map_int64(f"{key}.counts.i8")[i] if i < len(rows) and rows[i] == row else 0
+                    else:
+                        rows, counts = self._channel_counts(files, key, since, until)
+                        count = dict(zip(rows, counts)).get(row, 0)
+                    if count:
+                        result[self.meta['channels'][key]['username'] or key] = count
+            return result
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Build and query the author x channel activity matrix.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s build
+    %(prog)s top --channel @channel_a --since 2026-01-01 --top 50
+'''
+    )
+    parser.add_argument(
+        '--matrix',
+        type=Path,
+        default=ACTIVITY_PATH,
+        help=f'Matrix directory (default: {ACTIVITY_PATH})'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Add all existing channel exports')
+    build.add_argument(
+        '--dir',
+        type=Path,
+        default=EXPORTS_DIR,
+        help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+    )
+
+    top = subparsers.add_parser('top', help='Most active authors')
+    top.add_argument('--channel', action='append', default=None, help='Only count this channel (repeatable)')
+    top.add_argument('--since', default=None, help='Only weeks from this date (ISO 8601)')
+    top.add_argument('--until', default=None, help='Only weeks up to this date (ISO 8601)')
+    top.add_argument('--top', type=int, default=20, help='Number of authors to output (default: 20)')
+    top.add_argument('--json', action='store_true', help='Output machine-readable JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+    matrix = ActivityMatrix(args.matrix)
+
+    try:
+        if args.command == 'build':
+            paths = find_exports(args.dir)
+            if not paths:
+                print_error(f"No channel exports found in {args.dir}")
+                return 1
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    count = matrix.add_export(json.load(f))
+                print_progress(f"Added {path.name}: {count} authors")
+            return 0
+
+        result = matrix.top(args.top, args.channel, args.since, args.until)
+        if args.json:
+            print_progress(json.dumps(
+                [{'user_id': user_id, 'comments': comments} for user_id, comments in result],
+                indent=2
+            ))
+        else:
+            for rank, (user_id, comments) in enumerate(result, 1):
+                print_progress(f"{rank:>3}  {comments:>6}  {user_id}")
+        return 0
+
+    finally:
+        matrix.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Materialized per-author activity aggregates, maintained by the loader."""
+import sqlite3
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.models import ANONYMOUS_USER_ID, Channel, Comment, Post
+from src.utils import ensure_dir
+
+
+# Aggregate store location, next to the channel exports
+AGGREGATES_PATH = Path('.specify-for-tg-analysis/memory/aggregates.sqlite')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS authors (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT NOT NULL,
+    last_name TEXT,
+    comments INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    latency_total REAL NOT NULL,
+    latency_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS author_channels (
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    PRIMARY KEY (user_id, channel_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS author_posts (
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, channel_id, post_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS author_days (
+    user_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS applied_comments (
+    channel_id INTEGER NOT NULL,
+    comment_id INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, comment_id)
+) WITHOUT ROWID;
+'''
+
+SECONDS_PER_DAY = 86400
+# Comment ids looked up per query
+ID_CHUNK = 500
+
+
+class AuthorAggregates:
+    """
+    Per-author totals, per-channel counts, first/last seen and daily buckets.
+
+    The ids of applied comments are kept per channel, so re-loading a
+    channel only adds comments that are new, including ones older than
+    comments already applied (e.g. found by watch mode's gap fill).
+    """
+
+    def __init__(self, path: Path = AGGREGATES_PATH):
+        """
+        Open (or create) the aggregate store.
+
+        Args:
+            path: SQLite database file
+        """
+        ensure_dir(str(Path(path).parent))
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the store."""
+        self._db.close()
+
+    def add_comments(self, channel: Channel, post: Post, comments: list[Comment]) -> int:
+        """
+        Apply a batch of comments of one post.
+
+        Comments applied by an earlier call are skipped.
+
+        Args:
+            channel: Channel the post belongs to
+            post: Post the comments belong to
+            comments: Comments loaded for the post
+
+        Returns:
+            Number of comments applied
+        """
+        ids = [c.id for c in comments]
+        applied = set()
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            applied.update(row[0] for row in self._db.execute(
+                f"SELECT comment_id FROM applied_comments "
+                f"WHERE channel_id = ? AND comment_id IN ({', '.join('?' * len(chunk))})",
+                [channel.id, *chunk]
+            ))
+        new = [c for c in comments if c.id not in applied]
+        if not new:
+            return 0
+
+        post_epoch = post.date.timestamp() if post.date else None
+        authors: dict[int, list] = {}
+        days: dict[tuple[int, int], int] = {}
+
+        for comment in new:
+            user_id = comment.author.user_id
+            if user_id == ANONYMOUS_USER_ID:
+                continue
+            epoch = int(comment.date.timestamp())
+            latency = epoch - post_epoch if post_epoch is not None else None
+
+            entry = authors.get(user_id)
+            if entry is None:
+                # [author, comments, first_seen, last_seen, latency_total, latency_count]
+                entry = authors[user_id] = [comment.author, 0, epoch, epoch, 0.0, 0]
+            entry[1] += 1
+            if epoch < entry[2]:
+                entry[2] = epoch
+            if epoch >= entry[3]:
+                entry[0] = comment.author
+                entry[3] = epoch
+            if latency is not None and latency >= 0:
+                entry[4] += latency
+                entry[5] += 1
+
+            key = (user_id, epoch // SECONDS_PER_DAY)
+            days[key] = days.get(key, 0) + 1
+
+        with self._db:
+            self._db.executemany(
+                '''
+                INSERT INTO authors (user_id, username, first_name, last_name, comments,
+                                     first_seen, last_seen, latency_total, latency_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    username = CASE WHEN excluded.last_seen >= last_seen THEN excluded.username ELSE username END,
+                    first_name = CASE WHEN excluded.last_seen >= last_seen THEN excluded.first_name ELSE first_name END,
+                    last_name = CASE WHEN excluded.last_seen >= last_seen THEN excluded.last_name ELSE last_name END,
+                    comments = comments + excluded.comments,
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = MAX(last_seen, excluded.last_seen),
+                    latency_total = latency_total + excluded.latency_total,
+                    latency_count = latency_count + excluded.latency_count
+                ''',
+                (
+                    (user_id, a.username, a.first_name, a.last_name, n, first, last, lat_total, lat_count)
+                    for user_id, (a, n, first, last, lat_total, lat_count) in authors.items()
+                )
+            )
+            self._db.executemany(
+                '''
+                INSERT INTO author_channels (user_id, channel_id, comments) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, channel_id) DO UPDATE SET comments = comments + excluded.comments
+                ''',
+                ((user_id, channel.id, entry[1]) for user_id, entry in authors.items())
+            )
+            self._db.executemany(
+                'INSERT OR IGNORE INTO author_posts (user_id, channel_id, post_id) VALUES (?, ?, ?)',
+                ((user_id, channel.id, post.id) for user_id in authors)
+            )
+            self._db.executemany(
+                '''
+                INSERT INTO author_days (user_id, day, comments) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, day) DO UPDATE SET comments = comments + excluded.comments
+                ''',
+                ((user_id, day, n) for (user_id, day), n in days.items())
+            )
+            self._db.executemany(
+                'INSERT OR IGNORE INTO applied_comments (channel_id, comment_id) VALUES (?, ?)',
+                ((channel.id, c.id) for c in new)
+            )
+
+        return len(new)
+
+    def iter_rows(self) -> Iterator[dict]:
+        """
+        Iterate over per-author totals.
+
+        Yields:
+            Dicts with profile fields, comments, posts, channels, first_seen,
+            last_seen (aware datetimes), latency_total and latency_count
+        """
+        rows = self._db.execute(
+            '''
+            SELECT a.user_id, a.username, a.first_name, a.last_name, a.comments,
+                   (SELECT COUNT(*) FROM author_posts p WHERE p.user_id = a.user_id),
+                   (SELECT COUNT(*) FROM author_channels c WHERE c.user_id = a.user_id),
+                   a.first_seen, a.last_seen, a.latency_total, a.latency_count
+            FROM authors a
+            '''
+        )
+        for row in rows:
+            yield {
+                'user_id': row[0],
+                'username': row[1],
+                'first_name': row[2],
+                'last_name': row[3],
+                'comments': row[4],
+                'posts': row[5],
+                'channels': row[6],
+                'first_seen': datetime.fromtimestamp(row[7], tz=timezone.utc),
+                'last_seen': datetime.fromtimestamp(row[8], tz=timezone.utc),
+                'latency_total': row[9],
+                'latency_count': row[10],
+            }
+
+    def get(self, user_id: int) -> Optional[dict]:
+        """
+        Get the full aggregate of one author.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            Dict with totals plus 'per_channel' (channel_id -> comments) and
+            'daily' (ISO date -> comments), or None if the author is unknown
+        """
+        row = self._db.execute(
+            'SELECT comments, first_seen, last_seen FROM authors WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        per_channel = dict(self._db.execute(
+            'SELECT channel_id, comments FROM author_channels WHERE user_id = ?', (user_id,)
+        ))
+        daily = {
+            date.fromordinal(date(1970, 1, 1).toordinal() + day).isoformat(): n
+            for day, n in self._db.execute(
+                'SELECT day, comments FROM author_days WHERE user_id = ? ORDER BY day', (user_id,)
+            )
+        }
+        return {
+            'user_id': user_id,
+            'comments': row[0],
+            'first_seen': datetime.fromtimestamp(row[1], tz=timezone.utc),
+            'last_seen': datetime.fromtimestamp(row[2], tz=timezone.utc),
+            'per_channel': per_channel,
+            'daily': daily,
+        }
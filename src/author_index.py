@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Author Index - Deduplicated author identities across all channel exports.
+
+Keeps the latest profile of every user and a bitmap of the channels they
+commented in, plus the members of every channel, so multi-channel queries
+only read the members of the channels asked about.
+
+Usage:
+    python -m src.author_index build
+    python -m src.author_index active --channel @a --channel @b --channel @c --min 2
+    python -m src.author_index show 123456
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.models import ANONYMOUS_USER_ID
+from src.utils import ensure_dir, print_error, print_progress
+
+
+# Index location, next to the channel exports (see loader.OUTPUT_DIR)
+AUTHOR_INDEX_PATH = Path('.specify-for-tg-analysis/memory/authors.sqlite')
+EXPORTS_DIR = AUTHOR_INDEX_PATH.parent / 'channels'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS channels (
+    bit INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL UNIQUE,
+    username TEXT
+);
+CREATE TABLE IF NOT EXISTS authors (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT NOT NULL,
+    last_name TEXT,
+    profile_date INTEGER NOT NULL,
+    channels BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    bit INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (bit, user_id)
+) WITHOUT ROWID;
+'''
+
+
+def _to_bitmap(value: int) -> bytes:
+    """Encode a channel bitmap as little-endian bytes."""
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def _from_bitmap(data: bytes) -> int:
+    """Decode a channel bitmap from little-endian bytes."""
+    return int.from_bytes(data, 'little')
+
+
+@dataclass
+class AuthorEntry:
+    """Deduplicated author with the channels they are active in."""
+    user_id: int
+    username: Optional[str]
+    first_name: str
+    last_name: Optional[str]
+    channels: list[str]
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'channels': self.channels,
+        }
+
+
+class AuthorIndex:
+    """Global author table keyed by user_id with per-author channel bitmaps."""
+
+    def __init__(self, path: Path = AUTHOR_INDEX_PATH):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file
+        """
+        ensure_dir(str(Path(path).parent))
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the index."""
+        self._db.close()
+
+    def _channel_bit(self, channel_id: int, username: Optional[str]) -> int:
+        """Return the bitmap position of a channel, registering it if new."""
+        row = self._db.execute('SELECT bit FROM channels WHERE channel_id = ?', (channel_id,)).fetchone()
+        if row is not None:
+            self._db.execute('UPDATE channels SET username = ? WHERE bit = ?', (username, row[0]))
+            return row[0]
+        cursor = self._db.execute(
+            'INSERT INTO channels (bit, channel_id, username) '
+            'VALUES ((SELECT COUNT(*) FROM channels), ?, ?)',
+            (channel_id, username)
+        )
+        return cursor.lastrowid
+
+    def _authors(self, user_ids: list[int]) -> dict[int, tuple[int, bytes]]:
+        """Return user id -> (profile_date, channels) for the known authors among user_ids."""
+        found = {}
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            found.update(
+                (row[0], row[1:]) for row in self._db.execute(
+                    f"SELECT user_id, profile_date, channels FROM authors "
+                    f"WHERE user_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+            )
+        return found
+
+    def _channel_names(self) -> dict[int, str]:
+        """Return bit -> channel name (username, or id if there is none)."""
+        return {
+            bit: username or str(channel_id)
+            for bit, channel_id, username in self._db.execute('SELECT bit, channel_id, username FROM channels')
+        }
+
+    def add_export(self, data: dict, merge: bool = False) -> int:
+        """
+        Merge the authors of an export into the index.
+
+        The channel's bit is recomputed from this export; profiles are
+        replaced only by ones seen in newer comments.
+
+        Args:
+            data: Export dict as produced by OutputFile.to_dict()
+            merge: Only add the channel to the export's authors, keeping it
+                for authors not in it; for exports holding only new comments
+
+        Returns:
+            Number of distinct authors in the export
+        """
+        channel = data['channel']
+        profiles: dict[int, tuple] = {}
+        for post in channel['posts']:
+            for comment in post['comments']:
+                author = comment['author']
+                user_id = author['user_id']
+                if user_id == ANONYMOUS_USER_ID:
+                    continue
+                date = int(datetime.fromisoformat(comment['date']).timestamp())
+                seen = profiles.get(user_id)
+                if seen is None or date >= seen[3]:
+                    profiles[user_id] = (author.get('username'), author.get('first_name', ''),
+                                         author.get('last_name'), date)
+
+        with self._db:
+            bit = self._channel_bit(channel['id'], channel.get('username'))
+            flag = 1 << bit
+
+            if not merge:
+                # Clear the channel for authors who are no longer in it
+                gone = [
+                    user_id for (user_id,) in self._db.execute('SELECT user_id FROM members WHERE bit = ?', (bit,))
+                    if user_id not in profiles
+                ]
+                self._db.executemany(
+                    'UPDATE authors SET channels = ? WHERE user_id = ?',
+                    [(_to_bitmap(_from_bitmap(bitmap) & ~flag), user_id)
+                     for user_id, (_, bitmap) in self._authors(gone).items()]
+                )
+                self._db.executemany('DELETE FROM members WHERE bit = ? AND user_id = ?',
+                                     [(bit, user_id) for user_id in gone])
+
+            existing = self._authors(list(profiles))
+
+            rows = []
+            for user_id, (username, first_name, last_name, date) in profiles.items():
+                previous = existing.get(user_id)
+                bitmap = flag
+                if previous is not None:
+                    bitmap |= _from_bitmap(previous[1])
+                    if previous[0] > date:
+                        # Keep the newer profile, only add the channel
+                        self._db.execute('UPDATE authors SET channels = ? WHERE user_id = ?',
+                                         (_to_bitmap(bitmap), user_id))
+                        continue
+                rows.append((user_id, username, first_name, last_name, date, _to_bitmap(bitmap)))
+
+            self._db.executemany(
+                'INSERT OR REPLACE INTO authors (user_id, username, first_name, last_name, profile_date, channels) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._db.executemany('INSERT OR IGNORE INTO members (bit, user_id) VALUES (?, ?)',
+                                 [(bit, user_id) for user_id in profiles])
+
+        return len(profiles)
+
+    def _entry(self, row: tuple, names: dict[int, str]) -> AuthorEntry:
+        """Build an AuthorEntry from an authors row."""
+        bitmap = _from_bitmap(row[4])
+        return AuthorEntry(
+            user_id=row[0],
+            username=row[1],
+            first_name=row[2],
+            last_name=row[3],
+            channels=[name for bit, name in sorted(names.items()) if (bitmap >> bit) & 1],
+        )
+
+    def get(self, user_id: int) -> Optional[AuthorEntry]:
+        """
+        Look up one author.
+
+        Args:
+            user_id: Telegram user ID
+
+        Returns:
+            AuthorEntry, or None if the author is unknown
+        """
+        row = self._db.execute(
+            'SELECT user_id, username, first_name, last_name, channels FROM authors WHERE user_id = ?',
+            (user_id,)
+        ).fetchone()
+        return self._entry(row, self._channel_names()) if row else None
+
+    def active_in(self, channels: Optional[list[str]] = None, min_channels: int = 1) -> list[AuthorEntry]:
+        """
+        Find authors active in at least N of the given channels.
+
+        Only the members of the given channels are read, so the cost does
+        not grow with authors of other channels.
+
+        Args:
+            channels: Channel usernames (with or without @); default all channels
+            min_channels: Minimum number of those channels an author must be in
+
+        Returns:
+            Matching authors, most channels first
+
+        Raises:
+            ValueError: If min_channels is below 1
+        """
+        if min_channels < 1:
+            raise ValueError(f"min_channels must be at least 1, got {min_channels}")
+        names = self._channel_names()
+        if channels:
+            wanted = {c.replace('https://t.me/', '').lstrip('@') for c in channels}
+            bits = [bit for bit, name in names.items() if name in wanted]
+        else:
+            bits = list(names)
+        if not bits:
+            return []
+
+        rows = self._db.execute(
+            f"SELECT user_id, username, first_name, last_name, channels FROM ("
+            f"  SELECT user_id, COUNT(*) AS n FROM members WHERE bit IN ({', '.join('?' * len(bits))})"
+            f"  GROUP BY user_id HAVING n >= ?"
+            f") JOIN authors USING (user_id) ORDER BY n DESC, user_id",
+            [*bits, min_channels]
+        )
+        return [self._entry(row, names) for row in rows]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Build and query the cross-channel author index.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s build
+    %(prog)s active --channel @a --channel @b --channel @c --min 2
+    %(prog)s show 123456
+'''
+    )
+    parser.add_argument(
+        '--index',
+        type=Path,
+        default=AUTHOR_INDEX_PATH,
+        help=f'Index file (default: {AUTHOR_INDEX_PATH})'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Index authors of all existing channel exports')
+    build.add_argument(
+        '--dir',
+        type=Path,
+        default=EXPORTS_DIR,
+        help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+    )
+
+    active = subparsers.add_parser('active', help='Authors active in at least N channels')
+    active.add_argument('--channel', action='append', default=None, help='Target channel (repeatable)')
+    active.add_argument('--min', type=int, default=1, help='Minimum number of target channels (default: 1)')
+    active.add_argument('--json', action='store_true', help='Output machine-readable JSON')
+
+    show = subparsers.add_parser('show', help='Show one author')
+    show.add_argument('user_id', type=int, help='Telegram user ID')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+    index = AuthorIndex(args.index)
+
+    try:
+        if args.command == 'build':
+            for path in sorted(Path(args.dir).glob('*.json')):
+                with open(path, 'r', encoding='utf-8') as f:
+                    count = index.add_export(json.load(f))
+                print_progress(f"Indexed {path.name}: {count} authors")
+            return 0
+
+        if args.command == 'show':
+            entry = index.get(args.user_id)
+            if entry is None:
+                print_error(f"Unknown author: {args.user_id}")
+                return 1
+            print_progress(json.dumps(entry.to_dict(), ensure_ascii=False, indent=2))
+            return 0
+
+        if args.min < 1:
+            print_error(f"--min must be at least 1, got {args.min}")
+            return 1
+        entries = index.active_in(args.channel, args.min)
+        if args.json:
+            print_progress(json.dumps([e.to_dict() for e in entries], ensure_ascii=False, indent=2))
+        elif entries:
+            print_progress('\n'.join(
+                f"{e.user_id}  @{e.username or '-'}  {len(e.channels)}: {', '.join(e.channels)}"
+                for e in entries
+            ))
+        return 0
+
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
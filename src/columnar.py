@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Columnar Export - Channel exports as flat, memory-mappable arrays.
+
+Each channel is written to a "<name>.columns" directory next to its JSON
+export. Numeric columns are raw little-endian int64 files ("<column>.i8"),
+text columns are an int64 offsets file ("<column>.offsets.i8", one more
+entry than rows) plus the concatenated UTF-8 bytes ("<column>.utf8").
+meta.json describes the channel and the row count of every table.
+
+The files can be opened without parsing, e.g. with NumPy:
+
+    dates = numpy.memmap('channel.columns/comment_date.i8', dtype='<i8', mode='r')
+
+Usage:
+    python -m src.columnar build
+    python -m src.columnar build --channel @channel_a
+"""
+import argparse
+import json
+import mmap
+import os
+import shutil
+import sys
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from src.utils import ensure_dir, find_exports, print_error, print_progress
+
+
+# Exports live here (see loader.OUTPUT_DIR)
+EXPORTS_DIR = Path('.specify-for-tg-analysis/memory/channels')
+
+COLUMNAR_FORMAT_VERSION = 1
+COLUMNS_SUFFIX = '.columns'
+INT_DTYPE = '<i8'
+
+# Stand-ins for missing values in the integer columns
+NO_REPLY = 0
+NO_VIEWS = -1
+
+TABLES = {
+    'comments': {
+        'columns': ['comment_id', 'comment_post_id', 'comment_author_id', 'comment_date', 'comment_reply_to'],
+        'strings': ['comment_text'],
+    },
+    'posts': {
+        'columns': ['post_id', 'post_date', 'post_views'],
+        'strings': ['post_text'],
+    },
+    'authors': {
+        'columns': ['author_id'],
+        'strings': ['author_username', 'author_first_name', 'author_last_name'],
+    },
+}
+
+
+def get_columnar_path(export_path: str) -> Path:
+    """
+    Get the columnar directory for an export file.
+
+    Args:
+        export_path: Path to export JSON file
+
+    Returns:
+        "<name>.columns" directory beside the export
+    """
+    return Path(export_path).with_suffix(COLUMNS_SUFFIX)
+
+
+def _epoch(value: str) -> int:
+    """Convert an ISO 8601 timestamp to Unix seconds."""
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def int64_bytes(values: array) -> bytes:
+    """
+    Serialize an int64 array in the on-disk layout (little-endian).
+
+    Args:
+        values: array('q')
+
+    Returns:
+        Raw bytes
+    """
+    if sys.byteorder != 'little':
+        values = array('q', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _string_bytes(values: Iterable[Optional[str]]) -> tuple[bytes, bytes]:
+    """Serialize strings as (offsets, data); None is stored as an empty string."""
+    chunks = [(value or '').encode('utf-8') for value in values]
+    offsets = array('q', [0])
+    position = 0
+    for chunk in chunks:
+        position += len(chunk)
+        offsets.append(position)
+    return int64_bytes(offsets), b''.join(chunks)
+
+
+def write_columnar(data: dict, directory: Path) -> dict:
+    """
+    Write an export as columnar arrays.
+
+    Comments are stored in export order together with the id of their
+    post; authors are deduplicated, keeping the first profile seen. The
+    files are built in a temporary directory beside the target, which then
+    replaces the old directory, so readers never see new columns together
+    with an old meta.json.
+
+    Args:
+        data: Export dictionary (OutputFile.to_dict() or the parsed JSON)
+        directory: Target "<name>.columns" directory
+
+    Returns:
+        The meta.json contents
+    """
+    directory = Path(directory)
+    ensure_dir(str(directory.parent))
+
+    ints = {name: array('q') for table in TABLES.values() for name in table['columns']}
+    strings: dict[str, list[Optional[str]]] = {
+        name: [] for table in TABLES.values() for name in table['strings']
+    }
+    seen_authors: set[int] = set()
+
+    for post in data['channel']['posts']:
+        ints['post_id'].append(post['id'])
+        ints['post_date'].append(_epoch(post['date']))
+        ints['post_views'].append(NO_VIEWS if post.get('views') is None else post['views'])
+        strings['post_text'].append(post['text'])
+
+        for comment in post['comments']:
+            author = comment['author']
+            ints['comment_id'].append(comment['id'])
+            ints['comment_post_id'].append(post['id'])
+            ints['comment_author_id'].append(author['user_id'])
+            ints['comment_date'].append(_epoch(comment['date']))
+            ints['comment_reply_to'].append(comment.get('reply_to') or NO_REPLY)
+            strings['comment_text'].append(comment['text'])
+
+            if author['user_id'] not in seen_authors:
+                seen_authors.add(author['user_id'])
+                ints['author_id'].append(author['user_id'])
+                strings['author_username'].append(author.get('username'))
+                strings['author_first_name'].append(author.get('first_name'))
+                strings['author_last_name'].append(author.get('last_name'))
+
+    channel = data['channel']
+    meta = {
+        'format_version': COLUMNAR_FORMAT_VERSION,
+        'dtype': INT_DTYPE,
+        'exported_at': data.get('exported_at'),
+        'channel': {'id': channel['id'], 'username': channel.get('username'), 'title': channel['title']},
+        'tables': {
+            table: {
+                'rows': len(ints[spec['columns'][0]]),
+                'columns': spec['columns'],
+                'strings': spec['strings'],
+            }
+            for table, spec in TABLES.items()
+        },
+    }
+
+    building = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir()
+    try:
+        for name, values in ints.items():
+            (building / f"{name}.i8").write_bytes(int64_bytes(values))
+        for name, values in strings.items():
+            offsets, blob = _string_bytes(values)
+            (building / f"{name}.offsets.i8").write_bytes(offsets)
+            (building / f"{name}.utf8").write_bytes(blob)
+        (building / 'meta.json').write_bytes(json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+
+    # Readers that still have the old files mapped keep working
+    if directory.exists():
+        old = directory.with_name(f"{directory.name}.{os.getpid()}.old")
+        os.rename(directory, old)
+        os.rename(building, directory)
+        shutil.rmtree(old)
+    else:
+        os.rename(building, directory)
+    return meta
+
+
+class StringColumn:
+    """Read-only sequence of strings over an offsets array and a UTF-8 blob."""
+
+    def __init__(self, offsets: Sequence[int], data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('string index out of range')
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class MappedFiles:
+    """
+    Read-only memory maps of files in one directory.
+
+    int64 files are returned as memoryviews (copied arrays on big-endian
+    hosts); all maps are released together by close().
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._maps: list[mmap.mmap] = []
+        self._views: list[memoryview] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release all mapped columns. Views returned earlier become invalid."""
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views.clear()
+        self._maps.clear()
+
+    def map_bytes(self, filename: str) -> memoryview:
+        """
+        Map a file read-only.
+
+        Args:
+            filename: File name within the directory
+
+        Returns:
+            Bytes view of the file (empty if the file is empty)
+        """
+        path = self.directory / filename
+        if path.stat().st_size == 0:
+            return memoryview(b'')
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped)
+        self._views.append(view)
+        return view
+
+    def map_int64(self, filename: str) -> Sequence[int]:
+        """
+        Map a little-endian int64 file.
+
+        Args:
+            filename: File name within the directory
+
+        Returns:
+            Sequence of int64 values
+        """
+        view = self.map_bytes(filename)
+        if sys.byteorder != 'little':
+            values = array('q', view)
+            values.byteswap()
+            return values
+        values = view.cast('q')
+        self._views.append(values)
+        return values
+
+
+class ColumnarExport(MappedFiles):
+    """
+    Memory-mapped reader for a columnar export.
+
+    Columns are mapped lazily, so opening an export costs nothing beyond
+    reading meta.json.
+    """
+
+    def __init__(self, directory: Path):
+        super().__init__(directory)
+        with open(self.directory / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format_version') != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format in {self.directory}")
+
+    @property
+    def channel(self) -> dict:
+        """Channel id, username and title."""
+        return self.meta['channel']
+
+    def rows(self, table: str) -> int:
+        """Number of rows in a table ('comments', 'posts' or 'authors')."""
+        return self.meta['tables'][table]['rows']
+
+    def column(self, name: str) -> Sequence[int]:
+        """
+        Get a numeric column.
+
+        Args:
+            name: Column name, e.g. 'comment_author_id'
+
+        Returns:
+            Sequence of int64 values
+        """
+        return self.map_int64(f"{name}.i8")
+
+    def strings(self, name: str) -> StringColumn:
+        """
+        Get a text column.
+
+        Args:
+            name: Column name, e.g. 'comment_text'
+
+        Returns:
+            StringColumn decoding values on access
+        """
+        return StringColumn(self.map_int64(f"{name}.offsets.i8"), self.map_bytes(f"{name}.utf8"))
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Write channel exports as memory-mappable columnar arrays.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s build
+    %(prog)s build --channel @channel_a
+'''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Convert existing JSON exports')
+    build.add_argument(
+        '--dir',
+        type=Path,
+        default=EXPORTS_DIR,
+        help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+    )
+    build.add_argument('--channel', action='append', default=None, help='Only convert this channel (repeatable)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+
+    paths = find_exports(args.dir, args.channel)
+    if not paths:
+        print_error(f"No channel exports found in {args.dir}")
+        return 1
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = write_columnar(json.load(f), get_columnar_path(path))
+        tables = meta['tables']
+        print_progress(
+            f"{path.name}: {tables['posts']['rows']} posts, {tables['comments']['rows']} comments, "
+            f"{tables['authors']['rows']} authors -> {get_columnar_path(path).name}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
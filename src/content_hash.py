@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Content Hashes - Per-post hashes of exports and diffs between snapshots.
+
+Every post gets a hash over its own content (text, entities), its
+counters (views, replies) and the ids, texts, reply targets, author ids
+and entities of its comments. The loader saves them beside each export
+as "<name>.json.hashes", one row per post:
+
+    [post_id, hash, own_hash, "comment_id:hash comment_id:hash ..."]
+
+own_hash covers the post's text and entities only, so a diff tells edits
+from counters that change on every refresh. The comment digests are kept as one
+string per post and are only split for posts whose hash changed, so a
+diff costs time proportional to the number of posts, not comments.
+Author profile fields (username, names) are not hashed.
+
+Usage:
+    python -m src.content_hash diff old/channel.json channel.json
+    python -m src.content_hash diff channel.json.hashes channel.json --json
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from pathlib import Path
+from typing import Optional
+
+from src.models import Comment, OutputFile, Post
+from src.utils import print_error, print_progress, replace_file
+
+
+HASHES_FORMAT_VERSION = 1
+HASHES_SUFFIX = '.hashes'
+
+# Bytes per digest; 64 bits keep collisions out of reach for a channel
+DIGEST_SIZE = 8
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def digest(value) -> str:
+    """Hash a JSON-serializable value."""
+    return blake2b(_dumps(value).encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def comment_hash(comment: Comment) -> str:
+    """Hash a comment's text, reply target, author id and entities."""
+    return digest([comment.text, comment.reply_to, comment.author.user_id, comment.entities])
+
+
+def post_row(post: Post) -> list:
+    """
+    Return the manifest row of a post.
+
+    Returns:
+        [post_id, hash, own_hash, comment digests]
+    """
+    own = digest([post.id, post.text, post.entities])
+    comments = ' '.join(f"{c.id}:{comment_hash(c)}" for c in post.comments)
+    return [post.id, digest([own, post.views, post.replies, comments]), own, comments]
+
+
+def post_hash(post: Post) -> str:
+    """Return the content hash of a post including its comments."""
+    return post_row(post)[1]
+
+
+@dataclass
+class HashManifest:
+    """Post hashes of one export, newest post first."""
+    exported_at: str
+    status: str
+    channel: dict  # id, username, title
+    posts: list[list] = field(default_factory=list)  # post_row() of every post
+
+    @classmethod
+    def from_export(cls, output: OutputFile) -> 'HashManifest':
+        """Hash every post of an export."""
+        channel = output.channel
+        return cls(
+            exported_at=output.exported_at.isoformat(),
+            status=output.status,
+            channel={'id': channel.id, 'username': channel.username, 'title': channel.title},
+            posts=[post_row(p) for p in channel.posts],
+        )
+
+    def hashes(self) -> dict[int, str]:
+        """Return post id -> hash."""
+        return {row[0]: row[1] for row in self.posts}
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'format_version': HASHES_FORMAT_VERSION,
+            'exported_at': self.exported_at,
+            'status': self.status,
+            'channel': self.channel,
+            'posts': self.posts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'HashManifest':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            exported_at=data['exported_at'],
+            status=data['status'],
+            channel=data['channel'],
+            posts=data['posts'],
+        )
+
+
+def get_hashes_path(export_path: str) -> Path:
+    """
+    Get the hash manifest path for an export file.
+
+    Named "<export>.json.hashes" so "*.json" globs over the export
+    directory never pick it up.
+    """
+    return Path(f"{export_path}{HASHES_SUFFIX}")
+
+
+def write_hashes(manifest: HashManifest, path: Path) -> None:
+    """Save a hash manifest."""
+    replace_file(Path(path), _dumps(manifest.to_dict()).encode('utf-8'))
+
+
+def read_hashes(path: Path) -> HashManifest:
+    """Read a hash manifest."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return HashManifest.from_dict(json.load(f))
+
+
+def load_hashes(path: Path) -> HashManifest:
+    """
+    Get the hash manifest of a snapshot given as a manifest or an export.
+
+    For an export file its saved manifest is used unless the export is
+    newer (e.g. saved by watch mode); then the export is hashed.
+
+    Args:
+        path: "<name>.json.hashes" file or export JSON file
+
+    Returns:
+        HashManifest
+    """
+    path = Path(path)
+    if path.name.endswith(HASHES_SUFFIX):
+        return read_hashes(path)
+    saved = get_hashes_path(str(path))
+    if saved.exists() and os.stat(saved).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        return read_hashes(saved)
+    with open(path, 'r', encoding='utf-8') as f:
+        return HashManifest.from_export(OutputFile.from_dict(json.load(f)))
+
+
+@dataclass
+class SnapshotDiff:
+    """Posts and comments that differ between two snapshots of a channel."""
+    new_posts: list[int] = field(default_factory=list)
+    edited_posts: list[int] = field(default_factory=list)
+    deleted_posts: list[int] = field(default_factory=list)
+    new_comments: list[int] = field(default_factory=list)
+    edited_comments: list[int] = field(default_factory=list)
+    deleted_comments: list[int] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {name: sorted(ids) for name, ids in vars(self).items()}
+
+    def __bool__(self) -> bool:
+        return any(vars(self).values())
+
+
+def _comment_digests(digests: str) -> dict[int, str]:
+    return {int(cid): h for cid, _, h in (item.partition(':') for item in digests.split())}
+
+
+def diff_hashes(old: HashManifest, new: HashManifest) -> SnapshotDiff:
+    """
+    Compare two snapshots by their manifests.
+
+    Posts are matched by id; only posts whose hash differs have their
+    comment digests compared. A post counts as edited when its text or
+    entities changed; changes of its view and reply counters alone are
+    not reported. Comments of new and deleted posts count as new and
+    deleted.
+
+    Args:
+        old: Earlier snapshot
+        new: Later snapshot
+
+    Returns:
+        SnapshotDiff
+    """
+    before = {row[0]: row for row in old.posts}
+    diff = SnapshotDiff()
+    for row in new.posts:
+        post_id = row[0]
+        previous = before.pop(post_id, None)
+        if previous is None:
+            diff.new_posts.append(post_id)
+            diff.new_comments.extend(_comment_digests(row[3]))
+            continue
+        if previous[1] == row[1]:
+            continue
+        if previous[2] != row[2]:
+            diff.edited_posts.append(post_id)
+        if previous[3] != row[3]:
+            was, now = _comment_digests(previous[3]), _comment_digests(row[3])
+            for comment_id, comment_digest in now.items():
+                old_digest = was.pop(comment_id, None)
+                if old_digest is None:
+                    diff.new_comments.append(comment_id)
+                elif old_digest != comment_digest:
+                    diff.edited_comments.append(comment_id)
+            diff.deleted_comments.extend(was)
+    for post_id, row in before.items():
+        diff.deleted_posts.append(post_id)
+        diff.deleted_comments.extend(_comment_digests(row[3]))
+    return diff
+
+
+def format_diff(diff: SnapshotDiff) -> str:
+    """Format a diff as a summary line per kind."""
+    return '\n'.join([
+        f"Posts: {len(diff.new_posts)} new, {len(diff.edited_posts)} edited, {len(diff.deleted_posts)} deleted",
+        f"Comments: {len(diff.new_comments)} new, {len(diff.edited_comments)} edited, "
+        f"{len(diff.deleted_comments)} deleted",
+    ])
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Compare snapshots of a channel by their per-post content hashes.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s diff old/channel.json channel.json
+    %(prog)s diff channel.json.hashes channel.json --json
+'''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    diff = subparsers.add_parser('diff', help='Report new, edited and deleted posts and comments')
+    diff.add_argument('old', type=Path, help='Earlier export or hash manifest')
+    diff.add_argument('new', type=Path, help='Later export or hash manifest')
+    diff.add_argument('--json', action='store_true', help='Print the ids of every change as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+    try:
+        old, new = load_hashes(args.old), load_hashes(args.new)
+    except (OSError, ValueError, KeyError) as e:
+        print_error(f"Cannot read snapshot: {e}")
+        return 1
+    if old.channel['id'] != new.channel['id']:
+        print_error(f"Snapshots are of different channels: {old.channel['title']} and {new.channel['title']}")
+        return 1
+
+    diff = diff_hashes(old, new)
+    if args.json:
+        print_progress(json.dumps(diff.to_dict(), indent=2))
+    else:
+        print_progress(f"{new.channel['title']}: {old.exported_at} -> {new.exported_at}")
+        print_progress(format_diff(diff))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Loader Daemon - Keep one connected client and load channels on request.
+
+Every run of src/loader.py pays for interpreter start, the Telethon
+import, opening the session and the MTProto handshake before the first
+request. The daemon pays them once: it keeps an authorized
+TelegramClientWrapper and the stores open, and accepts load jobs on a
+local Unix socket. Jobs run one at a time in submission order; a job for
+a channel that is already waiting is merged with it. Progress and the
+result are streamed back to the submitter.
+
+Protocol: one JSON object per line. The client sends a request
+({"op": "load", "channel": "@x", ...}, {"op": "status"} or
+{"op": "stop"}); the daemon answers with events until one of them is
+final ("done" or "error" for jobs, "status" or "stopping" otherwise).
+A load request takes the options in JOB_OPTIONS. Text mode, fetch
+profile and takeout belong to the client and are set when serving.
+
+Usage:
+    python -m src.daemon serve
+    python -m src.daemon load @channel --refresh
+    python -m src.daemon status
+    python -m src.daemon stop
+"""
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.activity import ACTIVITY_PATH, ActivityMatrix
+from src.aggregates import AGGREGATES_PATH, AuthorAggregates
+from src.author_index import AUTHOR_INDEX_PATH, AuthorIndex
+from src.config import ConfigError
+from src.errors import AuthError, LoaderError
+from src.fetch_tuning import PROFILE_CHOICES
+from src.loader import HOT_DAYS, get_output_path, load_channel, load_export, save_snapshot
+from src.search_index import INDEX_PATH, SearchIndex
+from src.shards import get_shards_path, load_shards, read_manifest
+from src.telegram_client import (
+    SESSION_DIR,
+    SESSION_NAME,
+    TEXT_MODE_MARKDOWN,
+    TEXT_MODES,
+    USER_CACHE_PATH,
+    TelegramClientWrapper,
+    create_client,
+)
+from src.utils import format_error, print_error, print_progress
+
+
+# Socket next to the session the daemon holds
+SOCKET_PATH = SESSION_DIR / 'loader.sock'
+
+# Events that end the answer to a request
+FINAL_EVENTS = ('done', 'error', 'status', 'stopping')
+
+# Longest request line accepted
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Fields a load request may set (see Job) and their JSON types
+JOB_OPTIONS = {
+    'channel': str,
+    'refresh': bool,
+    'force': bool,
+    'limit': (int, type(None)),
+    'hot_days': int,
+    'compact': bool,
+    'columnar': bool,
+    'sharded': bool,
+    'snapshot': bool,
+}
+
+
+@dataclass
+class Job:
+    """A queued load of one channel and the submitters waiting for it."""
+    id: int
+    channel: str
+    refresh: bool = False
+    force: bool = False
+    limit: Optional[int] = None
+    hot_days: int = HOT_DAYS
+    compact: bool = False
+    columnar: bool = False
+    sharded: bool = False
+    snapshot: bool = False
+    queued_at: float = field(default_factory=time.time)
+    subscribers: list[asyncio.Queue] = field(default_factory=list)
+
+    @property
+    def key(self) -> tuple:
+        """Jobs with the same key do the same work."""
+        name = self.channel.replace('https://t.me/', '').lstrip('@').lower()
+        return (name, self.refresh, self.force, self.limit, self.hot_days, self.compact, self.columnar,
+                self.sharded, self.snapshot)
+
+    def publish(self, event: str, **data) -> None:
+        """Send an event to everyone waiting for this job."""
+        message = {'event': event, 'job': self.id, 'channel': self.channel, **data}
+        for queue in self.subscribers:
+            queue.put_nowait(message)
+
+
+class LoaderDaemon:
+    """Serves load jobs over a Unix socket with one shared client."""
+
+    def __init__(
+        self,
+        client: TelegramClientWrapper,
+        socket_path: Path = SOCKET_PATH,
+        output_dir: Optional[Path] = None,
+        stores: Optional[dict] = None,
+    ):
+        """
+        Create a daemon.
+
+        Args:
+            client: Connected client used for all jobs
+            socket_path: Unix socket to listen on
+            output_dir: Export directory (default: loader.OUTPUT_DIR)
+            stores: Keyword arguments of load_channel for the stores to
+                update (index, aggregates, authors, activity)
+        """
+        self.client = client
+        self.socket_path = Path(socket_path)
+        self.output_dir = output_dir
+        self.stores = stores or {}
+        self.started_at = time.time()
+        self.completed = 0
+        self.failed = 0
+        self.running: Optional[Job] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._waiting: dict[tuple, Job] = {}
+        self._next_id = 1
+        self._stopped = asyncio.Event()
+
+    def submit(self, request: dict) -> Job:
+        """
+        Queue a load request, or join the identical job already waiting.
+
+        Raises:
+            ValueError: If the request has no channel, or options not in
+                JOB_OPTIONS or of the wrong type
+        """
+        if not request.get('channel'):
+            raise ValueError("Missing 'channel'")
+        options = {k: v for k, v in request.items() if k != 'op'}
+        unknown = sorted(set(options) - set(JOB_OPTIONS))
+        if unknown:
+            raise ValueError(f"Unknown options: {', '.join(unknown)}")
+        for name, value in options.items():
+            expected = JOB_OPTIONS[name]
+            if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+                raise ValueError(f"Invalid value for {name!r}: {value!r}")
+        job = Job(id=self._next_id, **options)
+        existing = self._waiting.get(job.key)
+        if existing is not None:
+            return existing
+        self._next_id += 1
+        self._waiting[job.key] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def status(self) -> dict:
+        """Return the running job, the waiting jobs and counters."""
+        return {
+            'running': self.running.channel if self.running else None,
+            'queued': [job.channel for job in self._waiting.values()],
+            'completed': self.completed,
+            'failed': self.failed,
+            'uptime': round(time.time() - self.started_at, 1),
+        }
+
+    async def run_job(self, job: Job) -> None:
+        """Load one channel and publish progress and the result."""
+        started = time.perf_counter()
+
+        def progress(message: str) -> None:
+            job.publish('progress', message=message)
+
+        output_path = get_output_path(job.channel, self.output_dir)
+        shards_path = get_shards_path(output_path)
+        exists = read_manifest(shards_path) is not None if job.sharded else Path(output_path).exists()
+        previous = None
+        if exists:
+            if job.refresh:
+                previous = load_shards(shards_path) if job.sharded else load_export(output_path)
+            elif not job.force:
+                existing = shards_path if job.sharded else output_path
+                job.publish('error', error='LoaderError', message=f"Output file already exists: {existing}",
+                            suggestion='Use --force to overwrite or --refresh to update')
+                self.failed += 1
+                return
+        try:
+            output = await load_channel(
+                client=self.client,
+                channel_id=job.channel,
+                output_path=output_path,
+                limit=job.limit,
+                columnar=job.columnar,
+                previous=previous,
+                hot_days=job.hot_days,
+                compact=job.compact,
+                progress=progress,
+                sharded=job.sharded,
+                **self.stores
+            )
+            if job.snapshot:
+                save_snapshot(output, progress)
+        except LoaderError as e:
+            job.publish('error', error=type(e).__name__, message=str(e), suggestion=getattr(e, 'suggestion', None))
+            self.failed += 1
+            if isinstance(e, AuthError):
+                # The session is unusable for every later job too
+                self.stop()
+            return
+        self.completed += 1
+        job.publish(
+            'done',
+            status=output.status,
+            output_path=str(shards_path) if job.sharded else output_path,
+            posts=output.posts_count,
+            comments=output.comments_count,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+
+    async def _work(self) -> None:
+        """Run queued jobs one at a time."""
+        while True:
+            job = await self._queue.get()
+            del self._waiting[job.key]
+            self.running = job
+            print_progress(f"Job {job.id}: {job.channel}")
+            try:
+                await self.run_job(job)
+            except Exception as e:
+                # Keep serving; report the failure to the submitters
+                job.publish('error', error=type(e).__name__, message=str(e))
+                self.failed += 1
+            finally:
+                self.running = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one request on a client connection."""
+        events: asyncio.Queue = asyncio.Queue()
+        job = None
+        try:
+            try:
+                request = json.loads(await reader.readline())
+                op = request.get('op')
+                if op == 'load':
+                    job = self.submit(request)
+                    job.subscribers.append(events)
+                    events.put_nowait({'event': 'queued', 'job': job.id, 'channel': job.channel,
+                                       'position': list(self._waiting.values()).index(job) + 1})
+                elif op == 'status':
+                    events.put_nowait({'event': 'status', **self.status()})
+                elif op == 'stop':
+                    events.put_nowait({'event': 'stopping'})
+                    self.stop()
+                else:
+                    raise ValueError(f"Unknown op: {op!r}")
+            except (ValueError, TypeError, AttributeError) as e:
+                events.put_nowait({'event': 'error', 'error': 'RequestError', 'message': str(e)})
+
+            while True:
+                event = await events.get()
+                writer.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+                if event['event'] in FINAL_EVENTS:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The submitter went away; the job still runs
+            pass
+        finally:
+            if job is not None:
+                job.subscribers.remove(events)
+            writer.close()
+
+    def stop(self) -> None:
+        """Stop accepting jobs; the running job is cancelled, waiting jobs get an error."""
+        self._stopped.set()
+
+    async def serve(self) -> None:
+        """Listen on the socket until stop() is called."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path), limit=MAX_REQUEST_BYTES)
+        worker = asyncio.create_task(self._work())
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+            if self.running is not None:
+                self.running.publish('error', error='LoaderError', message='Daemon stopped during the job')
+            for job in self._waiting.values():
+                job.publish('error', error='LoaderError', message='Daemon stopped before the job started')
+            # Let the handlers send the final events
+            await asyncio.sleep(0)
+            await server.wait_closed()
+            self.socket_path.unlink(missing_ok=True)
+
+
+async def request(
+    message: dict,
+    socket_path: Path = SOCKET_PATH,
+    on_event: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Send one request to a running daemon.
+
+    Args:
+        message: Request object ({"op": ...})
+        socket_path: Daemon socket
+        on_event: Called with each event before the final one
+
+    Returns:
+        The final event
+
+    Raises:
+        ConnectionError: If no daemon listens on the socket or it hangs up
+    """
+    try:
+        reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    except FileNotFoundError:
+        raise ConnectionRefusedError(f"No daemon socket at {socket_path}")
+    try:
+        writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionResetError('Daemon closed the connection')
+            event = json.loads(line)
+            if event['event'] in FINAL_EVENTS:
+                return event
+            if on_event is not None:
+                on_event(event)
+    finally:
+        writer.close()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Keep a connected loader running and submit load jobs to it.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s serve --fetch-profile auto --takeout
+    %(prog)s load @channel
+    %(prog)s load @channel --refresh --hot-days 3
+    %(prog)s status
+    %(prog)s stop
+'''
+    )
+    parser.add_argument('--socket', type=Path, default=SOCKET_PATH, help='Daemon socket (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Run the daemon in the foreground')
+    serve.add_argument('--session', default=SESSION_NAME, help='Session to hold (default: %(default)s)')
+    serve.add_argument(
+        '--text-mode',
+        choices=TEXT_MODES,
+        default=TEXT_MODE_MARKDOWN,
+        help='How message text is stored (see src.loader, default: %(default)s)'
+    )
+    serve.add_argument(
+        '--fetch-profile',
+        choices=PROFILE_CHOICES,
+        default='default',
+        help='Page size, pause and concurrency of history requests (see src.loader, default: %(default)s)'
+    )
+    serve.add_argument(
+        '--takeout',
+        action='store_true',
+        help='Fetch history through a takeout session when granted (see src.loader)'
+    )
+    serve.add_argument(
+        '--user-cache',
+        action='store_true',
+        help=f'Keep comment authors in {USER_CACHE_PATH} between runs'
+    )
+
+    load = commands.add_parser('load', help='Load a channel through the daemon')
+    load.add_argument('channel', help='Channel username (with @) or URL')
+    load.add_argument('--limit', type=int, default=None, help='Maximum number of posts to load')
+    load.add_argument('--force', action='store_true', help='Overwrite existing output file')
+    load.add_argument('--refresh', action='store_true', help='Update an existing export (see src.loader)')
+    load.add_argument(
+        '--hot-days',
+        type=int,
+        default=HOT_DAYS,
+        help=f'With --refresh, always re-fetch comments of posts younger than this many days (default: {HOT_DAYS})'
+    )
+    load.add_argument('--compact', action='store_true', help='Write the JSON export without indentation')
+    load.add_argument('--columnar', action='store_true', help='Also write memory-mappable columnar arrays')
+    load.add_argument('--sharded', action='store_true', help='Save as monthly shards (see src.loader)')
+    load.add_argument('--snapshot', action='store_true', help='Add the export to the snapshot store (see src.snapshots)')
+    load.add_argument('--quiet', action='store_true', help='Print only the result')
+
+    commands.add_parser('status', help='Show the running and waiting jobs')
+    commands.add_parser('stop', help='Stop the daemon')
+    return parser.parse_args(argv)
+
+
+async def serve_async(args: argparse.Namespace) -> int:
+    """Connect, open the stores and serve until stopped."""
+    try:
+        client = create_client(
+            session_name=args.session,
+            text_mode=args.text_mode,
+            user_cache_path=USER_CACHE_PATH if args.user_cache else None,
+            fetch_profile=args.fetch_profile,
+            takeout=args.takeout
+        )
+    except ConfigError as e:
+        print_error(format_error('ConfigError', str(e), e.args[0] if e.args else None))
+        return 1
+
+    # Kept open for the daemon's life: the loader CLI, the fleet and the
+    # scheduler write the same stores, so each store re-reads its state under
+    # a lock (SQLite's, or meta.lock for the activity matrix) on every write
+    stores = {
+        'index': SearchIndex(INDEX_PATH),
+        'aggregates': AuthorAggregates(AGGREGATES_PATH),
+        'authors': AuthorIndex(AUTHOR_INDEX_PATH),
+        'activity': ActivityMatrix(ACTIVITY_PATH),
+    }
+    try:
+        await client.connect()
+        daemon = LoaderDaemon(client, args.socket, stores=stores)
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, daemon.stop)
+        print_progress(f"Listening on {args.socket}")
+        await daemon.serve()
+        print_progress(f"Stopped after {daemon.completed} jobs ({daemon.failed} failed)")
+        return 0
+    except LoaderError as e:
+        print_error(format_error(type(e).__name__, str(e), getattr(e, 'suggestion', None)))
+        return 1
+    finally:
+        for store in stores.values():
+            store.close()
+        await client.disconnect()
+
+
+async def client_async(args: argparse.Namespace) -> int:
+    """Send a load, status or stop request and print the answer."""
+    if args.command == 'load':
+        message = {
+            'op': 'load',
+            'channel': args.channel,
+            'limit': args.limit,
+            'force': args.force,
+            'refresh': args.refresh,
+            'hot_days': args.hot_days,
+            'compact': args.compact,
+            'columnar': args.columnar,
+            'sharded': args.sharded,
+            'snapshot': args.snapshot,
+        }
+    else:
+        message = {'op': args.command}
+
+    def on_event(event: dict) -> None:
+        if args.command != 'load' or args.quiet:
+            return
+        if event['event'] == 'queued' and event['position'] > 1:
+            print_progress(f"Queued at position {event['position']}")
+        elif event['event'] == 'progress':
+            print_progress(event['message'])
+
+    try:
+        final = await request(message, args.socket, on_event)
+    except ConnectionError as e:
+        print_error(format_error('DaemonError', str(e), 'Start it with: python -m src.daemon serve'))
+        return 1
+
+    if final['event'] == 'error':
+        print_error(format_error(final['error'], final['message'], final.get('suggestion')))
+        return 1
+    if final['event'] == 'done':
+        print_progress(f"{final['status']}: {final['posts']} posts, {final['comments']} comments "
+                       f"in {final['seconds']:.1f}s -> {final['output_path']}")
+        return 2 if final['status'] == 'partial' else 0
+    if final['event'] == 'status':
+        print_progress(f"Running: {final['running'] or '-'}; waiting: {', '.join(final['queued']) or '-'}")
+        print_progress(f"{final['completed']} jobs done, {final['failed']} failed, up {final['uptime']:.0f}s")
+    else:
+        print_progress('Daemon is stopping')
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Main entry point.
+
+    Returns:
+        Exit code (0=success, 1=error, 2=partial export)
+    """
+    args = parse_args(argv)
+    try:
+        return asyncio.run(serve_async(args) if args.command == 'serve' else client_async(args))
+    except KeyboardInterrupt:
+        print_error("\nInterrupted by user")
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
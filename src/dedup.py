@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection - Flag copy-paste spam and bot commenters.
+
+Comments are shingled, MinHash signatures are compared with LSH banding and
+near-duplicate comments are grouped into clusters. Authors whose comments
+are mostly near-duplicates are flagged.
+
+Usage:
+    python -m src.dedup
+    python -m src.dedup --json --channel @channel_a
+"""
+import argparse
+import hashlib
+import json
+import sys
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.loader import OUTPUT_DIR
+from src.models import ANONYMOUS_USER_ID
+from src.utils import find_exports, iter_comment_records, print_error, print_progress, tokenize
+
+
+SHINGLE_SIZE = 5           # Characters per shingle
+MIN_TEXT_LENGTH = 20       # Shorter comments ("thanks!") are too generic to compare
+NUM_PERM = 64              # MinHash signature length
+BANDS = 8                  # LSH bands; NUM_PERM / BANDS rows per band
+SIMILARITY_THRESHOLD = 0.7 # Estimated Jaccard similarity to call two comments duplicates
+SPAM_RATIO = 0.5           # Share of duplicate comments above which an author is flagged
+MIN_DUPLICATES = 2         # Authors need at least this many duplicate comments to be flagged
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Optional[set[bytes]]:
+    """
+    Split normalized text into character shingles.
+
+    Case, punctuation and whitespace differences are ignored.
+
+    Args:
+        text: Comment text
+        size: Characters per shingle
+
+    Returns:
+        Set of UTF-8 encoded shingles, or None if the text is too short
+    """
+    normalized = ' '.join(tokenize(text))
+    if len(normalized) < MIN_TEXT_LENGTH:
+        return None
+    return {normalized[i:i + size].encode('utf-8') for i in range(len(normalized) - size + 1)}
+
+
+def minhash(items: set[bytes]) -> array:
+    """
+    Compute the MinHash signature of a shingle set.
+
+    One SHAKE-128 digest per shingle yields NUM_PERM independent 32-bit
+    hashes at once; the signature is their column-wise minimum, taken by
+    map(min, ...) over all rows in a single C-level call.
+
+    Args:
+        items: Shingles
+
+    Returns:
+        Signature of NUM_PERM unsigned 32-bit values
+    """
+    rows = [array('I', hashlib.shake_128(item).digest(NUM_PERM * 4)) for item in items]
+    return array('I', map(min, *rows))
+
+
+@dataclass
+class AuthorDuplicates:
+    """Duplicate statistics of a single author."""
+    user_id: int
+    username: Optional[str]
+    comments: int = 0
+    duplicates: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """Share of the author's comments that are near-duplicates."""
+        return self.duplicates / self.comments if self.comments else 0.0
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'comments': self.comments,
+            'duplicates': self.duplicates,
+            'ratio': round(self.ratio, 4),
+        }
+
+
+@dataclass
+class DedupResult:
+    """Near-duplicate clusters and per-author statistics."""
+    clusters: list[list[tuple[int, int, int]]] = field(default_factory=list)  # (channel_id, post_id, comment_id)
+    authors: dict[int, AuthorDuplicates] = field(default_factory=dict)
+
+    def flagged(self, ratio: float = SPAM_RATIO, min_duplicates: int = MIN_DUPLICATES) -> list[AuthorDuplicates]:
+        """
+        Authors whose comments are mostly near-duplicates.
+
+        Args:
+            ratio: Minimum share of duplicate comments
+            min_duplicates: Minimum number of duplicate comments
+
+        Returns:
+            Flagged authors, most duplicates first
+        """
+        result = [
+            a for a in self.authors.values()
+            if a.duplicates >= min_duplicates and a.ratio >= ratio
+        ]
+        return sorted(result, key=lambda a: (-a.duplicates, a.user_id))
+
+
+def find_duplicates(
+    records: Iterable[tuple[dict, dict, dict]],
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> DedupResult:
+    """
+    Cluster near-duplicate comments in a single pass.
+
+    Every comment is looked up in one bucket per LSH band. The first comment
+    that landed in a bucket represents it; a candidate is merged into the
+    representative's cluster when their signatures agree on at least
+    `threshold` of positions. Only signatures and union-find parents are kept
+    per comment, in flat arrays.
+
+    Args:
+        records: (channel, post, comment) dicts, e.g. from iter_comment_records
+        threshold: Minimum estimated Jaccard similarity
+
+    Returns:
+        DedupResult with clusters of two or more comments
+    """
+    rows = NUM_PERM // BANDS
+    min_equal = threshold * NUM_PERM
+
+    result = DedupResult()
+    signatures = array('I')
+    parent = array('q')
+    refs: list[tuple[int, int, int]] = []
+    owners = array('q')
+    buckets: dict[tuple[int, bytes], int] = {}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for channel, post, comment in records:
+        author = comment['author']
+        user_id = author['user_id']
+        if user_id == ANONYMOUS_USER_ID:
+            continue
+
+        stats = result.authors.get(user_id)
+        if stats is None:
+            stats = result.authors[user_id] = AuthorDuplicates(user_id=user_id, username=author.get('username'))
+        stats.comments += 1
+
+        items = shingles(comment['text'])
+        if items is None:
+            continue
+
+        signature = minhash(items)
+        i = len(refs)
+        refs.append((channel['id'], post['id'], comment['id']))
+        owners.append(user_id)
+        parent.append(i)
+        signatures.extend(signature)
+
+        for band in range(BANDS):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            j = buckets.setdefault(key, i)
+            if j == i:
+                continue
+            other = signatures[j * NUM_PERM:(j + 1) * NUM_PERM]
+            if sum(map(int.__eq__, signature, other)) >= min_equal:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[ri] = rj
+
+    members: dict[int, list[int]] = {}
+    for i in range(len(refs)):
+        members.setdefault(find(i), []).append(i)
+
+    for group in members.values():
+        if len(group) < 2:
+            continue
+        result.clusters.append([refs[i] for i in group])
+        for i in group:
+            result.authors[owners[i]].duplicates += 1
+
+    return result
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Find near-duplicate comments and flag spam/bot authors.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s
+    %(prog)s --json --channel @channel_a
+    %(prog)s --threshold 0.9 --ratio 0.8
+'''
+    )
+    parser.add_argument(
+        '--dir',
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f'Directory with channel exports (default: {OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--channel',
+        action='append',
+        default=None,
+        help='Only use this channel export (repeatable)'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=SIMILARITY_THRESHOLD,
+        help=f'Similarity to treat comments as duplicates (default: {SIMILARITY_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--ratio',
+        type=float,
+        default=SPAM_RATIO,
+        help=f'Share of duplicate comments to flag an author (default: {SPAM_RATIO})'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output machine-readable JSON'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+
+    paths = find_exports(args.dir, args.channel)
+    if not paths:
+        print_error(f"No channel exports found in {args.dir}")
+        return 1
+
+    result = find_duplicates(iter_comment_records(paths), threshold=args.threshold)
+    flagged = result.flagged(ratio=args.ratio)
+
+    if args.json:
+        print_progress(json.dumps({
+            'clusters': len(result.clusters),
+            'flagged': [a.to_dict() for a in flagged],
+        }, ensure_ascii=False, indent=2))
+    else:
+        print_progress(f"Near-duplicate clusters: {len(result.clusters)}")
+        print_progress(f"Flagged authors: {len(flagged)}")
+        for a in flagged:
+            print_progress(f"  {a.user_id}  @{a.username or '-'}  {a.duplicates}/{a.comments} duplicates")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
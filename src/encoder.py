@@ -0,0 +1,200 @@
+"""Direct JSON encoder for channel exports."""
+import json
+import os
+from datetime import datetime, timezone
+from json.encoder import encode_basestring
+from typing import Iterator, Optional
+
+from src.models import Author, Channel, Comment, OutputFile, Post
+from src.utils import ensure_dir
+
+
+# Deepest nesting in an export: output > channel > posts > post > comments > comment > author
+_MAX_DEPTH = 8
+
+
+def _int(value: Optional[int]) -> str:
+    return 'null' if value is None else int.__repr__(value)
+
+
+def _str(value: Optional[str]) -> str:
+    return 'null' if value is None else encode_basestring(value)
+
+
+class ExportEncoder:
+    """
+    Writes OutputFile JSON straight from the models.
+
+    Produces the same text as json.dump(output.to_dict(), ensure_ascii=False,
+    indent=2) in pretty mode, or as separators=(',', ':') in compact mode,
+    without building the intermediate dictionaries.
+    """
+
+    def __init__(self, pretty: bool = True):
+        """
+        Create an encoder.
+
+        Args:
+            pretty: Indent by 2 spaces like the regular exports; False writes
+                compact JSON without whitespace
+        """
+        self.pretty = pretty
+        # Timestamp caches: date ordinal -> '"YYYY-MM-DDT', second of day -> 'HH:MM:SS+00:00"'
+        self._days: dict[int, str] = {}
+        self._seconds: dict[int, str] = {}
+        if pretty:
+            n = ['\n' + '  ' * depth for depth in range(_MAX_DEPTH)]
+            colon = ': '
+        else:
+            n = [''] * _MAX_DEPTH
+            colon = ':'
+
+        def obj(depth: int, keys: list[str]) -> str:
+            # %-template of an object whose values are all pre-encoded strings
+            inner = n[depth + 1]
+            fields = f',{inner}'.join(f'"{key}"{colon}%s' for key in keys)
+            return f'{{{inner}{fields}{n[depth]}}}'
+
+        self._author = obj(6, ['user_id', 'username', 'first_name', 'last_name'])
+        comment_keys = ['id', 'text', 'date', 'author', 'reply_to']
+        # The author object is inlined, so a comment takes a single format
+        self._comment = self._inline_author(obj(5, comment_keys))
+        self._comment_entities = self._inline_author(obj(5, comment_keys + ['entities']))
+        post_keys = ['id', 'text', 'date', 'views', 'comments', 'replies']
+        self._post = obj(3, post_keys)
+        self._post_entities = obj(3, post_keys + ['entities'])
+        self._comment_sep = f',{n[5]}'
+        self._comments_open, self._comments_close = f'[{n[5]}', f'{n[4]}]'
+        self._post_sep = f',{n[3]}'
+        self._n = n
+        self._colon = colon
+
+    def _inline_author(self, template: str) -> str:
+        """Replace the fourth value of a comment template (the author) with the author template."""
+        parts = template.split('%s')
+        return '%s'.join(parts[:4]) + self._author + '%s'.join(parts[4:])
+
+    def timestamp(self, value: datetime) -> str:
+        """
+        Return a datetime as an encoded ISO 8601 string.
+
+        Whole-second UTC times (all Telegram dates) are assembled from a
+        per-day prefix and a per-second-of-day suffix, both cached, which
+        is several times cheaper than isoformat() on an aware datetime.
+        """
+        if value.microsecond or value.tzinfo is not timezone.utc:
+            return f'"{value.isoformat()}"'
+        day = value.toordinal()
+        prefix = self._days.get(day)
+        if prefix is None:
+            prefix = self._days[day] = f'"{value.date().isoformat()}T'
+        hour, minute, second = value.hour, value.minute, value.second
+        key = hour * 3600 + minute * 60 + second
+        suffix = self._seconds.get(key)
+        if suffix is None:
+            suffix = self._seconds[key] = f'{hour:02d}:{minute:02d}:{second:02d}+00:00"'
+        return prefix + suffix
+
+    def value(self, value, depth: int) -> str:
+        """Encode any JSON value nested at the given depth (used for entities)."""
+        if self.pretty:
+            return json.dumps(value, ensure_ascii=False, indent=2).replace('\n', self._n[depth])
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    def author(self, author: Author) -> str:
+        """Encode an Author."""
+        return self._author % (
+            int.__repr__(author.user_id), _str(author.username), _str(author.first_name), _str(author.last_name)
+        )
+
+    def comment(self, comment: Comment) -> str:
+        """Encode a Comment."""
+        author = comment.author
+        values = (
+            int.__repr__(comment.id),
+            encode_basestring(comment.text),
+            self.timestamp(comment.date),
+            int.__repr__(author.user_id),
+            'null' if author.username is None else encode_basestring(author.username),
+            'null' if author.first_name is None else encode_basestring(author.first_name),
+            'null' if author.last_name is None else encode_basestring(author.last_name),
+            'null' if comment.reply_to is None else int.__repr__(comment.reply_to),
+        )
+        if comment.entities is None:
+            return self._comment % values
+        return self._comment_entities % (values + (self.value(comment.entities, 6),))
+
+    def post(self, post: Post) -> str:
+        """Encode a Post with its comments."""
+        if post.comments:
+            comment = self.comment
+            comments = (
+                self._comments_open
+                + self._comment_sep.join([comment(c) for c in post.comments])
+                + self._comments_close
+            )
+        else:
+            comments = '[]'
+        values = (
+            int.__repr__(post.id),
+            encode_basestring(post.text),
+            self.timestamp(post.date),
+            _int(post.views),
+            comments,
+            _int(post.replies),
+        )
+        if post.entities is None:
+            return self._post % values
+        return self._post_entities % (values + (self.value(post.entities, 4),))
+
+    def iterencode(self, output: OutputFile) -> Iterator[str]:
+        """
+        Encode an OutputFile in chunks of about one post each.
+
+        Args:
+            output: Export to encode
+
+        Yields:
+            JSON text chunks
+        """
+        n, colon = self._n, self._colon
+        channel: Channel = output.channel
+        yield (
+            f'{{{n[1]}"version"{colon}{encode_basestring(output.version)},'
+            f'{n[1]}"status"{colon}{encode_basestring(output.status)},'
+            f'{n[1]}"exported_at"{colon}{self.timestamp(output.exported_at)},'
+            f'{n[1]}"posts_count"{colon}{int.__repr__(output.posts_count)},'
+            f'{n[1]}"comments_count"{colon}{int.__repr__(output.comments_count)},'
+            f'{n[1]}"channel"{colon}{{'
+            f'{n[2]}"id"{colon}{int.__repr__(channel.id)},'
+            f'{n[2]}"username"{colon}{_str(channel.username)},'
+            f'{n[2]}"title"{colon}{encode_basestring(channel.title)},'
+            f'{n[2]}"posts"{colon}'
+        )
+        if not channel.posts:
+            yield '[]'
+        else:
+            yield f'[{n[3]}'
+            for i, post in enumerate(channel.posts):
+                yield self._post_sep + self.post(post) if i else self.post(post)
+            yield f'{n[2]}]'
+        yield f'{n[1]}}}{n[0]}}}'
+
+    def encode(self, output: OutputFile) -> str:
+        """Encode an OutputFile as one string."""
+        return ''.join(self.iterencode(output))
+
+
+def save_export(output: OutputFile, path: str, pretty: bool = True) -> None:
+    """
+    Save an export to a JSON file with ExportEncoder.
+
+    Args:
+        output: Export to save
+        path: File path to save to
+        pretty: Indented like save_to_json(output.to_dict(), path); False for compact JSON
+    """
+    ensure_dir(os.path.dirname(path))
+    encoder = ExportEncoder(pretty)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(encoder.iterencode(output))
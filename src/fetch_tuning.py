@@ -0,0 +1,173 @@
+"""Fetch profiles for history requests and their automatic tuning."""
+import json
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+from src.utils import replace_file
+
+
+# Learned profiles per Telegram account, next to the session files
+PROFILES_PATH = Path('.specify-for-tg-analysis/tg/fetch_profiles.json')
+
+# Telegram returns at most 100 messages per history request
+MAX_PAGE_SIZE = 100
+MIN_PAGE_SIZE = 20
+MAX_WAIT_TIME = 10.0
+MAX_IN_FLIGHT = 16
+
+# Auto-tuning: pages slower than this shrink the page size, pages much
+# faster grow it back
+LATENCY_TARGET = 2.0
+LATENCY_SMOOTHING = 0.2
+# Wait time step after a FloodWait, and pages without one before easing off
+WAIT_STEP = 0.5
+CALM_PAGES = 20
+
+AUTO_PROFILE = 'auto'
+
+
+@dataclass
+class FetchProfile:
+    """How history is requested: messages per page, pause between pages, concurrent requests."""
+    page_size: int = MAX_PAGE_SIZE
+    wait_time: float = 0.0
+    max_in_flight: int = 1
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FetchProfile':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            page_size=data.get('page_size', MAX_PAGE_SIZE),
+            wait_time=data.get('wait_time', 0.0),
+            max_in_flight=data.get('max_in_flight', 1),
+        )
+
+
+# Named starting points; 'auto' starts from the account's learned profile.
+# Only 'aggressive' and auto-tuning fetch several comment threads at once
+FETCH_PROFILES = {
+    'default': FetchProfile(),
+    'gentle': FetchProfile(page_size=50, wait_time=1.0, max_in_flight=1),
+    'aggressive': FetchProfile(page_size=MAX_PAGE_SIZE, wait_time=0.0, max_in_flight=8),
+}
+PROFILE_CHOICES = [*FETCH_PROFILES, AUTO_PROFILE]
+
+
+def save_profiles(profiles: dict[str, FetchProfile], path: Path = PROFILES_PATH) -> None:
+    """
+    Store learned profiles, keeping those of other accounts in the file.
+
+    Args:
+        profiles: Account (Telegram user id) -> profile
+        path: File of learned profiles per account
+    """
+    stored = {}
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    stored.update((account, profile.to_dict()) for account, profile in profiles.items())
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    replace_file(Path(path), json.dumps(stored, indent=2).encode('utf-8'))
+
+
+class FetchTuner:
+    """
+    Holds the current fetch profile and, in auto mode, adapts it.
+
+    Uses additive increase / multiplicative decrease: every FloodWait
+    doubles the wait between pages and halves the requests in flight;
+    each run of CALM_PAGES pages without one eases both back by a step.
+    The page size follows the smoothed page latency.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[FetchProfile] = None,
+        auto: bool = False,
+        path: Optional[Path] = None,
+    ):
+        """
+        Create a tuner.
+
+        Args:
+            profile: Starting profile (default: FETCH_PROFILES['default'])
+            auto: Adapt the profile from observed latency and FloodWaits
+            path: File of learned profiles per account (auto mode only)
+        """
+        self.profile = replace(profile or FETCH_PROFILES['default'])
+        self.auto = auto
+        self.path = path
+        self.account: Optional[str] = None
+        self.pages = 0
+        self.floods = 0
+        self.flood_seconds = 0
+        self.latency: Optional[float] = None
+        self._calm = 0
+
+    def load(self, account: str) -> None:
+        """Start from the profile learned for an account, if there is one."""
+        self.account = account
+        if not self.auto or self.path is None or not Path(self.path).exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            learned = json.load(f).get(account)
+        if learned is not None:
+            self.profile = FetchProfile.from_dict(learned)
+
+    def save(self) -> None:
+        """Persist the current profile for the loaded account."""
+        if not self.auto or self.path is None or self.account is None:
+            return
+        save_profiles({self.account: self.profile}, self.path)
+
+    def record_page(self, latency: float) -> None:
+        """Record a completed page request and its latency in seconds."""
+        self.pages += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        if not self.auto:
+            return
+
+        profile = self.profile
+        page_size = profile.page_size
+        if self.latency > LATENCY_TARGET:
+            profile.page_size = max(MIN_PAGE_SIZE, page_size // 2)
+        elif self.latency < LATENCY_TARGET / 4:
+            profile.page_size = min(MAX_PAGE_SIZE, page_size * 2)
+        if profile.page_size != page_size:
+            # Judge the new size by its own latency
+            self.latency = None
+
+        self._calm += 1
+        if self._calm >= CALM_PAGES:
+            self._calm = 0
+            profile.wait_time = max(0.0, round(profile.wait_time - WAIT_STEP, 3))
+            profile.max_in_flight = min(MAX_IN_FLIGHT, profile.max_in_flight + 1)
+
+    def record_flood(self, seconds: int) -> None:
+        """Record a FloodWait of the given number of seconds."""
+        self.floods += 1
+        self.flood_seconds += seconds
+        if not self.auto:
+            return
+        self._calm = 0
+        profile = self.profile
+        profile.wait_time = min(MAX_WAIT_TIME, max(profile.wait_time * 2, WAIT_STEP))
+        profile.max_in_flight = max(1, profile.max_in_flight // 2)
+
+    def stats(self) -> dict:
+        """Return the current profile and request counters."""
+        return {
+            **self.profile.to_dict(),
+            'pages': self.pages,
+            'floods': self.floods,
+            'flood_seconds': self.flood_seconds,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+        }
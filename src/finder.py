@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Early-Adopter Finder - Rank channel commenters by engagement.
+
+Reads the JSON exports written by the loader and ranks comment authors.
+
+Usage:
+    python -m src.finder
+    python -m src.finder --top 50 --json
+    python -m src.finder --channel channel_a --channel channel_b
+"""
+import argparse
+import heapq
+import json
+import math
+import sys
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.aggregates import AGGREGATES_PATH, AuthorAggregates
+from src.dedup import find_duplicates
+from src.loader import OUTPUT_DIR
+from src.models import ANONYMOUS_USER_ID
+from src.parallel import map_shards
+from src.utils import find_exports, iter_comment_records, print_error, print_progress
+
+
+# Scoring weights
+CHANNEL_WEIGHT = 1.0           # Bonus per additional channel the author is active in
+RECENCY_HALF_LIFE_DAYS = 30.0  # Activity loses half its weight after this many days
+LATENCY_HALF_LIFE_HOURS = 6.0  # Reply speed bonus halves every this many hours
+
+
+@dataclass
+class AuthorStats:
+    """Engagement features of a single comment author."""
+    user_id: int
+    username: Optional[str]
+    first_name: str
+    last_name: Optional[str]
+    comments: int = 0
+    posts: int = 0
+    channels: int = 0
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    latency_total: float = 0.0  # Seconds between post and comment, summed
+    latency_count: int = 0
+    score: float = 0.0
+    # Last post/channel seen, used to count distinct ones in a single pass
+    _last_post: Optional[tuple] = field(default=None, repr=False, compare=False)
+    _last_channel: Optional[int] = field(default=None, repr=False, compare=False)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        """Average reply latency in seconds, or None if unknown."""
+        if not self.latency_count:
+            return None
+        return self.latency_total / self.latency_count
+
+    def add(self, channel_id: int, post_id: int, date: datetime,
+            latency: Optional[float]) -> None:
+        """
+        Account for one comment.
+
+        Exports list each post once and each channel in one file, so comparing
+        with the previously seen post/channel is enough to count distinct ones.
+
+        Args:
+            channel_id: Channel the comment belongs to
+            post_id: Post the comment belongs to
+            date: Comment date
+            latency: Seconds since the post was published, if known
+        """
+        self.comments += 1
+        if self._last_channel != channel_id:
+            self._last_channel = channel_id
+            self.channels += 1
+        if self._last_post != (channel_id, post_id):
+            self._last_post = (channel_id, post_id)
+            self.posts += 1
+        if self.first_seen is None or date < self.first_seen:
+            self.first_seen = date
+        if self.last_seen is None or date > self.last_seen:
+            self.last_seen = date
+        if latency is not None and latency >= 0:
+            self.latency_total += latency
+            self.latency_count += 1
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'comments': self.comments,
+            'posts': self.posts,
+            'channels': self.channels,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'mean_latency': self.mean_latency,
+            'score': round(self.score, 6),
+        }
+
+
+def aggregate_authors(records: Iterable[tuple[dict, dict, dict]]) -> dict[int, AuthorStats]:
+    """
+    Compute per-author engagement features in a single pass.
+
+    Anonymous comments are skipped. Profile fields are taken from the most
+    recent comment of each author.
+
+    Args:
+        records: (channel, post, comment) dicts, e.g. from iter_comment_records
+
+    Returns:
+        Dict mapping user_id to AuthorStats
+    """
+    stats: dict[int, AuthorStats] = {}
+    post_key = None
+    post_date = None
+
+    for channel, post, comment in records:
+        author = comment['author']
+        user_id = author['user_id']
+        if user_id == ANONYMOUS_USER_ID:
+            continue
+
+        # Post date is parsed once per post, not once per comment
+        if post_key is not post:
+            post_key = post
+            post_date = datetime.fromisoformat(post['date']) if post.get('date') else None
+
+        date = datetime.fromisoformat(comment['date'])
+        latency = (date - post_date).total_seconds() if post_date else None
+
+        entry = stats.get(user_id)
+        if entry is None:
+            entry = stats[user_id] = AuthorStats(
+                user_id=user_id,
+                username=author.get('username'),
+                first_name=author.get('first_name', ''),
+                last_name=author.get('last_name'),
+            )
+        elif entry.last_seen is None or date >= entry.last_seen:
+            entry.username = author.get('username')
+            entry.first_name = author.get('first_name', '')
+            entry.last_name = author.get('last_name')
+
+        entry.add(channel['id'], post['id'], date, latency)
+
+    return stats
+
+
+def aggregate_shard(paths: list[Path]) -> tuple[array, array, array, list[tuple]]:
+    """
+    Aggregate a shard of exports into compact arrays (process-pool worker).
+
+    Args:
+        paths: Export files of the shard
+
+    Returns:
+        (user_ids, counts, times, profiles): counts holds comments, posts,
+        channels and latency_count per author; times holds first_seen and
+        last_seen (epoch seconds) and latency_total; profiles holds
+        (username, first_name, last_name)
+    """
+    stats = aggregate_authors(iter_comment_records(paths))
+    user_ids = array('q')
+    counts = array('q')
+    times = array('d')
+    profiles = []
+    for s in stats.values():
+        user_ids.append(s.user_id)
+        counts.extend((s.comments, s.posts, s.channels, s.latency_count))
+        times.extend((s.first_seen.timestamp(), s.last_seen.timestamp(), s.latency_total))
+        profiles.append((s.username, s.first_name, s.last_name))
+    return user_ids, counts, times, profiles
+
+
+def merge_shards(partials: Iterable[tuple[array, array, array, list[tuple]]]) -> dict[int, AuthorStats]:
+    """
+    Merge per-shard arrays from aggregate_shard.
+
+    Shards hold different exports, so counts add up; the profile is taken
+    from the shard where the author was seen last.
+
+    Args:
+        partials: Results of aggregate_shard
+
+    Returns:
+        Dict mapping user_id to AuthorStats
+    """
+    stats: dict[int, AuthorStats] = {}
+    for user_ids, counts, times, profiles in partials:
+        for i, user_id in enumerate(user_ids):
+            comments, posts, channels, latency_count = counts[4 * i:4 * i + 4]
+            first, last, latency_total = times[3 * i:3 * i + 3]
+            first_seen = datetime.fromtimestamp(first, tz=timezone.utc)
+            last_seen = datetime.fromtimestamp(last, tz=timezone.utc)
+            username, first_name, last_name = profiles[i]
+
+            entry = stats.get(user_id)
+            if entry is None:
+                stats[user_id] = AuthorStats(
+                    user_id=user_id,
+                    username=username,
+                    first_name=first_name,
+                    last_name=last_name,
+                    comments=comments,
+                    posts=posts,
+                    channels=channels,
+                    first_seen=first_seen,
+                    last_seen=last_seen,
+                    latency_total=latency_total,
+                    latency_count=latency_count,
+                )
+                continue
+
+            entry.comments += comments
+            entry.posts += posts
+            entry.channels += channels
+            entry.latency_total += latency_total
+            entry.latency_count += latency_count
+            entry.first_seen = min(entry.first_seen, first_seen)
+            if last_seen >= entry.last_seen:
+                entry.last_seen = last_seen
+                entry.username, entry.first_name, entry.last_name = username, first_name, last_name
+    return stats
+
+
+def stats_from_aggregates(store: AuthorAggregates) -> dict[int, AuthorStats]:
+    """
+    Read pre-aggregated author features maintained by the loader.
+
+    Args:
+        store: Per-author aggregate store
+
+    Returns:
+        Dict mapping user_id to AuthorStats
+    """
+    return {row['user_id']: AuthorStats(**row) for row in store.iter_rows()}
+
+
+def score_author(stats: AuthorStats, now: datetime) -> float:
+    """
+    Compute the early-adopter score of an author.
+
+    Activity (comments, posts, channels) is scaled down by how long ago the
+    author was last seen and scaled up by how fast they reply to new posts.
+
+    Args:
+        stats: Author features
+        now: Reference time for recency
+
+    Returns:
+        Non-negative score, higher is better
+    """
+    activity = (
+        math.log1p(stats.comments)
+        + math.log1p(stats.posts)
+        + CHANNEL_WEIGHT * max(stats.channels - 1, 0)
+    )
+
+    recency = 1.0
+    if stats.last_seen is not None:
+        age_days = max((now - stats.last_seen).total_seconds(), 0.0) / 86400
+        recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    speed = 0.0
+    latency = stats.mean_latency
+    if latency is not None:
+        speed = 0.5 ** (latency / 3600 / LATENCY_HALF_LIFE_HOURS)
+
+    return activity * (0.5 + 0.5 * recency) * (1.0 + 0.5 * speed)
+
+
+def rank_authors(
+    stats: dict[int, AuthorStats],
+    top_k: int = 20,
+    now: Optional[datetime] = None,
+    exclude: Optional[set[int]] = None,
+) -> list[AuthorStats]:
+    """
+    Score authors and select the top K.
+
+    Args:
+        stats: Dict mapping user_id to AuthorStats
+        top_k: Number of authors to return
+        now: Reference time for recency (default: latest activity in the data)
+        exclude: User IDs to leave out, e.g. flagged spam authors
+
+    Returns:
+        Top K authors, best first
+    """
+    if now is None:
+        now = max((s.last_seen for s in stats.values() if s.last_seen), default=None)
+    candidates = [s for s in stats.values() if not exclude or s.user_id not in exclude]
+    for entry in candidates:
+        entry.score = score_author(entry, now) if now else 0.0
+    return heapq.nlargest(top_k, candidates, key=lambda s: (s.score, s.comments))
+
+
+def format_table(ranked: list[AuthorStats]) -> str:
+    """
+    Format ranked authors as a human-readable table.
+
+    Args:
+        ranked: Authors, best first
+
+    Returns:
+        Table as a string
+    """
+    lines = [f"{'#':>3}  {'score':>7}  {'comments':>8}  {'posts':>5}  {'chans':>5}  author"]
+    for i, s in enumerate(ranked, 1):
+        name = f"@{s.username}" if s.username else ' '.join(filter(None, [s.first_name, s.last_name]))
+        lines.append(
+            f"{i:>3}  {s.score:>7.3f}  {s.comments:>8}  {s.posts:>5}  {s.channels:>5}  {name} ({s.user_id})"
+        )
+    return '\n'.join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Rank commenters of exported channels as potential early adopters.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s
+    %(prog)s --top 50 --json
+    %(prog)s --channel @channel_a --channel @channel_b
+'''
+    )
+    parser.add_argument(
+        '--dir',
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f'Directory with channel exports (default: {OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--channel',
+        action='append',
+        default=None,
+        help='Only use this channel export (repeatable)'
+    )
+    parser.add_argument(
+        '--aggregates',
+        nargs='?',
+        type=Path,
+        const=AGGREGATES_PATH,
+        default=None,
+        help=f'Read pre-aggregated rows instead of exports (default store: {AGGREGATES_PATH})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Parse and aggregate exports in this many processes (default: 1)'
+    )
+    parser.add_argument(
+        '--exclude-spam',
+        action='store_true',
+        help='Leave out authors whose comments are mostly near-duplicates'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=20,
+        help='Number of authors to output (default: 20)'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output machine-readable JSON'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+
+    paths = find_exports(args.dir, args.channel)
+    if args.aggregates is not None:
+        if args.channel:
+            print_error("--channel cannot be combined with --aggregates")
+            return 1
+        store = AuthorAggregates(args.aggregates)
+        try:
+            stats = stats_from_aggregates(store)
+        finally:
+            store.close()
+    else:
+        if not paths:
+            print_error(f"No channel exports found in {args.dir}")
+            return 1
+        if args.workers > 1:
+            stats = merge_shards(map_shards(aggregate_shard, paths, args.workers))
+        else:
+            stats = aggregate_authors(iter_comment_records(paths))
+
+    exclude = None
+    if args.exclude_spam:
+        result = find_duplicates(iter_comment_records(paths))
+        exclude = {a.user_id for a in result.flagged()}
+
+    ranked = rank_authors(stats, top_k=args.top, exclude=exclude)
+
+    if args.json:
+        print_progress(json.dumps([s.to_dict() for s in ranked], ensure_ascii=False, indent=2))
+    else:
+        print_progress(format_table(ranked))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Fleet Loader - Load many channels in several processes.
+
+Telethon's decryption and message parsing are CPU-bound, so a single
+event loop tops out on one core once fetching is concurrent. The fleet
+loader runs one worker process per Telegram session; each worker has its
+own TelegramClientWrapper and claims the next channel from a shared
+counter whenever it is idle, so fast workers take over the work of slow
+ones. The stores (search index, aggregates, author index, activity
+matrix) and the learned fetch profiles are single-writer and are updated
+by the parent once all workers have finished.
+
+Usage:
+    python -m src.fleet @channel_a @channel_b @channel_c --workers 3
+    python -m src.fleet --from-file channels.txt --sessions session,session-2 --refresh
+"""
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.activity import ACTIVITY_PATH, ActivityMatrix
+from src.aggregates import AGGREGATES_PATH, AuthorAggregates
+from src.author_index import AUTHOR_INDEX_PATH, AuthorIndex
+from src.config import ConfigError
+from src.errors import AuthError, LoaderError
+from src.fetch_tuning import PROFILE_CHOICES, PROFILES_PATH, FetchProfile, save_profiles
+from src.loader import HOT_DAYS, OUTPUT_DIR, load_channel, load_export
+from src.search_index import INDEX_PATH, SearchIndex
+from src.telegram_client import SESSION_NAME, TEXT_MODE_MARKDOWN, TEXT_MODES, TelegramClientWrapper, create_client
+from src.utils import ensure_dir, format_error, print_error, print_progress
+
+
+# Channels loaded at the same time by each worker
+DEFAULT_PER_WORKER = 2
+
+# Set in each worker process by _init_worker
+_next_job = None
+
+
+@dataclass
+class ChannelResult:
+    """Outcome of loading one channel."""
+    channel: str
+    output_path: str
+    worker: int
+    posts: int = 0
+    comments: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class WorkerReport:
+    """Results and metrics of one worker process."""
+    worker: int
+    session: str
+    results: list[ChannelResult] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    error: Optional[str] = None
+    # (account, FetchProfile.to_dict()) learned by auto-tuning, saved by the parent
+    fetch_profile: Optional[tuple[str, dict]] = None
+
+    @property
+    def posts(self) -> int:
+        return sum(r.posts for r in self.results)
+
+    @property
+    def comments(self) -> int:
+        return sum(r.comments for r in self.results)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if r.error)
+
+
+def default_sessions(workers: int) -> list[str]:
+    """Return session names for the given number of workers: session, session-2, ..."""
+    return [SESSION_NAME] + [f"{SESSION_NAME}-{i}" for i in range(2, workers + 1)]
+
+
+def plan_jobs(channels: list[str], output_dir: Path = OUTPUT_DIR) -> list[tuple[str, str]]:
+    """
+    Map channels to output files, one job per output file.
+
+    Usernames and URLs of the same channel (Telegram usernames are case
+    insensitive) collapse into a single job, so no two workers ever write
+    the same file. Channels with an existing export come first, largest
+    first, so the long loads start early and small ones fill the gaps.
+
+    Args:
+        channels: Channel usernames or URLs
+        output_dir: Directory for the JSON exports
+
+    Returns:
+        (channel, output_path) pairs
+    """
+    jobs: dict[str, tuple[str, str]] = {}
+    for channel in channels:
+        name = channel.replace('https://t.me/', '').lstrip('@')
+        key = name.lower()
+        if key in jobs:
+            print_error(f"Skipping duplicate channel: {channel}")
+            continue
+        jobs[key] = (channel, str(Path(output_dir) / f"{name}.json"))
+
+    def size(job: tuple[str, str]) -> int:
+        path = Path(job[1])
+        return path.stat().st_size if path.exists() else 0
+
+    return sorted(jobs.values(), key=size, reverse=True)
+
+
+def _init_worker(counter, lock) -> None:
+    """Give a worker process access to the shared job counter."""
+    global _next_job
+
+    def next_job() -> int:
+        with lock:
+            index = counter.value
+            counter.value += 1
+        return index
+
+    _next_job = next_job
+
+
+async def _run_worker(
+    report: WorkerReport,
+    jobs: list[tuple[str, str]],
+    next_job: Callable[[], int],
+    client_factory: Callable[[str], TelegramClientWrapper],
+    per_worker: int,
+    limit: Optional[int],
+    refresh: bool,
+    hot_days: int,
+) -> None:
+    """Load channels claimed from the shared counter until none are left."""
+    client = client_factory(report.session)
+    await client.connect()
+    # Workers sharing the profiles file would overwrite each other's
+    # profiles; the parent saves them all (see save_fetch_profiles)
+    tuner = client.tuner
+    tuner.path = None
+
+    async def loop() -> None:
+        while True:
+            index = next_job()
+            if index >= len(jobs):
+                return
+            channel, output_path = jobs[index]
+            result = ChannelResult(channel, output_path, report.worker)
+            # Cleared once the load returns: a sibling's AuthError cancels
+            # this load, and a cancelled result must not look finished
+            result.error = 'interrupted'
+            report.results.append(result)
+            started = time.perf_counter()
+            try:
+                previous = load_export(output_path) if refresh and Path(output_path).exists() else None
+                output = await load_channel(
+                    client=client,
+                    channel_id=channel,
+                    output_path=output_path,
+                    limit=limit,
+                    previous=previous,
+                    hot_days=hot_days
+                )
+                result.error = None
+                result.posts = output.posts_count
+                result.comments = output.comments_count
+                if output.status != 'complete':
+                    result.error = f"saved a {output.status} export"
+            except AuthError as e:
+                result.error = str(e)
+                raise
+            except LoaderError as e:
+                result.error = str(e)
+            except Exception as e:
+                # Fails this channel only; the worker goes on with the next one
+                result.error = f"{type(e).__name__}: {e}"
+            result.seconds = time.perf_counter() - started
+
+    try:
+        await asyncio.gather(*(loop() for _ in range(per_worker)))
+    finally:
+        if tuner.auto and tuner.account is not None:
+            report.fetch_profile = (tuner.account, tuner.profile.to_dict())
+        await client.disconnect()
+
+
+def run_worker(
+    worker: int,
+    session: str,
+    jobs: list[tuple[str, str]],
+    client_factory: Callable[[str], TelegramClientWrapper] = create_client,
+    per_worker: int = DEFAULT_PER_WORKER,
+    limit: Optional[int] = None,
+    refresh: bool = False,
+    hot_days: int = HOT_DAYS,
+) -> WorkerReport:
+    """
+    Worker process entry point (see run_fleet).
+
+    Returns:
+        WorkerReport; a failure that stops the worker (e.g. connecting or
+        authorizing) is reported in its error field
+    """
+    report = WorkerReport(worker, session)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        asyncio.run(_run_worker(report, jobs, _next_job, client_factory, per_worker, limit, refresh, hot_days))
+    except LoaderError as e:
+        report.error = str(e)
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+    report.wall_seconds = time.perf_counter() - wall
+    report.cpu_seconds = time.process_time() - cpu
+    return report
+
+
+def run_fleet(
+    channels: list[str],
+    sessions: list[str],
+    output_dir: Path = OUTPUT_DIR,
+    client_factory: Callable[[str], TelegramClientWrapper] = create_client,
+    per_worker: int = DEFAULT_PER_WORKER,
+    limit: Optional[int] = None,
+    refresh: bool = False,
+    hot_days: int = HOT_DAYS,
+) -> list[WorkerReport]:
+    """
+    Load channels with one worker process per session.
+
+    Workers claim channels one at a time from a shared counter, so the
+    load balances itself however uneven the channels are. Channels not
+    loaded by a worker that failed to connect are picked up by the others.
+    A worker process that dies is reported with an empty result list.
+
+    Args:
+        channels: Channel usernames or URLs
+        sessions: Session names, one worker each (sessions must be authorized)
+        output_dir: Directory for the JSON exports
+        client_factory: Module-level function creating a client for a session
+        per_worker: Channels loaded at the same time by each worker
+        limit: Maximum number of posts per channel
+        refresh: Update existing exports (see load_channel's previous)
+        hot_days: With refresh, always re-fetch comments of posts younger than this
+
+    Returns:
+        One WorkerReport per worker
+    """
+    ensure_dir(str(output_dir))
+    jobs = plan_jobs(channels, output_dir)
+    context = multiprocessing.get_context()
+    counter = context.Value('q', 0, lock=False)
+    lock = context.Lock()
+
+    with ProcessPoolExecutor(
+        max_workers=len(sessions),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(counter, lock)
+    ) as executor:
+        futures = [
+            executor.submit(run_worker, worker, session, jobs, client_factory, per_worker, limit, refresh, hot_days)
+            for worker, session in enumerate(sessions)
+        ]
+        reports = []
+        for worker, (session, future) in enumerate(zip(sessions, futures)):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                reports.append(WorkerReport(worker, session, error=f"Worker process failed: {e!r}"))
+        return reports
+
+
+def save_fetch_profiles(reports: list[WorkerReport], path: Path = PROFILES_PATH) -> None:
+    """
+    Save the profiles learned by auto-tuning workers in one write.
+
+    When several workers used the same account, the most cautious
+    profile (longest wait, fewest requests in flight) is kept.
+    """
+    profiles: dict[str, FetchProfile] = {}
+    for report in reports:
+        if report.fetch_profile is None:
+            continue
+        account, learned = report.fetch_profile
+        profile = FetchProfile.from_dict(learned)
+        kept = profiles.get(account)
+        if kept is None or (profile.wait_time, -profile.max_in_flight) > (kept.wait_time, -kept.max_in_flight):
+            profiles[account] = profile
+    if profiles:
+        save_profiles(profiles, path)
+
+
+def update_stores(reports: list[WorkerReport]) -> None:
+    """Add the exports written by the workers to the single-writer stores."""
+    index = SearchIndex(INDEX_PATH)
+    aggregates = AuthorAggregates(AGGREGATES_PATH)
+    authors = AuthorIndex(AUTHOR_INDEX_PATH)
+    activity = ActivityMatrix(ACTIVITY_PATH)
+    try:
+        for report in reports:
+            # A worker that stopped early may have left exports half written
+            if report.error:
+                continue
+            for result in report.results:
+                if result.error:
+                    continue
+                output = load_export(result.output_path)
+                for post in output.channel.posts:
+                    aggregates.add_comments(output.channel, post, post.comments)
+                data = output.to_dict()
+                index.add_export(data)
+                authors.add_export(data)
+                activity.add_export(data)
+    finally:
+        index.close()
+        aggregates.close()
+        authors.close()
+        activity.close()
+
+
+def build_report(reports: list[WorkerReport]) -> dict:
+    """Combine worker reports into one summary dictionary."""
+    results = [r for report in reports for r in report.results]
+    paths = [r.output_path for r in results]
+    wall = max((report.wall_seconds for report in reports), default=0.0)
+    return {
+        'channels': len(results),
+        'failed': sum(report.failed for report in reports),
+        'posts': sum(report.posts for report in reports),
+        'comments': sum(report.comments for report in reports),
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(sum(report.cpu_seconds for report in reports), 3),
+        'duplicate_outputs': sorted({p for p in paths if paths.count(p) > 1}),
+        'workers': [
+            {
+                'worker': report.worker,
+                'session': report.session,
+                'channels': len(report.results),
+                'failed': report.failed,
+                'posts': report.posts,
+                'comments': report.comments,
+                'wall_seconds': round(report.wall_seconds, 3),
+                'cpu_seconds': round(report.cpu_seconds, 3),
+                'error': report.error,
+            }
+            for report in reports
+        ],
+        'results': [asdict(r) for r in results],
+    }
+
+
+def format_report(report: dict) -> str:
+    """Format a combined report as text."""
+    lines = [f"{'worker':>6}  {'session':<16} {'channels':>8} {'failed':>6} {'posts':>8} {'comments':>9} "
+             f"{'wall s':>8} {'cpu s':>8}"]
+    for w in report['workers']:
+        lines.append(f"{w['worker']:>6}  {w['session']:<16} {w['channels']:>8} {w['failed']:>6} {w['posts']:>8} "
+                     f"{w['comments']:>9} {w['wall_seconds']:>8.1f} {w['cpu_seconds']:>8.1f}"
+                     + (f"  {w['error']}" if w['error'] else ''))
+    for r in report['results']:
+        if r['error']:
+            lines.append(f"  {r['channel']}: {r['error']}")
+    lines.append(f"Total: {report['channels']} channels ({report['failed']} failed), {report['posts']} posts, "
+                 f"{report['comments']} comments in {report['wall_seconds']:.1f}s")
+    return '\n'.join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Load many channels in parallel worker processes.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s @channel_a @channel_b @channel_c --workers 3
+    %(prog)s --from-file channels.txt --sessions session,session-2 --refresh
+    %(prog)s --from-file channels.txt --workers 4 --report report.json
+'''
+    )
+    parser.add_argument('channels', nargs='*', help='Channel usernames (with @) or URLs')
+    parser.add_argument(
+        '--from-file',
+        type=Path,
+        default=None,
+        help='Read channels from a file, one per line'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=2,
+        help='Number of worker processes, using sessions session, session-2, ... (default: 2)'
+    )
+    parser.add_argument(
+        '--sessions',
+        default=None,
+        help='Comma-separated session names, one worker each (overrides --workers)'
+    )
+    parser.add_argument(
+        '--per-worker',
+        type=int,
+        default=DEFAULT_PER_WORKER,
+        help=f'Channels loaded at the same time by each worker (default: {DEFAULT_PER_WORKER})'
+    )
+    parser.add_argument('--limit', type=int, default=None, help='Maximum number of posts per channel')
+    parser.add_argument('--refresh', action='store_true', help='Update existing exports instead of reloading them')
+    parser.add_argument(
+        '--hot-days',
+        type=int,
+        default=HOT_DAYS,
+        help=f'With --refresh, always re-fetch comments of posts younger than this many days (default: {HOT_DAYS})'
+    )
+    parser.add_argument(
+        '--text-mode',
+        choices=TEXT_MODES,
+        default=TEXT_MODE_MARKDOWN,
+        help='How message text is stored (see src.loader, default: %(default)s)'
+    )
+    parser.add_argument(
+        '--fetch-profile',
+        choices=PROFILE_CHOICES,
+        default='default',
+        help='Page size, pause and concurrency of history requests (see src.loader, default: %(default)s)'
+    )
+    parser.add_argument(
+        '--takeout',
+        action='store_true',
+        help='Fetch history through a takeout session per worker when granted (see src.loader)'
+    )
+    parser.add_argument('--report', type=Path, default=None, help='Also write the combined report as JSON to this file')
+    return parser.parse_args(argv)
+
+
+async def authorize_sessions(sessions: list[str]) -> None:
+    """Connect each session once in this process, so login prompts appear here rather than in a worker."""
+    for session in sessions:
+        client = create_client(session)
+        try:
+            await client.connect()
+        finally:
+            await client.disconnect()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Main entry point.
+
+    Returns:
+        Exit code (0=success, 1=error, 2=some channels failed)
+    """
+    args = parse_args(argv)
+    channels = list(args.channels)
+    if args.from_file:
+        with open(args.from_file, 'r', encoding='utf-8') as f:
+            channels.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not channels:
+        print_error("No channels given")
+        return 1
+
+    sessions = [s.strip() for s in args.sessions.split(',')] if args.sessions else default_sessions(args.workers)
+    try:
+        asyncio.run(authorize_sessions(sessions))
+    except ConfigError as e:
+        print_error(format_error('ConfigError', str(e), e.args[0] if e.args else None))
+        return 1
+    except LoaderError as e:
+        print_error(format_error(type(e).__name__, str(e), getattr(e, 'suggestion', None)))
+        return 1
+
+    reports = run_fleet(
+        channels, sessions,
+        client_factory=functools.partial(
+            create_client, text_mode=args.text_mode, fetch_profile=args.fetch_profile, takeout=args.takeout
+        ),
+        per_worker=args.per_worker,
+        limit=args.limit,
+        refresh=args.refresh,
+        hot_days=args.hot_days
+    )
+    update_stores(reports)
+    save_fetch_profiles(reports)
+
+    report = build_report(reports)
+    print_progress(format_report(report))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 2 if report['failed'] or any(r.error for r in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,16 +8,39 @@ Usage:
 """
 import argparse
 import asyncio
+import json
+import os
+import pickle
 import sys
-from datetime import datetime, timezone
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
-
+from typing import Callable, Optional
+
+from src.activity import ACTIVITY_PATH, ActivityMatrix
+from src.aggregates import AGGREGATES_PATH, AuthorAggregates
+from src.author_index import AUTHOR_INDEX_PATH, AuthorIndex
+from src.columnar import get_columnar_path, write_columnar
+from src.encoder import save_export
+from src.fetch_tuning import PROFILE_CHOICES
 from src.config import ConfigError, load_config
+from src.content_hash import HashManifest, get_hashes_path, write_hashes
 from src.errors import AuthError, AccessError, NetworkError, LoaderError
-from src.models import Channel, OutputFile
-from src.telegram_client import TelegramClientWrapper, create_client
-from src.utils import ensure_dir, format_error, print_error, print_progress, save_to_json
+from src.models import Channel, Comment, OutputFile, Post
+from src.search_index import INDEX_PATH, SearchIndex
+from src.shards import get_shards_path, load_shards, read_manifest, write_shards
+from src.snapshots import SNAPSHOTS_PATH, SnapshotStore
+from src.telegram_client import (
+    HISTORY_NORMAL,
+    HISTORY_TAKEOUT,
+    TEXT_MODE_MARKDOWN,
+    TEXT_MODES,
+    USER_CACHE_PATH,
+    TelegramClientWrapper,
+    create_client,
+)
+from src.utils import ensure_dir, format_error, print_error, print_progress
+from src.watcher import watch_channel
 
 
 __version__ = '1.0.0'
@@ -25,12 +48,30 @@ __version__ = '1.0.0'
 # Output directory
 OUTPUT_DIR = Path('.specify-for-tg-analysis/memory/channels')
 
+# Parsed-export cache stored beside each export; bump the version whenever
+# the models change shape so stale caches are rebuilt
+CACHE_SUFFIX = '.cache'
+CACHE_FORMAT_VERSION = 2
+
+# In refresh mode, comments of posts younger than this are always re-fetched
+HOT_DAYS = 7
+
 
 async def load_channel(
     client: TelegramClientWrapper,
     channel_id: str,
     output_path: str,
     limit: Optional[int] = None,
+    index: Optional[SearchIndex] = None,
+    aggregates: Optional[AuthorAggregates] = None,
+    authors: Optional[AuthorIndex] = None,
+    activity: Optional[ActivityMatrix] = None,
+    columnar: bool = False,
+    previous: Optional[OutputFile] = None,
+    hot_days: int = HOT_DAYS,
+    compact: bool = False,
+    progress: Callable[[str], None] = print_progress,
+    sharded: bool = False,
 ) -> OutputFile:
     """
     Load channel data and save to JSON file.
@@ -40,64 +81,304 @@ async def load_channel(
         channel_id: Channel username or URL
         output_path: Path to save JSON output
         limit: Maximum number of posts to load
+        index: Search index to update with the saved export
+        aggregates: Per-author aggregates to update with each comment batch
+        authors: Cross-channel author index to update with the saved export
+        activity: Author x channel activity matrix to update with the saved export
+        columnar: Also write the export as columnar arrays (see src.columnar)
+        previous: Earlier export of the channel to refresh. Comments of posts
+            older than hot_days are reused from it unless the post's reply
+            counter has changed
+        hot_days: Age in days below which comments are always re-fetched
+        compact: Write JSON without indentation
+        progress: Receives the progress messages (default: print to stdout)
+        sharded: Save as monthly shards in get_shards_path(output_path)
+            instead of one JSON file (see src.shards)
+
+    If the connection is lost for good part way (after the client's
+    retries), what was loaded so far is saved with status 'partial',
+    together with the posts of the previous export that were not reached.
+    A later refresh picks up from there.
 
     Returns:
         OutputFile with loaded data
     """
     # Get channel info
     channel = await client.get_channel_info(channel_id)
-    print_progress(f"Loading channel: {channel.title} (@{channel.username})")
+    progress(f"Loading channel: {channel.title} (@{channel.username})")
 
     # Load posts
     posts = []
     total_comments = 0
-
-    async for post in client.get_posts(channel, limit=limit):
-        # Load comments for this post
-        comments = []
-        async for comment in client.get_comments(channel, post.id):
-            comments.append(comment)
+    stored = {p.id: p for p in previous.channel.posts} if previous is not None else {}
+    hot_since = datetime.now(timezone.utc) - timedelta(days=hot_days)
+    reused = 0
+    status = 'complete'
+
+    async def fetch_comments(post: Post) -> list[Comment]:
+        old = stored.get(post.id)
+        if old is not None and post.date is not None and post.date < hot_since:
+            return await _refresh_cold_comments(client, channel, post, old)
+        return [comment async for comment in client.get_comments(channel, post.id)]
+
+    # Comments of the next few posts are fetched while earlier ones are
+    # taken in post order, as many at once as the fetch profile allows
+    pending: deque[tuple[Post, asyncio.Task]] = deque()
+
+    async def take() -> None:
+        nonlocal total_comments, reused
+        post, task = pending.popleft()
+        comments = await task
+        old = stored.get(post.id)
+        if old is not None and comments is old.comments:
+            reused += 1
 
         post.comments = comments
         total_comments += len(comments)
         posts.append(post)
 
-        print_progress(f"  Post {post.id}: {len(comments)} comments")
+        if aggregates is not None:
+            aggregates.add_comments(channel, post, comments)
+
+        progress(f"  Post {post.id}: {len(comments)} comments")
+
+    try:
+        try:
+            async for post in client.get_posts(channel, limit=limit):
+                pending.append((post, asyncio.ensure_future(fetch_comments(post))))
+                while len(pending) >= client.tuner.profile.max_in_flight:
+                    await take()
+        except NetworkError:
+            # Keep the posts whose comments are already on the way
+            while pending:
+                await take()
+            raise
+        while pending:
+            await take()
+    except NetworkError as e:
+        # Posts come newest first: keep the stored ones older than the last
+        # one loaded, including the post whose comments were interrupted
+        status = 'partial'
+        oldest = posts[-1].id if posts else None
+        kept = [p for p in stored.values() if oldest is None or p.id < oldest]
+        posts.extend(kept)
+        total_comments += sum(len(p.comments) for p in kept)
+        progress(f"Connection lost, saving a partial export: {e.message}")
+        if kept:
+            progress(f"Kept {len(kept)} posts of the previous export that were not reached")
+    finally:
+        tasks = [task for _, task in pending]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     channel.posts = posts
 
     # Create output
     output = OutputFile(
         version='1.0',
-        status='complete',
+        status=status,
         exported_at=datetime.now(timezone.utc),
         posts_count=len(posts),
         comments_count=total_comments,
         channel=channel
     )
 
-    # Save to file
-    save_to_json(output.to_dict(), output_path)
-    print_progress(f"\nSaved to: {output_path}")
-    print_progress(f"Total: {len(posts)} posts, {total_comments} comments")
+    # Save to file, with the post hashes beside it (see src.content_hash)
+    hashes = HashManifest.from_export(output)
+    if sharded:
+        shards_path = get_shards_path(output_path)
+        manifest, written = write_shards(output, shards_path, pretty=not compact, rows=hashes.posts)
+        progress(f"\nSaved to: {shards_path} ({len(written)} of {len(manifest.shards)} monthly shards written)")
+    else:
+        save_export(output, output_path, pretty=not compact)
+        progress(f"\nSaved to: {output_path}")
+    write_hashes(hashes, get_hashes_path(output_path))
+
+    # The stores read the dictionary form
+    if columnar or index is not None or authors is not None or activity is not None:
+        data = output.to_dict()
+        if columnar:
+            columnar_path = get_columnar_path(output_path)
+            write_columnar(data, columnar_path)
+            progress(f"Columnar export: {columnar_path}")
+        if index is not None:
+            index.add_export(data)
+        if authors is not None:
+            authors.add_export(data)
+        if activity is not None:
+            activity.add_export(data)
+    progress(f"Total: {len(posts)} posts, {total_comments} comments")
+    if previous is not None:
+        progress(f"Stored comments reused for {reused} of {len(posts)} posts")
+
+    return output
+
+
+async def _refresh_cold_comments(
+    client: TelegramClientWrapper,
+    channel: Channel,
+    post: Post,
+    old: Post,
+) -> list[Comment]:
+    """
+    Get comments of an old post, reusing the stored ones where possible.
+
+    The stored list is returned unchanged while the reply counter matches
+    the stored one (exports without a counter fall back to the number of
+    stored comments). If it only grew, just the newer comments are fetched;
+    otherwise (e.g. deletions) the whole thread is re-fetched.
+
+    Args:
+        client: Telegram client wrapper
+        channel: Channel containing the post
+        post: Freshly fetched post
+        old: The same post from the previous export
+
+    Returns:
+        Comments, newest first
+    """
+    known = old.replies if old.replies is not None else len(old.comments)
+    if post.replies is None or post.replies == known:
+        return old.comments
+
+    min_id = max((c.id for c in old.comments), default=0) if post.replies > known else 0
+    comments = []
+    async for comment in client.get_comments(channel, post.id, min_id=min_id):
+        comments.append(comment)
+    return comments + old.comments if min_id else comments
+
+
+def get_cache_path(path: str) -> Path:
+    """
+    Get the parsed-export cache path for an export file.
+
+    The cache is named "<export>.json.cache", so "*.json" globs over the
+    export directory never pick it up.
+
+    Args:
+        path: Path to export JSON file
+
+    Returns:
+        Path to the cache file
+    """
+    return Path(f"{path}{CACHE_SUFFIX}")
+
+
+def load_export(path: str, use_cache: bool = True) -> OutputFile:
+    """
+    Load an export file back into models.
+
+    A pickled copy of the parsed export is kept beside the JSON file. It is
+    used only while the export's mtime, size and the cache format version
+    all match; otherwise the JSON is parsed and the cache is rewritten.
+    Failing to write the cache (e.g. a read-only directory) is not an error.
+
+    Args:
+        path: Path to export JSON file
+        use_cache: Read and write the parsed-export cache
+
+    Returns:
+        OutputFile with the exported data
+    """
+    stat = os.stat(path)
+    key = (CACHE_FORMAT_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_path = get_cache_path(path)
+
+    if use_cache:
+        try:
+            with open(cache_path, 'rb') as f:
+                # The key is pickled separately so stale caches are rejected
+                # without unpickling the whole export
+                if pickle.load(f) == key:
+                    return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, ValueError):
+            pass
+
+    with open(path, 'r', encoding='utf-8') as f:
+        output = OutputFile.from_dict(json.load(f))
+
+    if use_cache:
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
 
     return output
 
 
-def get_output_path(channel_id: str) -> str:
+def get_output_path(channel_id: str, output_dir: Optional[Path] = None) -> str:
     """
     Get output file path for a channel.
 
     Args:
         channel_id: Channel username or URL
+        output_dir: Export directory (default: OUTPUT_DIR)
 
     Returns:
         Path to output JSON file
     """
     # Normalize channel name
     name = channel_id.replace('https://t.me/', '').lstrip('@')
-    ensure_dir(str(OUTPUT_DIR))
-    return str(OUTPUT_DIR / f"{name}.json")
+    output_dir = output_dir if output_dir is not None else OUTPUT_DIR
+    ensure_dir(str(output_dir))
+    return str(output_dir / f"{name}.json")
+
+
+def save_snapshot(output: OutputFile, progress: Callable[[str], None] = print_progress) -> None:
+    """Add an export to the snapshot store and report what it added."""
+    store = SnapshotStore(SNAPSHOTS_PATH)
+    try:
+        info, objects, size = store.add(output)
+    finally:
+        store.close()
+    progress(f"Snapshot {info.id}: {objects} new objects ({size / 1024:.1f} KiB)")
+
+
+def print_user_stats(client: TelegramClientWrapper) -> None:
+    """Print how comment authors missing from their page were resolved."""
+    stats = client.users.stats()
+    if stats['hits'] or stats['misses']:
+        print_progress(
+            f"Authors not sent with their comments: {stats['hits'] + stats['misses']}, "
+            f"{stats['hit_rate']:.0%} from cache, {stats['resolved']} resolved in {stats['requests']} requests "
+            f"({stats['lookups_saved']} lookups saved)"
+        )
+
+
+def print_fetch_stats(client: TelegramClientWrapper) -> None:
+    """Print the fetch profile in use and how the history requests went."""
+    stats = client.tuner.stats()
+    if not stats['pages']:
+        return
+    message = (
+        f"History requests: {stats['pages']} pages, page size {stats['page_size']}, "
+        f"wait {stats['wait_time']}s, up to {stats['max_in_flight']} in flight"
+    )
+    if stats['floods']:
+        message += f", {stats['floods']} FloodWaits ({stats['flood_seconds']}s)"
+    if client.retries:
+        message += f", {client.retries} retries after connection errors"
+    print_progress(message)
+
+
+def print_history_stats(client: TelegramClientWrapper) -> None:
+    """Print history throughput of the takeout and normal paths."""
+    if not client.takeout:
+        return
+    if client.takeout_fallback:
+        print_progress(f"Takeout session {client.takeout_fallback}")
+    for path, stats in client.history.items():
+        if stats.pages:
+            print_progress(f"History via {path}: {stats.messages} messages in {stats.seconds:.1f}s "
+                           f"({stats.rate:.0f} messages/s)")
+    takeout, normal = client.history[HISTORY_TAKEOUT], client.history[HISTORY_NORMAL]
+    if takeout.pages and normal.rate:
+        print_progress(f"Takeout throughput: {takeout.rate / normal.rate:.1f}x the normal path")
 
 
 def parse_args() -> argparse.Namespace:
@@ -110,6 +391,15 @@ Examples:
     %(prog)s @channel_username
     %(prog)s https://t.me/channel_username
     %(prog)s @channel --limit 100
+    %(prog)s @channel --columnar
+    %(prog)s @channel --refresh --hot-days 3
+    %(prog)s @channel --watch
+    %(prog)s @channel --text-mode raw
+    %(prog)s @channel --compact
+    %(prog)s @channel --fetch-profile auto
+    %(prog)s @channel --takeout
+    %(prog)s @channel --sharded --refresh
+    %(prog)s @channel --refresh --snapshot
 '''
     )
     parser.add_argument(
@@ -127,6 +417,68 @@ Examples:
         action='store_true',
         help='Overwrite existing output file'
     )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Update an existing export, re-fetching comments only for recent posts and posts with new replies'
+    )
+    parser.add_argument(
+        '--hot-days',
+        type=int,
+        default=HOT_DAYS,
+        help=f'With --refresh, always re-fetch comments of posts younger than this many days (default: {HOT_DAYS})'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and append new posts and comments as they arrive (Ctrl+C to stop)'
+    )
+    parser.add_argument(
+        '--text-mode',
+        choices=TEXT_MODES,
+        default=TEXT_MODE_MARKDOWN,
+        help='Store text with markdown formatting, as raw text (faster), or as raw text '
+             'plus an entity list (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--user-cache',
+        action='store_true',
+        help=f'Keep comment authors in {USER_CACHE_PATH} between runs, saving user lookups'
+    )
+    parser.add_argument(
+        '--fetch-profile',
+        choices=PROFILE_CHOICES,
+        default='default',
+        help='Page size, pause and concurrency of history requests; auto adapts them to latency '
+             'and FloodWaits and remembers them per account (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--takeout',
+        action='store_true',
+        help='Export through a takeout session, which Telegram limits less for whole-history '
+             'downloads; falls back to normal requests if it is not granted'
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Write the JSON export without indentation (smaller and faster to write)'
+    )
+    parser.add_argument(
+        '--sharded',
+        action='store_true',
+        help='Save one file per month of posts plus a manifest in <channel>.shards; '
+             'updates rewrite only the months that changed'
+    )
+    parser.add_argument(
+        '--snapshot',
+        action='store_true',
+        help=f'Also keep a snapshot of the export in {SNAPSHOTS_PATH} (see src.snapshots)'
+    )
+    parser.add_argument(
+        '--columnar',
+        action='store_true',
+        help='Also write memory-mappable columnar arrays next to the JSON'
+    )
     parser.add_argument(
         '--version',
         action='version',
@@ -145,30 +497,78 @@ async def main_async(args: argparse.Namespace) -> int:
     Returns:
         Exit code (0=success, 1=error, 2=partial)
     """
+    if args.sharded and args.watch:
+        print_error("--watch writes a single JSON file and cannot be combined with --sharded")
+        return 1
+
     # Check if output file exists
     output_path = get_output_path(args.channel)
-    if Path(output_path).exists() and not args.force:
-        print_error(f"Output file already exists: {output_path}")
-        print_error("Use --force to overwrite")
-        return 1
+    shards_path = get_shards_path(output_path)
+    exists = read_manifest(shards_path) is not None if args.sharded else Path(output_path).exists()
+    previous = None
+    if exists:
+        if args.refresh or args.watch:
+            previous = load_shards(shards_path) if args.sharded else load_export(output_path)
+        elif not args.force:
+            print_error(f"Output file already exists: {shards_path if args.sharded else output_path}")
+            print_error("Use --force to overwrite, --refresh to update or --watch to follow")
+            return 1
 
     # Create client
     try:
-        client = create_client()
+        client = create_client(
+            text_mode=args.text_mode,
+            user_cache_path=USER_CACHE_PATH if args.user_cache else None,
+            fetch_profile=args.fetch_profile,
+            takeout=args.takeout
+        )
     except ConfigError as e:
         print_error(format_error('ConfigError', str(e), e.args[0] if e.args else None))
         return 1
 
     # Connect and load
+    index = SearchIndex(INDEX_PATH)
+    aggregates = AuthorAggregates(AGGREGATES_PATH)
+    authors = AuthorIndex(AUTHOR_INDEX_PATH)
+    activity = ActivityMatrix(ACTIVITY_PATH)
     try:
         await client.connect()
-        await load_channel(
-            client=client,
-            channel_id=args.channel,
-            output_path=output_path,
-            limit=args.limit
-        )
-        return 0
+        if args.watch and previous is not None:
+            # Watching catches up on what is missing by itself
+            output = previous
+        else:
+            output = await load_channel(
+                client=client,
+                channel_id=args.channel,
+                output_path=output_path,
+                limit=args.limit,
+                index=index,
+                aggregates=aggregates,
+                authors=authors,
+                activity=activity,
+                columnar=args.columnar,
+                previous=previous,
+                hot_days=args.hot_days,
+                compact=args.compact,
+                sharded=args.sharded
+            )
+            print_user_stats(client)
+            print_fetch_stats(client)
+            print_history_stats(client)
+            if args.snapshot:
+                save_snapshot(output)
+        if args.watch:
+            await watch_channel(
+                client=client,
+                output=output,
+                output_path=output_path,
+                gap_days=args.hot_days,
+                index=index,
+                aggregates=aggregates,
+                authors=authors,
+                activity=activity
+            )
+        return 2 if output.status == 'partial' else 0
 
     except AuthError as e:
         print_error(format_error('AuthError', e.message, e.suggestion))
@@ -191,13 +591,22 @@ async def main_async(args: argparse.Namespace) -> int:
         return 2
 
     finally:
+        index.close()
+        aggregates.close()
+        authors.close()
+        activity.close()
         await client.disconnect()
 
 
 def main() -> int:
     """Main entry point."""
     args = parse_args()
-    return asyncio.run(main_async(args))
+    try:
+        return asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        # Ctrl+C cancels the running task; watch mode saves before exiting
+        print_error("\nStopped" if args.watch else "\nInterrupted by user")
+        return 0 if args.watch else 2
 
 
 if __name__ == '__main__':
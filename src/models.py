@@ -4,6 +4,10 @@ from datetime import datetime
 from typing import Optional
 
 
+# user_id of the placeholder Author stored for anonymous and channel comments
+ANONYMOUS_USER_ID = 0
+
+
 @dataclass
 class Author:
     """Telegram user who authored a comment."""
@@ -21,6 +25,16 @@ class Author:
             'last_name': self.last_name,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Author':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            user_id=data['user_id'],
+            username=data.get('username'),
+            first_name=data.get('first_name', ''),
+            last_name=data.get('last_name'),
+        )
+
 
 @dataclass
 class Comment:
@@ -29,15 +43,33 @@ class Comment:
     text: str
     date: datetime
     author: Author
+    reply_to: Optional[int] = None  # Comment this one replies to; None for replies to the post
+    entities: Optional[list] = None  # Formatting of raw text, see telegram_client.TEXT_MODE_RAW_ENTITIES
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return {
+        data = {
             'id': self.id,
             'text': self.text,
             'date': self.date.isoformat(),
             'author': self.author.to_dict(),
+            'reply_to': self.reply_to,
         }
+        if self.entities is not None:
+            data['entities'] = self.entities
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Comment':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            id=data['id'],
+            text=data['text'],
+            date=datetime.fromisoformat(data['date']),
+            author=Author.from_dict(data['author']),
+            reply_to=data.get('reply_to'),
+            entities=data.get('entities'),
+        )
 
 
 @dataclass
@@ -48,16 +80,35 @@ class Post:
     date: datetime
     views: Optional[int]
     comments: list[Comment] = field(default_factory=list)
+    replies: Optional[int] = None  # Telegram's reply counter when fetched
+    entities: Optional[list] = None  # Formatting of raw text, see telegram_client.TEXT_MODE_RAW_ENTITIES
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return {
+        data = {
             'id': self.id,
             'text': self.text,
             'date': self.date.isoformat(),
             'views': self.views,
             'comments': [c.to_dict() for c in self.comments],
+            'replies': self.replies,
         }
+        if self.entities is not None:
+            data['entities'] = self.entities
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Post':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            id=data['id'],
+            text=data['text'],
+            date=datetime.fromisoformat(data['date']),
+            views=data.get('views'),
+            comments=[Comment.from_dict(c) for c in data['comments']],
+            replies=data.get('replies'),
+            entities=data.get('entities'),
+        )
 
 
 @dataclass
@@ -77,6 +128,16 @@ class Channel:
             'posts': [p.to_dict() for p in self.posts],
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Channel':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            id=data['id'],
+            username=data.get('username'),
+            title=data['title'],
+            posts=[Post.from_dict(p) for p in data['posts']],
+        )
+
 
 @dataclass
 class OutputFile:
@@ -98,3 +159,15 @@ class OutputFile:
             'comments_count': self.comments_count,
             'channel': self.channel.to_dict(),
         }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'OutputFile':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            version=data['version'],
+            status=data['status'],
+            exported_at=datetime.fromisoformat(data['exported_at']),
+            posts_count=data['posts_count'],
+            comments_count=data['comments_count'],
+            channel=Channel.from_dict(data['channel']),
+        )
@@ -0,0 +1,71 @@
+"""Process-pool runner for CPU-bound analysis over channel exports."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+# Shards per worker; more, smaller shards even out uneven export sizes
+SHARDS_PER_WORKER = 4
+
+
+def default_workers() -> int:
+    """Return the number of worker processes to use by default (CPU count)."""
+    return os.cpu_count() or 1
+
+
+def shard_paths(paths: list[Path], num_shards: int) -> list[list[Path]]:
+    """
+    Split export files into shards of similar total size.
+
+    Largest files are placed first, each into the currently smallest shard.
+
+    Args:
+        paths: Export files
+        num_shards: Maximum number of shards
+
+    Returns:
+        Non-empty shards
+    """
+    num_shards = max(1, min(num_shards, len(paths)))
+    shards: list[list[Path]] = [[] for _ in range(num_shards)]
+    sizes = [0] * num_shards
+
+    for path in sorted(paths, key=lambda p: Path(p).stat().st_size, reverse=True):
+        i = sizes.index(min(sizes))
+        shards[i].append(path)
+        sizes[i] += Path(path).stat().st_size
+
+    return [shard for shard in shards if shard]
+
+
+def map_shards(
+    func: Callable[[list[Path]], T],
+    paths: list[Path],
+    workers: Optional[int] = None,
+) -> list[T]:
+    """
+    Run a shard function over export files in a process pool.
+
+    The function runs in worker processes, so it must be a module-level
+    function (or functools.partial of one) and should return compact,
+    picklable partial results such as arrays and dicts of numbers. With a
+    single worker everything runs in the current process.
+
+    Args:
+        func: Function mapping a list of export paths to a partial result
+        paths: Export files
+        workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        Partial results, one per shard
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(paths) <= 1:
+        return [func(list(paths))]
+
+    shards = shard_paths(paths, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        return list(executor.map(func, shards))
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Relevance Ranking - Rank commenters by BM25 similarity to a product description.
+
+Each author is treated as one document made of all their comments.
+
+Usage:
+    python -m src.relevance "CRM for small sales teams"
+    python -m src.relevance --file product.txt --top 50 --json
+"""
+import argparse
+import heapq
+import json
+import math
+import sys
+from array import array
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.loader import OUTPUT_DIR
+from src.models import ANONYMOUS_USER_ID
+from src.parallel import map_shards
+from src.utils import find_exports, iter_comment_records, print_error, print_progress, tokenize
+
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+@dataclass
+class TermStats:
+    """
+    Per-author term statistics restricted to the query vocabulary.
+
+    Authors are numbered in order of first appearance. Each query term has a
+    term-frequency column indexed by author number; only these columns and
+    the document lengths are kept, so memory does not grow with vocabulary.
+    """
+    terms: list[str]
+    user_ids: array = field(default_factory=lambda: array('q'))
+    doc_len: array = field(default_factory=lambda: array('q'))
+    tf: dict[str, array] = field(default_factory=dict)
+    profiles: list[tuple] = field(default_factory=list)  # (username, first_name, last_name)
+
+    @property
+    def num_authors(self) -> int:
+        """Number of author documents."""
+        return len(self.user_ids)
+
+
+@dataclass
+class AuthorRelevance:
+    """Relevance of a single author to the query."""
+    user_id: int
+    username: Optional[str]
+    first_name: str
+    last_name: Optional[str]
+    score: float
+    matches: dict[str, int]
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'score': round(self.score, 6),
+            'matches': self.matches,
+        }
+
+
+def query_terms(query: str) -> list[str]:
+    """
+    Tokenize a product description or keyword list into unique query terms.
+
+    Args:
+        query: Free text or comma-separated keywords
+
+    Returns:
+        Unique terms in order of first appearance
+    """
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def build_term_stats(records: Iterable[tuple[dict, dict, dict]], terms: list[str]) -> TermStats:
+    """
+    Collect document lengths and query term frequencies per author.
+
+    Tokenization, set intersection and counting run in C; the Python-level
+    work per comment is constant unless the comment contains a query term.
+
+    Args:
+        records: (channel, post, comment) dicts, e.g. from iter_comment_records
+        terms: Query terms
+
+    Returns:
+        TermStats over all non-anonymous authors
+    """
+    stats = TermStats(terms=terms)
+    stats.tf = {t: array('q') for t in terms}
+    columns = list(stats.tf.values())
+    query = frozenset(terms)
+    index: dict[int, int] = {}
+
+    for _, _, comment in records:
+        author = comment['author']
+        user_id = author['user_id']
+        if user_id == ANONYMOUS_USER_ID:
+            continue
+
+        i = index.get(user_id)
+        if i is None:
+            i = index[user_id] = len(stats.user_ids)
+            stats.user_ids.append(user_id)
+            stats.doc_len.append(0)
+            stats.profiles.append(None)
+            for column in columns:
+                column.append(0)
+        stats.profiles[i] = (author.get('username'), author.get('first_name', ''), author.get('last_name'))
+
+        tokens = tokenize(comment['text'])
+        stats.doc_len[i] += len(tokens)
+        for term in query.intersection(tokens):
+            stats.tf[term][i] += tokens.count(term)
+
+    return stats
+
+
+def term_stats_shard(paths: list[Path], terms: list[str]) -> TermStats:
+    """
+    Collect term statistics for a shard of exports (process-pool worker).
+
+    Args:
+        paths: Export files of the shard
+        terms: Query terms
+
+    Returns:
+        TermStats of the shard (arrays only, cheap to pickle)
+    """
+    return build_term_stats(iter_comment_records(paths), terms)
+
+
+def merge_term_stats(partials: Iterable[TermStats], terms: list[str]) -> TermStats:
+    """
+    Merge per-shard term statistics, summing lengths and frequencies per author.
+
+    Args:
+        partials: Results of term_stats_shard
+        terms: Query terms
+
+    Returns:
+        Combined TermStats
+    """
+    merged = TermStats(terms=terms)
+    merged.tf = {t: array('q') for t in terms}
+    index: dict[int, int] = {}
+
+    for part in partials:
+        for i, user_id in enumerate(part.user_ids):
+            j = index.get(user_id)
+            if j is None:
+                j = index[user_id] = len(merged.user_ids)
+                merged.user_ids.append(user_id)
+                merged.doc_len.append(0)
+                merged.profiles.append(part.profiles[i])
+                for column in merged.tf.values():
+                    column.append(0)
+            merged.doc_len[j] += part.doc_len[i]
+            for term in terms:
+                merged.tf[term][j] += part.tf[term][i]
+    return merged
+
+
+def bm25_scores(stats: TermStats, k1: float = BM25_K1, b: float = BM25_B) -> dict[int, float]:
+    """
+    Compute BM25 scores for authors matching at least one query term.
+
+    Args:
+        stats: Term statistics from build_term_stats
+        k1: Term frequency saturation
+        b: Document length normalization
+
+    Returns:
+        Dict mapping author number to score
+    """
+    n = stats.num_authors
+    if n == 0:
+        return {}
+    avg_len = (sum(stats.doc_len) / n) or 1.0
+
+    scores: dict[int, float] = {}
+    for column in stats.tf.values():
+        hits = [i for i, tf in enumerate(column) if tf]
+        if not hits:
+            continue
+        idf = math.log(1 + (n - len(hits) + 0.5) / (len(hits) + 0.5))
+        for i in hits:
+            tf = column[i]
+            norm = k1 * (1 - b + b * stats.doc_len[i] / avg_len)
+            scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def rank_by_relevance(stats: TermStats, top_k: int = 20) -> list[AuthorRelevance]:
+    """
+    Select the top K authors by BM25 score.
+
+    Args:
+        stats: Term statistics from build_term_stats
+        top_k: Number of authors to return
+
+    Returns:
+        Top K authors, best first
+    """
+    scores = bm25_scores(stats)
+    best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    ranked = []
+    for i, score in best:
+        username, first_name, last_name = stats.profiles[i]
+        ranked.append(AuthorRelevance(
+            user_id=stats.user_ids[i],
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            score=score,
+            matches={t: stats.tf[t][i] for t in stats.terms if stats.tf[t][i]},
+        ))
+    return ranked
+
+
+def format_table(ranked: list[AuthorRelevance]) -> str:
+    """
+    Format ranked authors as a human-readable table.
+
+    Args:
+        ranked: Authors, best first
+
+    Returns:
+        Table as a string
+    """
+    lines = [f"{'#':>3}  {'score':>7}  author  matches"]
+    for i, r in enumerate(ranked, 1):
+        name = f"@{r.username}" if r.username else ' '.join(filter(None, [r.first_name, r.last_name]))
+        matches = ', '.join(f"{t}={n}" for t, n in r.matches.items())
+        lines.append(f"{i:>3}  {r.score:>7.3f}  {name} ({r.user_id})  {matches}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Rank commenters by relevance of their comments to a product description.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s "CRM for small sales teams"
+    %(prog)s "crm, notion, airtable" --top 50 --json
+    %(prog)s --file product.txt --channel @channel_a
+'''
+    )
+    parser.add_argument(
+        'query',
+        nargs='?',
+        help='Product description or comma-separated keywords'
+    )
+    parser.add_argument(
+        '--file',
+        type=Path,
+        default=None,
+        help='Read the product description from a file'
+    )
+    parser.add_argument(
+        '--dir',
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f'Directory with channel exports (default: {OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--channel',
+        action='append',
+        default=None,
+        help='Only use this channel export (repeatable)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Tokenize exports in this many processes (default: 1)'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=20,
+        help='Number of authors to output (default: 20)'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output machine-readable JSON'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+
+    query = args.query or ''
+    if args.file is not None:
+        query = f"{query} {args.file.read_text(encoding='utf-8')}"
+    terms = query_terms(query)
+    if not terms:
+        print_error("Empty query: pass a description, keywords or --file")
+        return 1
+
+    paths = find_exports(args.dir, args.channel)
+    if not paths:
+        print_error(f"No channel exports found in {args.dir}")
+        return 1
+
+    if args.workers > 1:
+        partials = map_shards(partial(term_stats_shard, terms=terms), paths, args.workers)
+        stats = merge_term_stats(partials, terms)
+    else:
+        stats = build_term_stats(iter_comment_records(paths), terms)
+    ranked = rank_by_relevance(stats, top_k=args.top)
+
+    if args.json:
+        print_progress(json.dumps([r.to_dict() for r in ranked], ensure_ascii=False, indent=2))
+    else:
+        print_progress(format_table(ranked))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Reply Graph - Influence and communities from who replies to whom.
+
+Builds a sparse author -> author reply matrix across channel exports, ranks
+authors by PageRank and groups them with label propagation.
+
+Everything is pure Python over typed arrays (SciPy is not a dependency).
+A million reply edges take a few seconds for each of building, PageRank
+and label propagation; beyond some tens of millions of edges expect
+minutes and several GB of memory.
+
+Usage:
+    python -m src.reply_graph
+    python -m src.reply_graph --top 50 --json --channel @channel_a
+"""
+import argparse
+import heapq
+import json
+import operator
+import sys
+from array import array
+from collections import Counter
+from itertools import accumulate, compress, pairwise
+from math import sumprod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.loader import OUTPUT_DIR
+from src.models import ANONYMOUS_USER_ID
+from src.utils import find_exports, iter_post_records, print_error, print_progress
+
+
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-9
+LABEL_ITERATIONS = 20
+
+
+@dataclass
+class ReplyGraph:
+    """
+    Weighted directed reply graph in CSR form.
+
+    Node i is the author user_ids[i]. The out-edges of node i are
+    indices[indptr[i]:indptr[i + 1]] with the matching weights: the number
+    of times author i replied to each other author.
+    """
+    user_ids: array = field(default_factory=lambda: array('q'))
+    usernames: list[Optional[str]] = field(default_factory=list)
+    indptr: array = field(default_factory=lambda: array('q', [0]))
+    indices: array = field(default_factory=lambda: array('q'))
+    weights: array = field(default_factory=lambda: array('d'))
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of authors."""
+        return len(self.user_ids)
+
+    @property
+    def num_edges(self) -> int:
+        """Number of distinct (replier, repliee) pairs."""
+        return len(self.indices)
+
+    def transpose(self) -> 'ReplyGraph':
+        """Return the graph with every edge reversed."""
+        n = self.num_nodes
+        counts = array('q', bytes(8 * (n + 1)))
+        for j in self.indices:
+            counts[j + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+
+        fill = array('q', counts)
+        indices = array('q', bytes(8 * self.num_edges))
+        weights = array('d', bytes(8 * self.num_edges))
+        for i in range(n):
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                j = self.indices[k]
+                indices[fill[j]] = i
+                weights[fill[j]] = self.weights[k]
+                fill[j] += 1
+
+        return ReplyGraph(self.user_ids, self.usernames, counts, indices, weights)
+
+
+def build_reply_graph(records: Iterable[tuple[dict, dict]]) -> ReplyGraph:
+    """
+    Build the reply graph from exported posts.
+
+    Reply targets are resolved within each post's comment thread. Replies
+    to the post itself, self-replies and anonymous authors are ignored.
+    Replies are collected as two int64 arrays, bucketed by replier with a
+    counting sort and merged per replier into CSR rows, so memory stays at
+    16 bytes per reply plus the edges rather than nodes squared.
+
+    Args:
+        records: (channel, post) dicts, e.g. from iter_post_records
+
+    Returns:
+        ReplyGraph over all authors that replied or were replied to
+    """
+    graph = ReplyGraph()
+    index: dict[int, int] = {}
+    repliers = array('q')
+    repliees = array('q')
+
+    def node(author: dict) -> int:
+        user_id = author['user_id']
+        i = index.get(user_id)
+        if i is None:
+            i = index[user_id] = len(graph.user_ids)
+            graph.user_ids.append(user_id)
+            graph.usernames.append(author.get('username'))
+        return i
+
+    for _, post in records:
+        comments = post['comments']
+        authors = {c['id']: c['author'] for c in comments}
+        for comment in comments:
+            target = comment.get('reply_to')
+            if target is None or target not in authors:
+                continue
+            src, dst = comment['author'], authors[target]
+            if ANONYMOUS_USER_ID in (src['user_id'], dst['user_id']) or src['user_id'] == dst['user_id']:
+                continue
+            repliers.append(node(src))
+            repliees.append(node(dst))
+
+    # Counting sort by replier, then one CSR row per replier with repeated replies merged
+    counts = Counter(repliers)
+    starts = array('q', accumulate((counts[i] for i in range(graph.num_nodes)), initial=0))
+    fill = array('q', starts)
+    targets = array('q', bytes(8 * len(repliees)))
+    for i, j in zip(repliers, repliees):
+        targets[fill[i]] = j
+        fill[i] += 1
+
+    for start, end in pairwise(starts):
+        row = sorted(Counter(targets[start:end]).items())
+        graph.indices.extend(j for j, _ in row)
+        graph.weights.extend(float(weight) for _, weight in row)
+        graph.indptr.append(len(graph.indices))
+
+    return graph
+
+
+def pagerank(
+    graph: ReplyGraph,
+    damping: float = DAMPING,
+    max_iterations: int = MAX_ITERATIONS,
+    tolerance: float = TOLERANCE,
+) -> array:
+    """
+    Compute weighted PageRank by power iteration over the CSR edges.
+
+    Replying passes influence to the author being replied to. Rank of
+    authors who never reply is spread uniformly. Each iteration gathers
+    and sums the in-edges of every author with itemgetter and sumprod, so
+    the per-edge work runs in C: about 0.1 s per iteration for a million
+    edges.
+
+    Args:
+        graph: Reply graph
+        damping: Probability of following an edge
+        max_iterations: Iteration cap
+        tolerance: Stop when the L1 change drops below this
+
+    Returns:
+        Rank per node, summing to 1
+    """
+    n = graph.num_nodes
+    if n == 0:
+        return array('d')
+
+    out_weight = array('d', (sum(graph.weights[start:end]) for start, end in pairwise(graph.indptr)))
+    dangling = array('b', (not weight for weight in out_weight))
+    # In-edges grouped by repliee, each with the share of its replier's rank it passes on
+    reverse = graph.transpose()
+    rows = list(pairwise(reverse.indptr))
+    shares = list(map(operator.truediv, reverse.weights, map(out_weight.__getitem__, reverse.indices)))
+    # Picks the replier's rank of every in-edge in one call; the extra index
+    # keeps the result a tuple when the graph has a single edge
+    gather = operator.itemgetter(*reverse.indices, 0)
+    rank = [1.0 / n] * n
+
+    for _ in range(max_iterations):
+        base = (1.0 - damping + damping * sum(compress(rank, dangling))) / n
+        passed = gather(rank)
+        new = [base + damping * sumprod(passed[start:end], shares[start:end]) for start, end in rows]
+
+        delta = sum(map(abs, map(operator.sub, new, rank)))
+        rank = new
+        if delta < tolerance:
+            break
+
+    return array('d', rank)
+
+
+def label_propagation(graph: ReplyGraph, max_iterations: int = LABEL_ITERATIONS) -> array:
+    """
+    Find communities with weighted label propagation on the undirected graph.
+
+    Every node starts in its own community and repeatedly adopts the label
+    with the highest total edge weight among its neighbours (ties go to the
+    smallest label, so results are deterministic).
+
+    Args:
+        graph: Reply graph
+        max_iterations: Iteration cap
+
+    Returns:
+        Community label per node (the smallest node index in the community
+        it converged to)
+    """
+    n = graph.num_nodes
+    reverse = graph.transpose()
+    labels = array('q', range(n))
+
+    for _ in range(max_iterations):
+        changed = False
+        for i in range(n):
+            votes: dict[int, float] = {}
+            for g in (graph, reverse):
+                for k in range(g.indptr[i], g.indptr[i + 1]):
+                    label = labels[g.indices[k]]
+                    votes[label] = votes.get(label, 0.0) + g.weights[k]
+            if not votes:
+                continue
+            best = min(votes, key=lambda label: (-votes[label], label))
+            if best != labels[i]:
+                labels[i] = best
+                changed = True
+        if not changed:
+            break
+
+    return labels
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Rank authors by influence in the reply graph and find communities.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s
+    %(prog)s --top 50 --json --channel @channel_a
+'''
+    )
+    parser.add_argument(
+        '--dir',
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f'Directory with channel exports (default: {OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--channel',
+        action='append',
+        default=None,
+        help='Only use this channel export (repeatable)'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=20,
+        help='Number of authors to output (default: 20)'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output machine-readable JSON'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+
+    paths = find_exports(args.dir, args.channel)
+    if not paths:
+        print_error(f"No channel exports found in {args.dir}")
+        return 1
+
+    graph = build_reply_graph(iter_post_records(paths))
+    ranks = pagerank(graph)
+    labels = label_propagation(graph)
+
+    sizes: dict[int, int] = {}
+    for label in labels:
+        sizes[label] = sizes.get(label, 0) + 1
+
+    top = heapq.nlargest(args.top, range(graph.num_nodes), key=ranks.__getitem__)
+    result = [
+        {
+            'user_id': graph.user_ids[i],
+            'username': graph.usernames[i],
+            'pagerank': round(ranks[i], 8),
+            'community': graph.user_ids[labels[i]],
+            'community_size': sizes[labels[i]],
+        }
+        for i in top
+    ]
+
+    if args.json:
+        print_progress(json.dumps({
+            'nodes': graph.num_nodes,
+            'edges': graph.num_edges,
+            'communities': len(sizes),
+            'authors': result,
+        }, ensure_ascii=False, indent=2))
+    else:
+        print_progress(f"Authors: {graph.num_nodes}, reply edges: {graph.num_edges}, communities: {len(sizes)}")
+        for rank, r in enumerate(result, 1):
+            print_progress(
+                f"{rank:>3}  {r['pagerank']:.5f}  @{r['username'] or '-'} ({r['user_id']})  "
+                f"community {r['community']} ({r['community_size']})"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Retry policy for Telegram requests: transient vs fatal errors and backoff."""
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Iterator
+
+from telethon.errors import RPCError, ServerError, TimedOutError
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How often and how long to retry a request that failed transiently.
+
+    Delays grow exponentially from base_delay up to max_delay with "full
+    jitter": each wait is drawn uniformly from [0, delay], so clients that
+    lost the connection together do not come back together.
+    """
+    attempts: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delays(self) -> Iterator[float]:
+        """Yield the wait before each retry (attempts - 1 of them)."""
+        for attempt in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Retry nothing, e.g. for tests or one-shot scripts
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Tell whether a failed request may succeed if simply repeated.
+
+    Transient: dropped or refused connections, timeouts and Telegram's
+    internal server errors (5xx, e.g. RPC_CALL_FAIL). Fatal: every other
+    RPC error (bad requests, private channels, expired sessions) and
+    anything that is not a network failure at all.
+    """
+    if isinstance(error, (ServerError, TimedOutError)):
+        return True
+    if isinstance(error, RPCError):
+        return False
+    # ConnectionError and TimeoutError are OSErrors
+    return isinstance(error, (OSError, asyncio.TimeoutError))
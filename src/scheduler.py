@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Refresh Scheduler - Refresh many channels, most productive first.
+
+Keeps per-channel statistics from previous runs (posts and comments per
+day, last refresh, last error) and orders refreshes by the number of new
+posts and comments expected per Telegram request. Refreshes run under a
+global concurrency limit and request rate budget.
+
+Usage:
+    python -m src.scheduler --dry-run
+    python -m src.scheduler --channel @a --channel @b --concurrency 4 --rpm 60
+"""
+import argparse
+import asyncio
+import heapq
+import math
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from src.activity import ACTIVITY_PATH, ActivityMatrix
+from src.aggregates import AGGREGATES_PATH, AuthorAggregates
+from src.author_index import AUTHOR_INDEX_PATH, AuthorIndex
+from src.config import ConfigError
+from src.errors import AuthError, LoaderError
+from src.fetch_tuning import PROFILE_CHOICES
+from src.loader import HOT_DAYS, OUTPUT_DIR, get_output_path, load_channel, load_export
+from src.models import OutputFile
+from src.search_index import INDEX_PATH, SearchIndex
+from src.telegram_client import TEXT_MODE_MARKDOWN, TEXT_MODES, create_client
+from src.utils import ensure_dir, find_exports, format_error, print_error, print_progress
+
+
+# Stats location, next to the channel exports
+SCHEDULER_PATH = Path('.specify-for-tg-analysis/memory/scheduler.sqlite')
+
+# Posting rates are measured over the most recent posts of this many days
+RATE_WINDOW_DAYS = 30
+# Posts returned per page when listing a channel
+POSTS_PER_REQUEST = 100
+# After a failure, wait this long before retrying, doubling per failure
+ERROR_BACKOFF = timedelta(hours=1)
+MAX_ERROR_BACKOFF = timedelta(days=1)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS channel_stats (
+    channel TEXT PRIMARY KEY,
+    posts_per_day REAL NOT NULL,
+    comments_per_day REAL NOT NULL,
+    posts_total INTEGER NOT NULL,
+    last_refresh REAL,
+    last_duration REAL,
+    last_error TEXT,
+    last_error_at REAL,
+    errors INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+
+class Clock:
+    """Wall clock; the scheduler only needs time() and sleep()."""
+
+    def time(self) -> float:
+        """Return the current Unix time."""
+        return time.time()
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep for the given number of seconds."""
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """
+    Clock for tests: sleeps take no real time.
+
+    Sleeping tasks wake in order of their wake-up time, and the clock jumps
+    to each wake-up. Before every jump, other tasks get a few event loop
+    passes to run and start their own sleeps.
+    """
+
+    SETTLE_PASSES = 10
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._sleepers: list = []
+        self._count = 0
+        self._driver: Optional[asyncio.Task] = None
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._count += 1
+        heapq.heappush(self._sleepers, (self.now + seconds, self._count, future))
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._advance())
+        await future
+
+    async def _advance(self) -> None:
+        """Wake sleepers one at a time until none are left."""
+        while self._sleepers:
+            for _ in range(self.SETTLE_PASSES):
+                await asyncio.sleep(0)
+            wake, _, future = heapq.heappop(self._sleepers)
+            self.now = max(self.now, wake)
+            if not future.done():
+                future.set_result(None)
+
+
+@dataclass
+class ChannelStats:
+    """Activity and refresh history of one channel."""
+    channel: str
+    posts_per_day: float = 0.0
+    comments_per_day: float = 0.0
+    posts_total: int = 0
+    last_refresh: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+    errors: int = 0
+
+    def update_from_export(self, output: OutputFile) -> None:
+        """Recompute posting rates from an export."""
+        posts = [p for p in output.channel.posts if p.date is not None]
+        self.posts_total = len(output.channel.posts)
+        if not posts:
+            self.posts_per_day = self.comments_per_day = 0.0
+            return
+
+        since = output.exported_at - timedelta(days=RATE_WINDOW_DAYS)
+        recent = [p for p in posts if p.date >= since]
+        # Young channels are measured over their actual age
+        oldest = min(p.date for p in posts)
+        days = max(1.0, min(RATE_WINDOW_DAYS, (output.exported_at - oldest).total_seconds() / 86400))
+        self.posts_per_day = len(recent) / days
+        self.comments_per_day = sum(len(p.comments) for p in recent) / days
+
+
+@dataclass
+class PlannedRefresh:
+    """One channel in a refresh plan."""
+    channel: str
+    expected_items: float
+    requests: int
+    score: float
+    not_before: Optional[float] = None
+
+
+class ChannelStatsStore:
+    """SQLite store of ChannelStats, one row per channel."""
+
+    def __init__(self, path: Path = SCHEDULER_PATH):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file
+        """
+        ensure_dir(str(Path(path).parent))
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the store."""
+        self._db.close()
+
+    def get(self, channel: str) -> Optional[ChannelStats]:
+        """Get the stats of a channel, or None if it was never recorded."""
+        row = self._db.execute(
+            'SELECT channel, posts_per_day, comments_per_day, posts_total, last_refresh, '
+            'last_duration, last_error, last_error_at, errors FROM channel_stats WHERE channel = ?',
+            (channel,)
+        ).fetchone()
+        return ChannelStats(*row) if row else None
+
+    def save(self, stats: ChannelStats) -> None:
+        """Insert or replace the stats of a channel."""
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO channel_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (stats.channel, stats.posts_per_day, stats.comments_per_day, stats.posts_total,
+                 stats.last_refresh, stats.last_duration, stats.last_error, stats.last_error_at, stats.errors)
+            )
+
+
+def _channel_name(channel_id: str) -> str:
+    """Normalize a channel username or URL."""
+    return channel_id.replace('https://t.me/', '').lstrip('@')
+
+
+def estimate_requests(stats: ChannelStats, hot_days: int = HOT_DAYS) -> int:
+    """
+    Estimate the Telegram requests of one refresh.
+
+    Counts the channel lookup, listing all posts page by page and one
+    comment request per post young enough to be re-fetched.
+    """
+    listing = math.ceil(stats.posts_total / POSTS_PER_REQUEST) or 1
+    return 1 + listing + math.ceil(stats.posts_per_day * hot_days)
+
+
+def plan_refreshes(
+    channels: list[ChannelStats],
+    now: float,
+    hot_days: int = HOT_DAYS,
+) -> list[PlannedRefresh]:
+    """
+    Order channels by expected new posts and comments per request.
+
+    Channels never refreshed come first. Channels that failed recently are
+    kept back until their backoff has passed.
+
+    Args:
+        channels: Stats of the channels to consider
+        now: Current Unix time
+        hot_days: Refresh window passed to load_channel
+
+    Returns:
+        Planned refreshes, highest score first; the ones in backoff last
+    """
+    plan = []
+    for stats in channels:
+        requests = estimate_requests(stats, hot_days)
+        if stats.last_refresh is None:
+            expected, score = math.inf, math.inf
+        else:
+            days = max(0.0, now - stats.last_refresh) / 86400
+            expected = (stats.posts_per_day + stats.comments_per_day) * days
+            score = expected / requests
+
+        not_before = None
+        if stats.errors and stats.last_error_at is not None:
+            backoff = min(ERROR_BACKOFF * 2 ** (stats.errors - 1), MAX_ERROR_BACKOFF)
+            if stats.last_error_at + backoff.total_seconds() > now:
+                not_before = stats.last_error_at + backoff.total_seconds()
+
+        plan.append(PlannedRefresh(stats.channel, expected, requests, score, not_before))
+
+    plan.sort(key=lambda p: (p.not_before is not None, -p.score, p.channel))
+    return plan
+
+
+class RateBudget:
+    """
+    Paces requests to a fixed rate.
+
+    Each refresh reserves its estimated requests up front; the next one
+    starts once those would have been spent at the configured rate.
+    """
+
+    def __init__(self, requests_per_minute: float, clock: Clock):
+        self.interval = 60.0 / requests_per_minute
+        self.clock = clock
+        self.next_free = clock.time()
+
+    async def acquire(self, requests: int) -> None:
+        """Wait until a refresh costing the given number of requests may start."""
+        now = self.clock.time()
+        start = max(now, self.next_free)
+        self.next_free = start + requests * self.interval
+        if start > now:
+            await self.clock.sleep(start - now)
+
+
+class Scheduler:
+    """Runs planned refreshes and records their outcome in the stats store."""
+
+    def __init__(
+        self,
+        store: ChannelStatsStore,
+        clock: Optional[Clock] = None,
+        hot_days: int = HOT_DAYS,
+    ):
+        self.store = store
+        self.clock = clock or Clock()
+        self.hot_days = hot_days
+
+    def stats_for(self, channel: str, export_dir: Path = OUTPUT_DIR) -> ChannelStats:
+        """
+        Get stored stats, falling back to the channel's existing export.
+
+        Args:
+            channel: Channel username
+            export_dir: Directory with channel exports
+
+        Returns:
+            ChannelStats (empty, never refreshed, for unknown channels)
+        """
+        stats = self.store.get(channel)
+        if stats is not None:
+            return stats
+
+        stats = ChannelStats(channel)
+        path = Path(export_dir) / f"{channel}.json"
+        if path.exists():
+            output = load_export(str(path))
+            stats.update_from_export(output)
+            stats.last_refresh = output.exported_at.timestamp()
+        return stats
+
+    def plan(self, channels: list[str], export_dir: Path = OUTPUT_DIR) -> list[PlannedRefresh]:
+        """Plan refreshes of the given channels (see plan_refreshes)."""
+        stats = [self.stats_for(_channel_name(c), export_dir) for c in channels]
+        return plan_refreshes(stats, self.clock.time(), self.hot_days)
+
+    async def run(
+        self,
+        plan: list[PlannedRefresh],
+        refresh: Callable[[str], Awaitable[OutputFile]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        max_channels: Optional[int] = None,
+        export_dir: Path = OUTPUT_DIR,
+    ) -> dict[str, Optional[str]]:
+        """
+        Refresh channels in plan order.
+
+        Channels still in error backoff are skipped. Authorization errors
+        stop the run; other errors are recorded and the run goes on.
+
+        Args:
+            plan: Output of plan()
+            refresh: Coroutine function refreshing one channel by username
+            concurrency: Maximum refreshes in flight
+            requests_per_minute: Request rate budget shared by all refreshes
+            max_channels: Refresh at most this many channels
+            export_dir: Directory with channel exports (for first-time stats)
+
+        Returns:
+            Channel -> None on success or the error message
+        """
+        due = [p for p in plan if p.not_before is None][:max_channels]
+        semaphore = asyncio.Semaphore(concurrency)
+        budget = RateBudget(requests_per_minute, self.clock)
+        results: dict[str, Optional[str]] = {}
+
+        async def run_one(item: PlannedRefresh) -> None:
+            async with semaphore:
+                await budget.acquire(item.requests)
+                stats = self.stats_for(item.channel, export_dir)
+                started = self.clock.time()
+                try:
+                    output = await refresh(item.channel)
+                except AuthError:
+                    raise
+                except Exception as e:
+                    # Fails this channel only; the other refreshes go on
+                    error = str(e) if isinstance(e, LoaderError) else f"{type(e).__name__}: {e}"
+                    stats.last_error = error
+                    stats.last_error_at = self.clock.time()
+                    stats.errors += 1
+                    results[item.channel] = error
+                else:
+                    stats.update_from_export(output)
+                    if output.status != 'complete':
+                        # Saved, but retry the rest like a failure
+                        stats.last_error = f"saved a {output.status} export"
+                        stats.last_error_at = self.clock.time()
+                        stats.errors += 1
+                        results[item.channel] = stats.last_error
+                        self.store.save(stats)
+                        return
+                    stats.last_refresh = started
+                    stats.last_duration = self.clock.time() - started
+                    stats.last_error = None
+                    stats.last_error_at = None
+                    stats.errors = 0
+                    results[item.channel] = None
+                self.store.save(stats)
+
+        await asyncio.gather(*(run_one(item) for item in due))
+        return results
+
+
+def format_plan(plan: list[PlannedRefresh]) -> str:
+    """Format a refresh plan as a text table."""
+    lines = [f"{'#':>3}  {'channel':<32} {'score':>9} {'expected':>9} {'requests':>8}  status"]
+    for rank, item in enumerate(plan, 1):
+        score = 'new' if math.isinf(item.score) else f"{item.score:.2f}"
+        expected = '-' if math.isinf(item.expected_items) else f"{item.expected_items:.0f}"
+        if item.not_before is None:
+            status = 'due'
+        else:
+            status = f"backoff until {datetime.fromtimestamp(item.not_before, timezone.utc):%Y-%m-%d %H:%M}"
+        lines.append(f"{rank:>3}  @{item.channel:<31} {score:>9} {expected:>9} {item.requests:>8}  {status}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Refresh channel exports, most productive channels first.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s --dry-run
+    %(prog)s --channel @a --channel @b --concurrency 4 --rpm 60
+    %(prog)s --max-channels 20
+'''
+    )
+    parser.add_argument(
+        '--channel',
+        action='append',
+        default=None,
+        help='Channel to schedule (repeatable; default: all exported channels)'
+    )
+    parser.add_argument(
+        '--dir',
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f'Directory with channel exports (default: {OUTPUT_DIR})'
+    )
+    parser.add_argument(
+        '--stats',
+        type=Path,
+        default=SCHEDULER_PATH,
+        help=f'Scheduler stats file (default: {SCHEDULER_PATH})'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Maximum channels refreshed at once (default: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--rpm',
+        type=float,
+        default=DEFAULT_REQUESTS_PER_MINUTE,
+        help=f'Request budget per minute across all channels (default: {DEFAULT_REQUESTS_PER_MINUTE})'
+    )
+    parser.add_argument(
+        '--max-channels',
+        type=int,
+        default=None,
+        help='Refresh at most this many channels'
+    )
+    parser.add_argument(
+        '--hot-days',
+        type=int,
+        default=HOT_DAYS,
+        help=f'Always re-fetch comments of posts younger than this many days (default: {HOT_DAYS})'
+    )
+    parser.add_argument(
+        '--text-mode',
+        choices=TEXT_MODES,
+        default=TEXT_MODE_MARKDOWN,
+        help='How message text is stored (see src.loader, default: %(default)s)'
+    )
+    parser.add_argument(
+        '--fetch-profile',
+        choices=PROFILE_CHOICES,
+        default='default',
+        help='Page size, pause and concurrency of history requests (see src.loader, default: %(default)s)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only print the refresh plan'
+    )
+    return parser.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    """
+    Main async entry point.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Exit code (0=success, 1=error, 2=some channels failed)
+    """
+    channels = args.channel or [path.stem for path in find_exports(args.dir)]
+    if not channels:
+        print_error(f"No channels given and no exports found in {args.dir}")
+        return 1
+
+    store = ChannelStatsStore(args.stats)
+    scheduler = Scheduler(store, hot_days=args.hot_days)
+    try:
+        plan = scheduler.plan(channels, args.dir)
+        print_progress(format_plan(plan))
+        if args.dry_run:
+            return 0
+
+        try:
+            client = create_client(text_mode=args.text_mode, fetch_profile=args.fetch_profile)
+        except ConfigError as e:
+            print_error(format_error('ConfigError', str(e), e.args[0] if e.args else None))
+            return 1
+
+        index = SearchIndex(INDEX_PATH)
+        aggregates = AuthorAggregates(AGGREGATES_PATH)
+        authors = AuthorIndex(AUTHOR_INDEX_PATH)
+        activity = ActivityMatrix(ACTIVITY_PATH)
+
+        async def refresh(channel: str) -> OutputFile:
+            output_path = get_output_path(channel, args.dir)
+            previous = load_export(output_path) if Path(output_path).exists() else None
+            return await load_channel(
+                client=client,
+                channel_id=channel,
+                output_path=output_path,
+                index=index,
+                aggregates=aggregates,
+                authors=authors,
+                activity=activity,
+                previous=previous,
+                hot_days=args.hot_days
+            )
+
+        try:
+            await client.connect()
+            results = await scheduler.run(
+                plan, refresh, args.concurrency, args.rpm, args.max_channels, args.dir
+            )
+        except LoaderError as e:
+            # Connecting gives up with NetworkError once its retries run out
+            print_error(format_error(type(e).__name__, str(e), getattr(e, 'suggestion', None)))
+            return 1
+        finally:
+            index.close()
+            aggregates.close()
+            authors.close()
+            activity.close()
+            await client.disconnect()
+
+        failed = {channel: error for channel, error in results.items() if error}
+        for channel, error in failed.items():
+            print_error(f"@{channel}: {error}")
+        print_progress(f"\nRefreshed {len(results) - len(failed)} channels, {len(failed)} failed")
+        return 2 if failed else 0
+
+    finally:
+        store.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    return asyncio.run(main_async(parse_args(argv)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
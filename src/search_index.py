@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Search Index - On-disk inverted index over comment text.
+
+The loader updates the index after every export, adding only comments
+that are not indexed yet; queries read only the postings of the query
+terms instead of re-reading the JSON exports.
+
+Usage:
+    python -m src.search_index build
+    python -m src.search_index build --rebuild
+    python -m src.search_index query 'crm OR notion'
+    python -m src.search_index query '"looking for" crm' --since 2026-01-01 --authors
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from src.utils import ensure_dir, print_error, print_progress, tokenize
+
+
+# Index location, next to the channel exports (see loader.OUTPUT_DIR)
+INDEX_PATH = Path('.specify-for-tg-analysis/memory/index.sqlite')
+EXPORTS_DIR = INDEX_PATH.parent / 'channels'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    channel TEXT,
+    post_id INTEGER NOT NULL,
+    comment_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    date INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS docs_comment ON docs (channel_id, comment_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    positions TEXT NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+'''
+
+# Query tokens: "quoted phrase" or bare word
+QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+@dataclass
+class Hit:
+    """Comment matching a query."""
+    channel_id: int
+    channel: Optional[str]
+    post_id: int
+    comment_id: int
+    author_id: int
+    date: datetime
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'channel_id': self.channel_id,
+            'channel': self.channel,
+            'post_id': self.post_id,
+            'comment_id': self.comment_id,
+            'author_id': self.author_id,
+            'date': self.date.isoformat(),
+        }
+
+
+def parse_query(query: str) -> list[list[list[str]]]:
+    """
+    Parse a query into OR-groups of AND-clauses.
+
+    Words are ANDed by default, `OR` separates groups (AND binds tighter),
+    and double quotes make a phrase. Every clause is a list of tokens; a
+    clause with several tokens must match as a phrase.
+
+    Args:
+        query: Query string, e.g. 'crm OR "project management" notion'
+
+    Returns:
+        List of groups, each a list of clauses
+    """
+    groups: list[list[list[str]]] = [[]]
+    for match in QUERY_TOKEN_RE.finditer(query):
+        phrase, word = match.groups()
+        if word == 'OR':
+            groups.append([])
+            continue
+        if word == 'AND':
+            continue
+        tokens = tokenize(phrase if phrase is not None else word)
+        if tokens:
+            groups[-1].append(tokens)
+    return [g for g in groups if g]
+
+
+def _to_epoch(value: str) -> int:
+    """Convert an ISO 8601 date or datetime to epoch seconds (UTC)."""
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+class SearchIndex:
+    """Inverted index term -> comment postings stored in SQLite."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file
+        """
+        ensure_dir(str(Path(path).parent))
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the index."""
+        self._db.close()
+
+    def add_export(self, data: dict, rebuild: bool = False) -> int:
+        """
+        Index the comments of an export that are not indexed yet.
+
+        Comments are matched by id, so an export may be added again after
+        every load or only with its new comments. Edits and deletions are
+        picked up by a rebuild.
+
+        Args:
+            data: Export dict as produced by OutputFile.to_dict(), or a
+                subset of its posts and comments
+            rebuild: Drop everything indexed for the channel first
+
+        Returns:
+            Number of newly indexed comments
+        """
+        channel = data['channel']
+        channel_id = channel['id']
+        count = 0
+
+        with self._db:
+            if rebuild:
+                self._db.execute(
+                    'DELETE FROM postings WHERE doc IN (SELECT id FROM docs WHERE channel_id = ?)',
+                    (channel_id,)
+                )
+                self._db.execute('DELETE FROM docs WHERE channel_id = ?', (channel_id,))
+
+            for post in channel['posts']:
+                for comment in post['comments']:
+                    cursor = self._db.execute(
+                        'INSERT OR IGNORE INTO docs (channel_id, channel, post_id, comment_id, author_id, date) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (channel_id, channel.get('username'), post['id'], comment['id'],
+                         comment['author']['user_id'], _to_epoch(comment['date']))
+                    )
+                    if not cursor.rowcount:
+                        # Already indexed
+                        continue
+                    doc = cursor.lastrowid
+
+                    positions: dict[str, list[str]] = {}
+                    for i, token in enumerate(tokenize(comment['text'])):
+                        positions.setdefault(token, []).append(str(i))
+                    self._db.executemany(
+                        'INSERT INTO postings (term, doc, positions) VALUES (?, ?, ?)',
+                        ((term, doc, ' '.join(p)) for term, p in positions.items())
+                    )
+                    count += 1
+
+        return count
+
+    def _postings(self, term: str) -> dict[int, str]:
+        """Return doc -> positions for a term."""
+        rows = self._db.execute('SELECT doc, positions FROM postings WHERE term = ?', (term,))
+        return dict(rows)
+
+    def _match_clause(self, tokens: list[str]) -> set[int]:
+        """Return docs containing a term or an exact phrase."""
+        if len(tokens) == 1:
+            return set(self._postings(tokens[0]))
+
+        postings = [self._postings(t) for t in tokens]
+        docs = set(postings[0]).intersection(*postings[1:])
+        matched = set()
+        for doc in docs:
+            offsets = [{int(p) for p in posting[doc].split()} for posting in postings]
+            if any(all(start + i in offsets[i] for i in range(1, len(tokens))) for start in offsets[0]):
+                matched.add(doc)
+        return matched
+
+    def search(
+        self,
+        query: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        channels: Optional[list[str]] = None,
+    ) -> list[Hit]:
+        """
+        Find comments matching a query.
+
+        Args:
+            query: Query string (see parse_query)
+            since: Only comments on or after this ISO date
+            until: Only comments before this ISO date
+            channels: Only comments in these channels (usernames, with or without @)
+
+        Returns:
+            Matching comments, newest first
+        """
+        docs: set[int] = set()
+        for group in parse_query(query):
+            matched = self._match_clause(group[0])
+            for clause in group[1:]:
+                if not matched:
+                    break
+                matched &= self._match_clause(clause)
+            docs |= matched
+
+        if not docs:
+            return []
+
+        conditions = []
+        params: list = []
+        if since:
+            conditions.append('date >= ?')
+            params.append(_to_epoch(since))
+        if until:
+            conditions.append('date < ?')
+            params.append(_to_epoch(until))
+        if channels:
+            names = [c.replace('https://t.me/', '').lstrip('@') for c in channels]
+            conditions.append(f"channel IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        where = ''.join(f' AND {c}' for c in conditions)
+
+        self._db.execute('CREATE TEMP TABLE IF NOT EXISTS matched (doc INTEGER PRIMARY KEY)')
+        self._db.execute('DELETE FROM matched')
+        self._db.executemany('INSERT INTO matched (doc) VALUES (?)', ((d,) for d in docs))
+        rows = self._db.execute(
+            'SELECT channel_id, channel, post_id, comment_id, author_id, date FROM docs '
+            f'WHERE id IN (SELECT doc FROM matched){where} ORDER BY date DESC, id',
+            params
+        )
+        return [
+            Hit(
+                channel_id=row[0],
+                channel=row[1],
+                post_id=row[2],
+                comment_id=row[3],
+                author_id=row[4],
+                date=datetime.fromtimestamp(row[5], tz=timezone.utc),
+            )
+            for row in rows
+        ]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Build and query the inverted index over exported comments.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s build
+    %(prog)s build --rebuild
+    %(prog)s query 'crm OR notion'
+    %(prog)s query '"looking for" crm' --since 2026-01-01 --channel @channel_a
+    %(prog)s query crm --authors --json
+'''
+    )
+    parser.add_argument(
+        '--index',
+        type=Path,
+        default=INDEX_PATH,
+        help=f'Index file (default: {INDEX_PATH})'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Index all existing channel exports')
+    build.add_argument(
+        '--dir',
+        type=Path,
+        default=EXPORTS_DIR,
+        help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+    )
+    build.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Re-index every export from scratch, dropping edited and deleted comments'
+    )
+
+    query = subparsers.add_parser('query', help='Search indexed comments')
+    query.add_argument('query', help='Words, "phrases", AND/OR')
+    query.add_argument('--since', default=None, help='Only comments on or after this date (ISO 8601)')
+    query.add_argument('--until', default=None, help='Only comments before this date (ISO 8601)')
+    query.add_argument('--channel', action='append', default=None, help='Only this channel (repeatable)')
+    query.add_argument('--authors', action='store_true', help='Output distinct author ids only')
+    query.add_argument('--json', action='store_true', help='Output machine-readable JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+    index = SearchIndex(args.index)
+
+    try:
+        if args.command == 'build':
+            paths = sorted(Path(args.dir).glob('*.json'))
+            for path in paths:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print_error(f"Cannot read {path.name}: {e}")
+                    return 1
+                count = index.add_export(data, rebuild=args.rebuild)
+                print_progress(f"Indexed {path.name}: {count} comments")
+            return 0
+
+        for value in (args.since, args.until):
+            try:
+                if value:
+                    _to_epoch(value)
+            except ValueError as e:
+                print_error(f"Invalid date: {e}")
+                return 1
+
+        hits = index.search(args.query, since=args.since, until=args.until, channels=args.channel)
+        if args.authors:
+            authors = list(dict.fromkeys(h.author_id for h in hits))
+            output = json.dumps(authors) if args.json else '\n'.join(map(str, authors))
+        elif args.json:
+            output = json.dumps([h.to_dict() for h in hits], ensure_ascii=False, indent=2)
+        else:
+            output = '\n'.join(
+                f"{h.date.isoformat()}  @{h.channel}  post {h.post_id}  comment {h.comment_id}  author {h.author_id}"
+                for h in hits
+            )
+        if output:
+            print_progress(output)
+        return 0
+
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Sharded Export - Channel exports split into one file per month.
+
+A sharded channel is a "<name>.shards" directory next to where its JSON
+export would be. Every "YYYY-MM.json" shard is a regular export holding
+the posts published in that month (UTC), so every reader of exports can
+read a shard. manifest.json lists the shards with their post and comment
+counts, post id and date ranges and SHA-256 checksums.
+
+Saving a channel again only rewrites the shards whose content changed,
+as told by the per-post content hashes (see src.content_hash), and
+readers pick the shards of a date range from the manifest without
+opening the others.
+
+Usage:
+    python -m src.shards split
+    python -m src.shards split --channel @channel_a
+    python -m src.shards info --channel @channel_a
+    python -m src.shards verify
+"""
+import argparse
+import hashlib
+import json
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.content_hash import digest, post_row
+from src.encoder import ExportEncoder
+from src.models import Channel, OutputFile, Post
+from src.utils import ensure_dir, find_exports, print_error, print_progress, replace_file
+
+
+# Exports live here (see loader.OUTPUT_DIR)
+EXPORTS_DIR = Path('.specify-for-tg-analysis/memory/channels')
+
+SHARDS_FORMAT_VERSION = 1
+SHARDS_SUFFIX = '.shards'
+MANIFEST_NAME = 'manifest.json'
+
+
+@dataclass
+class Shard:
+    """Manifest entry of one month's shard."""
+    month: str  # 'YYYY-MM'
+    file: str
+    posts: int
+    comments: int
+    min_id: int
+    max_id: int
+    first_date: str
+    last_date: str
+    exported_at: str  # When the shard file was last written
+    sha256: str
+    content_hash: Optional[str] = None  # Over the post hashes and the file format
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Shard':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(**data)
+
+
+@dataclass
+class Manifest:
+    """Channel, totals and shards of a sharded export, newest shard first."""
+    status: str
+    exported_at: str
+    channel: dict  # id, username, title
+    posts_count: int
+    comments_count: int
+    shards: list[Shard]
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'format_version': SHARDS_FORMAT_VERSION,
+            'status': self.status,
+            'exported_at': self.exported_at,
+            'channel': self.channel,
+            'posts_count': self.posts_count,
+            'comments_count': self.comments_count,
+            'shards': [s.to_dict() for s in self.shards],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Manifest':
+        """Create from a dictionary produced by to_dict()."""
+        return cls(
+            status=data['status'],
+            exported_at=data['exported_at'],
+            channel=data['channel'],
+            posts_count=data['posts_count'],
+            comments_count=data['comments_count'],
+            shards=[Shard.from_dict(s) for s in data['shards']],
+        )
+
+
+def get_shards_path(export_path: str) -> Path:
+    """
+    Get the shard directory for an export file.
+
+    Args:
+        export_path: Path to export JSON file
+
+    Returns:
+        "<name>.shards" directory beside the export
+    """
+    return Path(export_path).with_suffix(SHARDS_SUFFIX)
+
+
+def month_of(value: datetime) -> str:
+    """Return the 'YYYY-MM' shard key of a UTC or aware datetime."""
+    return value.astimezone(timezone.utc).strftime('%Y-%m')
+
+
+def read_manifest(directory: Path) -> Optional[Manifest]:
+    """Read a shard directory's manifest, or None if there is none."""
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return Manifest.from_dict(json.load(f))
+
+
+def _encode_shard(output: OutputFile, posts: list[Post], exported_at: datetime, encoder: ExportEncoder) -> bytes:
+    channel = output.channel
+    shard = OutputFile(
+        version=output.version,
+        status=output.status,
+        exported_at=exported_at,
+        posts_count=len(posts),
+        comments_count=sum(len(p.comments) for p in posts),
+        channel=Channel(id=channel.id, username=channel.username, title=channel.title, posts=posts),
+    )
+    return encoder.encode(shard).encode('utf-8')
+
+
+def write_shards(
+    output: OutputFile,
+    directory: Path,
+    pretty: bool = True,
+    rows: Optional[list[list]] = None,
+) -> tuple[Manifest, list[str]]:
+    """
+    Save an export as monthly shards, rewriting only the shards that changed.
+
+    A shard counts as unchanged when the hashes of its posts, the channel
+    header and the file format are the same as recorded for it; its file
+    and manifest entry are then kept as they are and its posts are not
+    even encoded. Shards of months no longer in the export are deleted.
+
+    Args:
+        output: Export to save
+        directory: Shard directory (see get_shards_path)
+        pretty: Indent the shard files; False for compact JSON
+        rows: content_hash.post_row() of every post, if already computed
+
+    Returns:
+        (manifest, months of the shards written)
+    """
+    directory = Path(directory)
+    ensure_dir(str(directory))
+    previous = read_manifest(directory)
+    old = {s.month: s for s in previous.shards} if previous is not None else {}
+
+    channel = output.channel
+    if rows is None:
+        rows = [post_row(p) for p in channel.posts]
+    header = [SHARDS_FORMAT_VERSION, output.version, output.status, channel.id, channel.username, channel.title, pretty]
+    months: dict[str, list[Post]] = {}
+    hashes: dict[str, list[str]] = {}
+    for post, row in zip(channel.posts, rows):
+        month = month_of(post.date)
+        months.setdefault(month, []).append(post)
+        hashes.setdefault(month, []).append(row[1])
+
+    encoder = ExportEncoder(pretty)
+    shards = []
+    written = []
+    for month in sorted(months, reverse=True):
+        posts = months[month]
+        content_hash = digest([header, hashes[month]])
+        entry = old.get(month)
+        if entry is not None and entry.content_hash == content_hash and (directory / entry.file).exists():
+            shards.append(entry)
+            continue
+        data = _encode_shard(output, posts, output.exported_at, encoder)
+        ids = [p.id for p in posts]
+        dates = [p.date for p in posts]
+        shard = Shard(
+            month=month,
+            file=f"{month}.json",
+            posts=len(posts),
+            comments=sum(len(p.comments) for p in posts),
+            min_id=min(ids),
+            max_id=max(ids),
+            first_date=min(dates).isoformat(),
+            last_date=max(dates).isoformat(),
+            exported_at=output.exported_at.isoformat(),
+            sha256=hashlib.sha256(data).hexdigest(),
+            content_hash=content_hash,
+        )
+        replace_file(directory / shard.file, data)
+        shards.append(shard)
+        written.append(month)
+
+    manifest = Manifest(
+        status=output.status,
+        exported_at=output.exported_at.isoformat(),
+        channel={'id': channel.id, 'username': channel.username, 'title': channel.title},
+        posts_count=output.posts_count,
+        comments_count=output.comments_count,
+        shards=shards,
+    )
+    replace_file(directory / MANIFEST_NAME, json.dumps(manifest.to_dict(), ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # Only after the manifest no longer lists them
+    for month, entry in old.items():
+        if month not in months:
+            (directory / entry.file).unlink(missing_ok=True)
+    return manifest, written
+
+
+def select_shards(manifest: Manifest, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[Shard]:
+    """Return the shards with posts in [since, until]; either bound may be omitted."""
+    first = month_of(since) if since is not None else None
+    last = month_of(until) if until is not None else None
+    return [
+        s for s in manifest.shards
+        if (first is None or s.month >= first) and (last is None or s.month <= last)
+    ]
+
+
+def shard_paths(directory: Path, since: Optional[datetime] = None, until: Optional[datetime] = None) -> list[Path]:
+    """
+    List the shard files of a date range, newest first.
+
+    The shards are regular exports, e.g. for utils.iter_post_records.
+    Posts at the edges of the range may fall outside it.
+
+    Args:
+        directory: Shard directory
+        since: Earliest post date wanted
+        until: Latest post date wanted
+
+    Returns:
+        Shard file paths
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return []
+    return [Path(directory) / s.file for s in select_shards(manifest, since, until)]
+
+
+def load_shards(directory: Path, since: Optional[datetime] = None, until: Optional[datetime] = None) -> OutputFile:
+    """
+    Load a sharded export, or the posts of a date range from it.
+
+    Only the shards overlapping the range are opened.
+
+    Args:
+        directory: Shard directory
+        since: Earliest post date wanted
+        until: Latest post date wanted
+
+    Returns:
+        OutputFile with the posts in the range, newest first; the counts
+        are those of the loaded posts
+
+    Raises:
+        FileNotFoundError: If the directory has no manifest
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST_NAME} in {directory}")
+    posts = []
+    for shard in select_shards(manifest, since, until):
+        with open(Path(directory) / shard.file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        posts.extend(
+            post for post in (Post.from_dict(p) for p in data['channel']['posts'])
+            if (since is None or post.date >= since) and (until is None or post.date <= until)
+        )
+    info = manifest.channel
+    return OutputFile(
+        version='1.0',
+        status=manifest.status,
+        exported_at=datetime.fromisoformat(manifest.exported_at),
+        posts_count=len(posts),
+        comments_count=sum(len(p.comments) for p in posts),
+        channel=Channel(id=info['id'], username=info['username'], title=info['title'], posts=posts),
+    )
+
+
+def verify_shards(directory: Path) -> list[str]:
+    """
+    Check every shard file against its manifest checksum.
+
+    Returns:
+        Months of missing or modified shards
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST_NAME} in {directory}")
+    bad = []
+    for shard in manifest.shards:
+        path = Path(directory) / shard.file
+        if not path.exists() or hashlib.sha256(path.read_bytes()).hexdigest() != shard.sha256:
+            bad.append(shard.month)
+    return bad
+
+
+def find_shard_dirs(directory: Path, channels: Optional[Iterable[str]] = None) -> list[Path]:
+    """List sharded exports, optionally only of the given channels (with or without @)."""
+    directory = Path(directory)
+    if channels:
+        names = [c.replace('https://t.me/', '').lstrip('@') for c in channels]
+        paths = [directory / f"{name}{SHARDS_SUFFIX}" for name in names]
+    else:
+        paths = sorted(directory.glob(f"*{SHARDS_SUFFIX}"))
+    return [p for p in paths if (p / MANIFEST_NAME).exists()]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Split channel exports into monthly shards and inspect them.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s split
+    %(prog)s split --channel @channel_a --compact
+    %(prog)s info --channel @channel_a
+    %(prog)s verify
+'''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in [
+        ('split', 'Write shards for existing JSON exports'),
+        ('info', 'Show the shards of sharded exports'),
+        ('verify', 'Check shard files against their checksums'),
+    ]:
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument(
+            '--dir',
+            type=Path,
+            default=EXPORTS_DIR,
+            help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+        )
+        command.add_argument('--channel', action='append', default=None, help='Only this channel (repeatable)')
+        if name == 'split':
+            command.add_argument('--compact', action='store_true', help='Write shards without indentation')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Main entry point.
+
+    Returns:
+        Exit code (0=success, 1=error or modified shards found)
+    """
+    args = parse_args(argv)
+
+    if args.command == 'split':
+        paths = find_exports(args.dir, args.channel)
+        if not paths:
+            print_error(f"No channel exports found in {args.dir}")
+            return 1
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                output = OutputFile.from_dict(json.load(f))
+            manifest, written = write_shards(output, get_shards_path(path), pretty=not args.compact)
+            print_progress(f"{path.name}: {len(manifest.shards)} shards, {len(written)} written "
+                           f"-> {get_shards_path(path).name}")
+        return 0
+
+    directories = find_shard_dirs(args.dir, args.channel)
+    if not directories:
+        print_error(f"No sharded exports found in {args.dir}")
+        return 1
+
+    failed = False
+    for directory in directories:
+        if args.command == 'info':
+            manifest = read_manifest(directory)
+            print_progress(f"{directory.name}: {manifest.posts_count} posts, {manifest.comments_count} comments, "
+                           f"{manifest.status}, exported {manifest.exported_at}")
+            for s in manifest.shards:
+                print_progress(f"  {s.month}  {s.posts:>6} posts {s.comments:>8} comments  "
+                               f"ids {s.min_id}-{s.max_id}  {s.sha256[:12]}")
+        else:
+            bad = verify_shards(directory)
+            if bad:
+                failed = True
+                print_error(f"{directory.name}: modified or missing shards: {', '.join(bad)}")
+            else:
+                print_progress(f"{directory.name}: ok")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Snapshot Store - Deduplicated history of channel exports.
+
+Each snapshot of an export is split into one object per post and one per
+comment, stored once in an SQLite object table under their BLAKE2b hash.
+A snapshot itself is a row with the channel header and, per post, the
+hash of the post object plus its view and reply counters (32 bytes), so
+counters that change on every refresh do not create new objects. A post
+object holds the post's own fields and the hashes of its comments.
+
+Unchanged posts and comments are shared by all snapshots that contain
+them, so the store grows with what changed between snapshots rather
+than with their number. Deleting snapshots leaves their objects in place
+until gc.
+
+Usage:
+    python -m src.snapshots add
+    python -m src.snapshots list --channel @channel_a
+    python -m src.snapshots materialize 12 --output channel_a-12.json
+    python -m src.snapshots diff 11 12
+    python -m src.snapshots rm 3 4
+    python -m src.snapshots gc
+"""
+import argparse
+import json
+import sqlite3
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from hashlib import blake2b
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.content_hash import HashManifest, diff_hashes, format_diff
+from src.encoder import save_export
+from src.models import Channel, Comment, OutputFile, Post
+from src.shards import find_shard_dirs, load_shards
+from src.utils import ensure_dir, find_exports, print_error, print_progress
+
+
+# Exports live here (see loader.OUTPUT_DIR)
+EXPORTS_DIR = Path('.specify-for-tg-analysis/memory/channels')
+
+# Store location, next to the channel exports
+SNAPSHOTS_PATH = Path('.specify-for-tg-analysis/memory/snapshots/store.sqlite')
+
+# Bytes of an object hash
+HASH_SIZE = 16
+
+# Per post in a snapshot: object hash, views, replies (-1 for None)
+_ENTRY = struct.Struct(f'<{HASH_SIZE}sqq')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    version TEXT NOT NULL,
+    status TEXT NOT NULL,
+    exported_at TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    username TEXT,
+    title TEXT NOT NULL,
+    posts_count INTEGER NOT NULL,
+    comments_count INTEGER NOT NULL,
+    posts BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_channel ON snapshots (channel, taken_at);
+'''
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+@dataclass
+class SnapshotInfo:
+    """A stored snapshot without its posts."""
+    id: int
+    channel: str
+    taken_at: float
+    status: str
+    exported_at: str
+    posts_count: int
+    comments_count: int
+
+
+def _object_hash(data: bytes) -> bytes:
+    return blake2b(data, digest_size=HASH_SIZE).digest()
+
+
+def _channel_key(channel: Channel) -> str:
+    """Name snapshots are grouped by: the username, or the id for channels without one."""
+    return (channel.username or str(channel.id)).lower()
+
+
+def _counter(value: Optional[int]) -> int:
+    return -1 if value is None else value
+
+
+class SnapshotStore:
+    """SQLite store of deduplicated export snapshots."""
+
+    def __init__(self, path: Path = SNAPSHOTS_PATH):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file
+        """
+        ensure_dir(str(Path(path).parent))
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the store."""
+        self._db.close()
+
+    def _put(self, data: bytes) -> tuple[bytes, int]:
+        """Store an object unless present; return its hash and the bytes added."""
+        key = _object_hash(data)
+        cursor = self._db.execute('INSERT OR IGNORE INTO objects VALUES (?, ?)', (key, data))
+        return key, len(data) if cursor.rowcount else 0
+
+    def _get(self, key: bytes) -> bytes:
+        row = self._db.execute('SELECT data FROM objects WHERE hash = ?', (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"Missing object {key.hex()}")
+        return row[0]
+
+    def add(self, output: OutputFile, taken_at: Optional[float] = None) -> tuple[SnapshotInfo, int, int]:
+        """
+        Store a snapshot of an export.
+
+        Args:
+            output: Export to store
+            taken_at: Unix time of the snapshot (default: now)
+
+        Returns:
+            (snapshot, objects added, bytes added)
+        """
+        taken_at = time.time() if taken_at is None else taken_at
+        channel = output.channel
+        entries = []
+        added_objects = added_bytes = 0
+        with self._db:
+            for post in channel.posts:
+                comment_keys = []
+                for comment in post.comments:
+                    key, size = self._put(_dumps(comment.to_dict()).encode('utf-8'))
+                    comment_keys.append(key)
+                    added_objects += bool(size)
+                    added_bytes += size
+                fields = post.to_dict()
+                for name in ('views', 'replies', 'comments'):
+                    del fields[name]
+                key, size = self._put(_dumps(fields).encode('utf-8') + b'\n' + b''.join(comment_keys))
+                added_objects += bool(size)
+                added_bytes += size
+                entries.append(_ENTRY.pack(key, _counter(post.views), _counter(post.replies)))
+
+            cursor = self._db.execute(
+                'INSERT INTO snapshots (channel, taken_at, version, status, exported_at, channel_id, username, '
+                'title, posts_count, comments_count, posts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (_channel_key(channel), taken_at, output.version, output.status, output.exported_at.isoformat(),
+                 channel.id, channel.username, channel.title, output.posts_count, output.comments_count,
+                 b''.join(entries))
+            )
+        info = SnapshotInfo(cursor.lastrowid, _channel_key(channel), taken_at, output.status,
+                            output.exported_at.isoformat(), output.posts_count, output.comments_count)
+        return info, added_objects, added_bytes
+
+    def list_snapshots(self, channel: Optional[str] = None) -> list[SnapshotInfo]:
+        """List snapshots, oldest first, optionally of one channel (with or without @)."""
+        query = ('SELECT id, channel, taken_at, status, exported_at, posts_count, comments_count '
+                 'FROM snapshots')
+        if channel is None:
+            rows = self._db.execute(query + ' ORDER BY taken_at, id')
+        else:
+            name = channel.replace('https://t.me/', '').lstrip('@').lower()
+            rows = self._db.execute(query + ' WHERE channel = ? ORDER BY taken_at, id', (name,))
+        return [SnapshotInfo(*row) for row in rows]
+
+    def materialize(self, snapshot_id: int) -> OutputFile:
+        """
+        Rebuild the export a snapshot was taken of.
+
+        Raises:
+            KeyError: If there is no such snapshot
+        """
+        row = self._db.execute(
+            'SELECT version, status, exported_at, channel_id, username, title, posts_count, comments_count, posts '
+            'FROM snapshots WHERE id = ?', (snapshot_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No snapshot {snapshot_id}")
+        version, status, exported_at, channel_id, username, title, posts_count, comments_count, entries = row
+
+        posts = []
+        for key, views, replies in _ENTRY.iter_unpack(entries):
+            fields, comment_keys = self._get(key).split(b'\n', 1)
+            data = json.loads(fields)
+            data['views'] = None if views < 0 else views
+            data['replies'] = None if replies < 0 else replies
+            post = Post.from_dict({**data, 'comments': []})
+            post.comments = [
+                Comment.from_dict(json.loads(self._get(comment_keys[i:i + HASH_SIZE])))
+                for i in range(0, len(comment_keys), HASH_SIZE)
+            ]
+            posts.append(post)
+        return OutputFile(
+            version=version,
+            status=status,
+            exported_at=datetime.fromisoformat(exported_at),
+            posts_count=posts_count,
+            comments_count=comments_count,
+            channel=Channel(id=channel_id, username=username, title=title, posts=posts),
+        )
+
+    def delete(self, snapshot_id: int) -> bool:
+        """Delete a snapshot; its objects stay until gc(). Returns whether it existed."""
+        with self._db:
+            return self._db.execute('DELETE FROM snapshots WHERE id = ?', (snapshot_id,)).rowcount > 0
+
+    def _reachable(self) -> Iterator[bytes]:
+        """Yield the hash of every object some snapshot refers to (posts may repeat)."""
+        seen = set()
+        for (entries,) in self._db.execute('SELECT posts FROM snapshots').fetchall():
+            for key, _, _ in _ENTRY.iter_unpack(entries):
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield key
+                comment_keys = self._get(key).split(b'\n', 1)[1]
+                for i in range(0, len(comment_keys), HASH_SIZE):
+                    yield comment_keys[i:i + HASH_SIZE]
+
+    def gc(self) -> tuple[int, int]:
+        """
+        Delete the objects no snapshot refers to and compact the database.
+
+        Returns:
+            (objects deleted, bytes freed)
+        """
+        with self._db:
+            self._db.execute('CREATE TEMP TABLE IF NOT EXISTS live (hash BLOB PRIMARY KEY) WITHOUT ROWID')
+            self._db.execute('DELETE FROM live')
+            self._db.executemany('INSERT OR IGNORE INTO live VALUES (?)', ((key,) for key in self._reachable()))
+            count, size = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM objects WHERE hash NOT IN (SELECT hash FROM live)'
+            ).fetchone()
+            self._db.execute('DELETE FROM objects WHERE hash NOT IN (SELECT hash FROM live)')
+            self._db.execute('DROP TABLE live')
+        self._db.execute('VACUUM')
+        return count, size
+
+    def stats(self) -> dict:
+        """Return the number of snapshots and objects and the bytes held by objects."""
+        snapshots = self._db.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+        objects, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM objects').fetchone()
+        return {'snapshots': snapshots, 'objects': objects, 'bytes': size}
+
+
+def _iter_exports(directory: Path, channels: Optional[list[str]]) -> Iterator[tuple[str, OutputFile]]:
+    """Yield (name, export) for single-file and sharded exports."""
+    for path in find_exports(directory, channels):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield path.name, OutputFile.from_dict(json.load(f))
+    for path in find_shard_dirs(directory, channels):
+        yield path.name, load_shards(path)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Keep a deduplicated history of channel exports.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+    %(prog)s add
+    %(prog)s list --channel @channel_a
+    %(prog)s materialize 12 --output channel_a-12.json
+    %(prog)s diff 11 12
+    %(prog)s rm 3 4
+    %(prog)s gc
+'''
+    )
+    parser.add_argument('--store', type=Path, default=SNAPSHOTS_PATH, help='Snapshot store (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add = subparsers.add_parser('add', help='Snapshot the current exports')
+    add.add_argument(
+        '--dir',
+        type=Path,
+        default=EXPORTS_DIR,
+        help=f'Directory with channel exports (default: {EXPORTS_DIR})'
+    )
+    add.add_argument('--channel', action='append', default=None, help='Only this channel (repeatable)')
+
+    listing = subparsers.add_parser('list', help='List snapshots and store size')
+    listing.add_argument('--channel', default=None, help='Only this channel')
+
+    materialize = subparsers.add_parser('materialize', help='Write a snapshot back out as an export')
+    materialize.add_argument('id', type=int, help='Snapshot id')
+    materialize.add_argument('--output', type=Path, required=True, help='Export file to write')
+    materialize.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+
+    diff = subparsers.add_parser('diff', help='Compare two snapshots (see src.content_hash)')
+    diff.add_argument('old', type=int, help='Earlier snapshot id')
+    diff.add_argument('new', type=int, help='Later snapshot id')
+
+    remove = subparsers.add_parser('rm', help='Delete snapshots (run gc to free their objects)')
+    remove.add_argument('ids', type=int, nargs='+', help='Snapshot ids')
+
+    subparsers.add_parser('gc', help='Delete unreferenced objects and compact the store')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Main entry point."""
+    args = parse_args(argv)
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == 'add':
+            count = 0
+            for name, output in _iter_exports(args.dir, args.channel):
+                info, objects, size = store.add(output)
+                count += 1
+                print_progress(f"{name}: snapshot {info.id}, {objects} new objects ({size / 1024:.1f} KiB)")
+            if not count:
+                print_error(f"No channel exports found in {args.dir}")
+                return 1
+
+        elif args.command == 'list':
+            for info in store.list_snapshots(args.channel):
+                taken = datetime.fromtimestamp(info.taken_at, timezone.utc)
+                print_progress(f"{info.id:>6}  @{info.channel:<31} {taken:%Y-%m-%d %H:%M}  {info.status:<8} "
+                               f"{info.posts_count:>7} posts {info.comments_count:>9} comments")
+            stats = store.stats()
+            print_progress(f"{stats['snapshots']} snapshots, {stats['objects']} objects, "
+                           f"{stats['bytes'] / 1024 / 1024:.1f} MiB")
+
+        elif args.command == 'materialize':
+            output = store.materialize(args.id)
+            save_export(output, str(args.output), pretty=not args.compact)
+            print_progress(f"Snapshot {args.id}: {output.posts_count} posts -> {args.output}")
+
+        elif args.command == 'diff':
+            old, new = store.materialize(args.old), store.materialize(args.new)
+            if old.channel.id != new.channel.id:
+                print_error(f"Snapshots are of different channels: {old.channel.title} and {new.channel.title}")
+                return 1
+            print_progress(format_diff(diff_hashes(HashManifest.from_export(old), HashManifest.from_export(new))))
+
+        elif args.command == 'rm':
+            missing = [i for i in args.ids if not store.delete(i)]
+            if missing:
+                print_error(f"No such snapshots: {', '.join(map(str, missing))}")
+                return 1
+
+        else:
+            count, size = store.gc()
+            print_progress(f"Deleted {count} unreferenced objects ({size / 1024:.1f} KiB)")
+        return 0
+
+    except KeyError as e:
+        print_error(str(e.args[0]))
+        return 1
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,66 +1,415 @@
 """Telegram client wrapper using Telethon."""
 import asyncio
+import json
+import re
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
 from datetime import timezone
 from pathlib import Path
 from typing import AsyncIterator, Optional
 
-from telethon import TelegramClient as TelethonClient
+from telethon import TelegramClient as TelethonClient, events
 from telethon.errors import (
     AuthKeyUnregisteredError,
     ChannelPrivateError,
     FloodWaitError,
     RPCError,
+    TakeoutInitDelayError,
+    TakeoutInvalidError,
+    TakeoutRequiredError,
 )
-from telethon.tl.types import Channel as TelethonChannel, User
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.functions.users import GetUsersRequest
+from telethon.tl.types import Channel as TelethonChannel, InputUserFromMessage, PeerChannel, PeerUser, User
 
 from src.config import load_config
 from src.errors import AuthError, AccessError, NetworkError
-from src.models import Author, Channel, Comment, Post
+from src.fetch_tuning import AUTO_PROFILE, FETCH_PROFILES, PROFILES_PATH, FetchTuner
+from src.models import ANONYMOUS_USER_ID, Author, Channel, Comment, Post
+from src.retry import RetryPolicy, is_transient
+from src.utils import replace_file
 
 
 # Session file location
 SESSION_DIR = Path('.specify-for-tg-analysis/tg')
 SESSION_NAME = 'session'
 
+# Kinds of live updates yielded by iter_updates
+UPDATE_POST = 'post'
+UPDATE_COMMENT = 'comment'
+UPDATE_RECONNECT = 'reconnect'
+
+# How often iter_updates checks the connection while no messages arrive
+CONNECTION_CHECK_SECONDS = 5
+
+# How message text is stored. Telethon's message.text re-renders the
+# formatting entities as markdown in pure Python; raw_text skips that.
+TEXT_MODE_MARKDOWN = 'markdown'
+TEXT_MODE_RAW = 'raw'
+# Raw text plus [type, offset, length(, extra)] entity lists; offsets and
+# lengths are in UTF-16 code units, as sent by Telegram
+TEXT_MODE_RAW_ENTITIES = 'raw+entities'
+TEXT_MODES = (TEXT_MODE_MARKDOWN, TEXT_MODE_RAW, TEXT_MODE_RAW_ENTITIES)
+
+# Paths history can be fetched through; see TelegramClientWrapper's takeout
+HISTORY_TAKEOUT = 'takeout'
+HISTORY_NORMAL = 'normal'
+
+# Optional on-disk user cache, next to the channel exports
+USER_CACHE_PATH = Path('.specify-for-tg-analysis/memory/users.json')
+
+# Entity class name -> compact type name, e.g. MessageEntityTextUrl -> text_url
+_entity_types: dict[type, str] = {}
+
+
+@dataclass
+class HistoryStats:
+    """Messages fetched through one history path and the time spent on them, waits included."""
+    messages: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Messages per second."""
+        return self.messages / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class Update:
+    """A live update: a new post, a new comment on a post, or a reconnect."""
+    kind: str
+    post_id: int = 0
+    post: Optional[Post] = None
+    comment: Optional[Comment] = None
+
+
+def _entity_type(entity) -> str:
+    """Return the compact type name of a message entity."""
+    cls = type(entity)
+    name = _entity_types.get(cls)
+    if name is None:
+        name = _entity_types[cls] = re.sub(
+            r'(?<!^)(?=[A-Z])', '_', cls.__name__.removeprefix('MessageEntity')
+        ).lower()
+    return name
+
+
+def _to_entities(entities) -> list:
+    """Convert message entities to compact [type, offset, length(, extra)] lists."""
+    result = []
+    for entity in entities or ():
+        item = [_entity_type(entity), entity.offset, entity.length]
+        extra = getattr(entity, 'url', None) or getattr(entity, 'user_id', None) or getattr(entity, 'language', None)
+        if extra:
+            item.append(extra)
+        result.append(item)
+    return result
+
+
+def _message_text(message, text_mode: str) -> tuple[str, Optional[list]]:
+    """Return the text and entities (None unless requested) to store for a message."""
+    if text_mode == TEXT_MODE_MARKDOWN:
+        # Non-text messages have no text
+        return message.text or '', None
+    text = message.raw_text or ''
+    if text_mode == TEXT_MODE_RAW_ENTITIES:
+        return text, _to_entities(message.entities)
+    return text, None
+
+
+def _to_post(message, text_mode: str = TEXT_MODE_MARKDOWN) -> Post:
+    """Convert a channel message to a Post without comments."""
+    text, entities = _message_text(message, text_mode)
+    return Post(
+        id=message.id,
+        text=text,
+        date=message.date.replace(tzinfo=timezone.utc) if message.date else None,
+        views=message.views,
+        comments=[],
+        replies=message.replies.replies if message.replies else None,
+        entities=entities
+    )
+
+
+def _to_author(user: User) -> Author:
+    """Convert a Telegram user to an Author."""
+    return Author(
+        user_id=user.id,
+        username=user.username,
+        first_name=user.first_name or '',
+        last_name=user.last_name
+    )
+
+
+ANONYMOUS_AUTHOR = Author(
+    user_id=ANONYMOUS_USER_ID,
+    username=None,
+    first_name='Anonymous',
+    last_name=None
+)
+
+
+def _sender_user_id(message) -> Optional[int]:
+    """Return the user id a message was sent by, or None for channels and anonymous admins."""
+    from_id = getattr(message, 'from_id', None)
+    return from_id.user_id if isinstance(from_id, PeerUser) else None
+
+
+def _to_comment(message, text_mode: str = TEXT_MODE_MARKDOWN, author: Optional[Author] = None) -> Comment:
+    """
+    Convert a discussion message to a Comment with author information.
+
+    The author is taken from the message's sender unless given (e.g. when
+    the sender was not included with the message and had to be looked up).
+    """
+    if author is None:
+        sender = message.sender
+        # Anonymous or channel post otherwise
+        author = _to_author(sender) if isinstance(sender, User) else ANONYMOUS_AUTHOR
+
+    # A reply to another comment has the thread top set;
+    # a direct reply to the post only points at the thread root
+    reply_to = None
+    header = message.reply_to
+    if header is not None and header.reply_to_top_id:
+        reply_to = header.reply_to_msg_id
+
+    text, entities = _message_text(message, text_mode)
+    return Comment(
+        id=message.id,
+        text=text,
+        date=message.date.replace(tzinfo=timezone.utc) if message.date else None,
+        author=author,
+        reply_to=reply_to,
+        entities=entities
+    )
+
+
+class UserCache:
+    """
+    Comment authors by user id, shared by all requests of a run.
+
+    Senders that come with a page of comments are added for free. Senders
+    missing from their page are looked up here first and only resolved
+    with a (batched) request when unknown. With a path the cache is loaded
+    from and saved to disk, so it also carries over between runs.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Create a cache.
+
+        Args:
+            path: JSON file to load from and save to (None: this run only)
+        """
+        self.path = path
+        self.authors: dict[int, Author] = {}
+        # Lookups of senders missing from their page
+        self.hits = 0
+        self.misses = 0
+        # Batched user requests and the users they returned
+        self.requests = 0
+        self.resolved = 0
+        if path is not None and Path(path).exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for user_id, (username, first_name, last_name) in json.load(f).items():
+                    self.authors[int(user_id)] = Author(int(user_id), username, first_name, last_name)
+
+    def add(self, author: Author) -> None:
+        """Add or refresh an author."""
+        self.authors[author.user_id] = author
+
+    def lookup(self, user_id: int) -> Optional[Author]:
+        """Get a sender that was missing from its page, counting the hit or miss."""
+        author = self.authors.get(user_id)
+        if author is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return author
+
+    def save(self) -> None:
+        """Write the cache to its path, if it has one."""
+        if self.path is None:
+            return
+        data = {
+            str(a.user_id): [a.username, a.first_name, a.last_name] for a in self.authors.values()
+        }
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        replace_file(Path(self.path), json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def stats(self) -> dict:
+        """
+        Return cache counters.
+
+        lookups_saved counts the single-user requests avoided: cache hits,
+        plus users resolved in batches beyond one per request.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'users': len(self.authors),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'requests': self.requests,
+            'resolved': self.resolved,
+            'lookups_saved': self.hits + max(0, self.resolved - self.requests),
+        }
+
 
 class TelegramClientWrapper:
     """Wrapper around Telethon client for channel data extraction."""
 
-    def __init__(self, api_id: int, api_hash: str):
+    def __init__(
+        self,
+        api_id: int,
+        api_hash: str,
+        session_name: str = SESSION_NAME,
+        text_mode: str = TEXT_MODE_MARKDOWN,
+        users: Optional[UserCache] = None,
+        tuner: Optional[FetchTuner] = None,
+        retry: Optional[RetryPolicy] = None,
+        takeout: bool = False,
+    ):
         """
         Initialize the Telegram client.
 
         Args:
             api_id: Telegram API ID
             api_hash: Telegram API hash
+            session_name: Session file name in SESSION_DIR; processes running
+                at the same time need different sessions
+            text_mode: How message text is stored (one of TEXT_MODES)
+            users: Cache of comment authors (default: a new in-memory cache)
+            tuner: Fetch profile for history requests (default: fixed default profile)
+            retry: Retries of requests failing transiently (default: RetryPolicy())
+            takeout: Fetch history and comments through a takeout session,
+                which Telegram rate-limits less for bulk exports; falls back
+                to normal requests when none is granted
         """
+        self.text_mode = text_mode
+        self.users = users if users is not None else UserCache()
+        self.tuner = tuner if tuner is not None else FetchTuner()
+        self.retry = retry if retry is not None else RetryPolicy()
+        # Requests repeated after a transient failure, for reporting
+        self.retries = 0
+        self.takeout = takeout
+        # Why the takeout session is not used, once it has been tried
+        self.takeout_fallback: Optional[str] = None
+        self.history = {HISTORY_TAKEOUT: HistoryStats(), HISTORY_NORMAL: HistoryStats()}
+        self._takeout_stack: Optional[AsyncExitStack] = None
+        self._slots = asyncio.Condition()
+        self._in_flight = 0
         # Ensure session directory exists
         SESSION_DIR.mkdir(parents=True, exist_ok=True)
-        session_path = SESSION_DIR / SESSION_NAME
+        session_path = SESSION_DIR / session_name
 
         self._client = TelethonClient(
             str(session_path),
             api_id,
             api_hash
         )
-        self._client.flood_sleep_threshold = 60  # Auto-wait up to 60 seconds
+        # Auto-wait up to 60 seconds; when tuning, every FloodWait is seen by the tuner
+        self._client.flood_sleep_threshold = 0 if self.tuner.auto else 60
+        # Client that history requests go through: the takeout client while one is open
+        self._history_client = self._client
+        # Reconnects Telethon made on its own, so watchers can fill the gap
+        self.reconnects = 0
+        self._count_reconnects()
+
+    def _count_reconnects(self) -> None:
+        """
+        Count Telethon's automatic reconnects in self.reconnects.
+
+        Telethon only tells its own update loop, through the sender's
+        reconnect callback, so that callback is wrapped. Polling
+        is_connected() alone misses drops shorter than the poll.
+        """
+        sender = getattr(self._client, '_sender', None)
+        callback = getattr(sender, '_auto_reconnect_callback', None)
+        if callback is None:
+            return
+
+        async def on_reconnect() -> None:
+            self.reconnects += 1
+            await callback()
+
+        sender._auto_reconnect_callback = on_reconnect
 
     async def connect(self) -> None:
-        """Connect to Telegram and authorize if needed."""
-        try:
-            await self._client.connect()
-            if not await self._client.is_user_authorized():
-                # Start interactive authorization
-                await self._client.start()
-        except AuthKeyUnregisteredError:
-            raise AuthError("Session expired. Please re-authenticate.")
-        except Exception as e:
-            raise NetworkError(f"Failed to connect: {e}")
+        """
+        Connect to Telegram and authorize if needed.
+
+        Transient failures (see src.retry) are retried with backoff.
+
+        Raises:
+            AuthError: If the session has expired
+            NetworkError: If connecting fails for good
+        """
+        delays = self.retry.delays()
+        while True:
+            try:
+                await self._client.connect()
+                if not await self._client.is_user_authorized():
+                    # Start interactive authorization
+                    await self._client.start()
+                if self.tuner.auto:
+                    me = await self._request(lambda: self._client.get_me(input_peer=True))
+                    self.tuner.load(str(me.user_id))
+                if self.takeout and self._takeout_stack is None and self.takeout_fallback is None:
+                    await self._start_takeout()
+                return
+            except AuthKeyUnregisteredError:
+                raise AuthError("Session expired. Please re-authenticate.")
+            except Exception as e:
+                delay = next(delays, None) if is_transient(e) else None
+                if delay is None:
+                    raise NetworkError(f"Failed to connect: {e}")
+                self.retries += 1
+                await asyncio.sleep(delay)
 
     async def disconnect(self) -> None:
-        """Disconnect from Telegram."""
+        """Disconnect from Telegram and save the user cache and learned fetch profile."""
+        self.users.save()
+        self.tuner.save()
+        await self._end_takeout()
         await self._client.disconnect()
 
+    async def _start_takeout(self) -> None:
+        """
+        Open a takeout session for channel and discussion group history.
+
+        Telegram may refuse it for a while (TakeoutInitDelayError, the user
+        has to confirm the export in another app first); history then goes
+        through the normal client and takeout_fallback says why.
+        """
+        stack = AsyncExitStack()
+        try:
+            self._history_client = await stack.enter_async_context(
+                self._client.takeout(finalize=True, channels=True, megagroups=True)
+            )
+        except TakeoutInitDelayError as e:
+            self.takeout_fallback = f"not granted yet, allowed in {e.seconds}s"
+        except RPCError as e:
+            self.takeout_fallback = f"not granted: {e}"
+        else:
+            self._takeout_stack = stack
+
+    async def _end_takeout(self, fallback: Optional[str] = None) -> None:
+        """Finish the takeout session, if open, and continue on the normal client."""
+        stack, self._takeout_stack = self._takeout_stack, None
+        self._history_client = self._client
+        if fallback is not None:
+            self.takeout_fallback = fallback
+        if stack is not None:
+            try:
+                await stack.aclose()
+            except RPCError:
+                # Already invalid on Telegram's side; nothing to finish
+                pass
+
     async def get_channel_info(self, channel_id: str) -> Channel:
         """
         Get channel information.
@@ -78,7 +427,7 @@ class TelegramClientWrapper:
         channel_id = channel_id.replace('https://t.me/', '').lstrip('@')
 
         try:
-            entity = await self._client.get_entity(channel_id)
+            entity = await self._request(lambda: self._client.get_entity(channel_id))
 
             if isinstance(entity, TelethonChannel):
                 return Channel(
@@ -98,7 +447,8 @@ class TelegramClientWrapper:
     async def get_posts(
         self,
         channel: Channel,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        min_id: int = 0
     ) -> AsyncIterator[Post]:
         """
         Get posts from a channel.
@@ -106,41 +456,20 @@ class TelegramClientWrapper:
         Args:
             channel: Channel to get posts from
             limit: Maximum number of posts to retrieve
+            min_id: Only posts with a greater ID (0 for all)
 
         Yields:
             Post objects
         """
-        try:
-            async for message in self._client.iter_messages(
-                channel.id,
-                limit=limit
-            ):
-                # Skip non-text messages or service messages
-                if message.text is None:
-                    text = ''
-                else:
-                    text = message.text
-
-                yield Post(
-                    id=message.id,
-                    text=text,
-                    date=message.date.replace(tzinfo=timezone.utc) if message.date else None,
-                    views=message.views,
-                    comments=[]
-                )
-
-        except FloodWaitError as e:
-            # This should be handled automatically by flood_sleep_threshold
-            # but we catch it just in case
-            await asyncio.sleep(e.seconds)
-            # Retry by calling ourselves again (simplified)
-            async for post in self.get_posts(channel, limit):
-                yield post
+        async for page in self._iter_pages(channel.id, limit=limit, min_id=min_id):
+            for message in page:
+                yield _to_post(message, self.text_mode)
 
     async def get_comments(
         self,
         channel: Channel,
-        post_id: int
+        post_id: int,
+        min_id: int = 0
     ) -> AsyncIterator[Comment]:
         """
         Get comments for a specific post.
@@ -148,52 +477,323 @@ class TelegramClientWrapper:
         Args:
             channel: Channel containing the post
             post_id: ID of the post to get comments for
+            min_id: Only comments with a greater ID (0 for all)
 
         Yields:
             Comment objects with author information
         """
+        async for page in self._iter_pages(channel.id, reply_to=post_id, min_id=min_id):
+            for comment in await self._hydrate(page):
+                yield comment
+
+    async def _iter_pages(
+        self,
+        entity,
+        limit: Optional[int] = None,
+        reply_to: Optional[int] = None,
+        min_id: int = 0,
+    ) -> AsyncIterator[list]:
+        """
+        Iterate history newest first, one request per page, as set by the fetch profile.
+
+        Pages are spaced by the profile's wait time and at most
+        max_in_flight page requests run at once across this client. A
+        FloodWait is recorded with the tuner, waited out and the same page
+        requested again. So is a transient failure, after a backoff delay
+        and a reconnect, so a dropped connection resumes at the page it
+        interrupted. If the takeout session stops being accepted, the page
+        is requested again on the normal client.
+
+        Args:
+            entity: Channel ID
+            limit: Maximum number of messages
+            reply_to: Iterate the comments of this post instead
+            min_id: Only messages with a greater ID
+
+        Yields:
+            Lists of Telethon messages
+
+        Raises:
+            NetworkError: If a page still fails after all retries
+        """
+        delays = self.retry.delays()
+        offset_id = 0
+        left = limit
+        first = True
+        page_started = None
+        while left is None or left > 0:
+            if page_started is None:
+                page_started = time.monotonic()
+            profile = self.tuner.profile
+            if not first and profile.wait_time:
+                await asyncio.sleep(profile.wait_time)
+            first = False
+            size = profile.page_size if left is None else min(profile.page_size, left)
+
+            async with self._slots:
+                await self._slots.wait_for(lambda: self._in_flight < self.tuner.profile.max_in_flight)
+                self._in_flight += 1
+            path = HISTORY_NORMAL if self._history_client is self._client else HISTORY_TAKEOUT
+            try:
+                started = time.monotonic()
+                page = [message async for message in self._history_client.iter_messages(
+                    entity,
+                    limit=size,
+                    offset_id=offset_id,
+                    reply_to=reply_to,
+                    min_id=min_id
+                )]
+                self.tuner.record_page(time.monotonic() - started)
+            except FloodWaitError as e:
+                self.tuner.record_flood(e.seconds)
+                await asyncio.sleep(e.seconds)
+                continue
+            except (TakeoutInvalidError, TakeoutRequiredError) as e:
+                if path == HISTORY_NORMAL:
+                    raise
+                await self._end_takeout(f"ended by Telegram: {e}")
+                continue
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                await self._backoff(e, delays)
+                continue
+            finally:
+                async with self._slots:
+                    self._in_flight -= 1
+                    self._slots.notify_all()
+
+            delays = self.retry.delays()
+            stats = self.history[path]
+            stats.messages += len(page)
+            stats.pages += 1
+            stats.seconds += time.monotonic() - page_started
+            page_started = None
+            if page:
+                yield page
+            if len(page) < size:
+                return
+            offset_id = page[-1].id
+            if left is not None:
+                left -= len(page)
+
+    async def _request(self, call):
+        """
+        Await call(), repeating it after transient failures.
+
+        A FloodWait is recorded with the tuner and waited out like in
+        _iter_pages; with auto tuning Telethon leaves every one to us.
+
+        Args:
+            call: Function returning a new awaitable request each time
+
+        Returns:
+            The request's result
+
+        Raises:
+            NetworkError: If it still fails after all retries
+        """
+        delays = self.retry.delays()
+        while True:
+            try:
+                return await call()
+            except FloodWaitError as e:
+                self.tuner.record_flood(e.seconds)
+                await asyncio.sleep(e.seconds)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                await self._backoff(e, delays)
+
+    async def _backoff(self, error: Exception, delays) -> None:
+        """Wait for the next retry and reconnect if needed; give up with NetworkError when none are left."""
+        delay = next(delays, None)
+        if delay is None:
+            raise NetworkError(f"Request failed after {self.retry.attempts} attempts: {error}") from error
+        self.retries += 1
+        await asyncio.sleep(delay)
+        if not self._client.is_connected():
+            try:
+                await self._client.connect()
+            except Exception as e:
+                # The retried request fails again and uses up the next attempt
+                if not is_transient(e):
+                    raise
+
+    async def _hydrate(self, messages: list) -> list[Comment]:
+        """
+        Convert a page of discussion messages to Comments.
+
+        Senders included with the page go into the user cache. Senders
+        missing from it are taken from the cache, and the rest are resolved
+        together in one request instead of one lookup each.
+        """
+        authors: dict[int, Author] = {}
+        missing: dict[int, object] = {}
+        for message in messages:
+            sender = message.sender
+            if isinstance(sender, User):
+                self.users.add(_to_author(sender))
+                continue
+            user_id = _sender_user_id(message)
+            if user_id is None or user_id in authors or user_id in missing:
+                continue
+            author = self.users.lookup(user_id)
+            if author is None:
+                missing[user_id] = message
+            else:
+                authors[user_id] = author
+
+        if missing:
+            authors.update(await self._resolve_users(missing))
+
+        comments = []
+        for message in messages:
+            user_id = None if isinstance(message.sender, User) else _sender_user_id(message)
+            comments.append(_to_comment(message, self.text_mode, authors.get(user_id)))
+        return comments
+
+    async def _resolve_users(self, missing: dict) -> dict[int, Author]:
+        """
+        Look up users in one request, referring to each through a message they sent.
+
+        Args:
+            missing: User id -> a discussion message sent by that user
+
+        Returns:
+            User id -> Author for the users Telegram returned
+
+        Raises:
+            NetworkError: If the lookup still fails transiently after all retries
+        """
+        peer = next(iter(missing.values())).peer_id
         try:
-            async for message in self._client.iter_messages(
-                channel.id,
-                reply_to=post_id
-            ):
-                # Extract author info
-                sender = message.sender
-                if isinstance(sender, User):
-                    author = Author(
-                        user_id=sender.id,
-                        username=sender.username,
-                        first_name=sender.first_name or '',
-                        last_name=sender.last_name
-                    )
-                else:
-                    # Anonymous or channel post
-                    author = Author(
-                        user_id=0,
-                        username=None,
-                        first_name='Anonymous',
-                        last_name=None
-                    )
-
-                yield Comment(
-                    id=message.id,
-                    text=message.text or '',
-                    date=message.date.replace(tzinfo=timezone.utc) if message.date else None,
-                    author=author
-                )
+            chat = await self._request(lambda: self._client.get_input_entity(peer))
+            users = await self._request(lambda: self._client(GetUsersRequest([
+                InputUserFromMessage(chat, message.id, user_id) for user_id, message in missing.items()
+            ])))
+        except (RPCError, ValueError):
+            # Refused for good (_request retries transient errors): leave
+            # them anonymous rather than failing the whole page
+            return {}
 
-        except FloodWaitError as e:
-            await asyncio.sleep(e.seconds)
-            async for comment in self.get_comments(channel, post_id):
-                yield comment
+        self.users.requests += 1
+        resolved = {}
+        for user in users:
+            if isinstance(user, User):
+                author = resolved[user.id] = _to_author(user)
+                self.users.add(author)
+        self.users.resolved += len(resolved)
+        return resolved
 
+    async def iter_updates(self, channel: Channel) -> AsyncIterator[Update]:
+        """
+        Stream new posts and comments as they arrive.
+
+        Subscribes to new-message events of the channel and its linked
+        discussion group. Comments are matched to channel posts through the
+        discussion group's automatic forward of each post. Telethon
+        reconnects by itself; an UPDATE_RECONNECT update is yielded after
+        every reconnect, however short the drop, since events may have
+        been missed.
+
+        Args:
+            channel: Channel to watch
 
-def create_client() -> TelegramClientWrapper:
+        Yields:
+            Update objects
+
+        Raises:
+            NetworkError: If a request still fails after all retries
+        """
+        full = await self._request(lambda: self._client(GetFullChannelRequest(channel.id)))
+        discussion_id = full.full_chat.linked_chat_id
+        chats = [PeerChannel(channel.id)]
+        if discussion_id:
+            chats.append(PeerChannel(discussion_id))
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_message(event) -> None:
+            queue.put_nowait(event.message)
+
+        event_filter = events.NewMessage(chats=chats)
+        self._client.add_event_handler(on_message, event_filter)
+        # Discussion message id of each post's forward -> channel post id
+        roots: dict[int, int] = {}
+        connected = True
+        reconnects = self.reconnects
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), CONNECTION_CHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    message = None
+                # Checked on every message too: drops happen while messages
+                # keep arriving, and a short one is only seen in the counter
+                is_connected = self._client.is_connected()
+                if is_connected and (not connected or self.reconnects != reconnects):
+                    reconnects = self.reconnects
+                    yield Update(UPDATE_RECONNECT)
+                connected = is_connected
+                if message is None:
+                    continue
+
+                peer = getattr(message.peer_id, 'channel_id', None)
+                if peer == channel.id:
+                    yield Update(UPDATE_POST, message.id, post=_to_post(message, self.text_mode))
+                    continue
+
+                forward = message.fwd_from
+                if forward is not None and forward.saved_from_msg_id:
+                    roots[message.id] = forward.saved_from_msg_id
+                    continue
+
+                header = message.reply_to
+                if header is None:
+                    continue
+                root = header.reply_to_top_id or header.reply_to_msg_id
+                if root not in roots:
+                    original = await self._request(lambda: self._client.get_messages(discussion_id, ids=root))
+                    if original is None or original.fwd_from is None or not original.fwd_from.saved_from_msg_id:
+                        continue
+                    roots[root] = original.fwd_from.saved_from_msg_id
+                comment = (await self._hydrate([message]))[0]
+                yield Update(UPDATE_COMMENT, roots[root], comment=comment)
+
+        finally:
+            self._client.remove_event_handler(on_message, event_filter)
+
+
+def create_client(
+    session_name: str = SESSION_NAME,
+    text_mode: str = TEXT_MODE_MARKDOWN,
+    user_cache_path: Optional[Path] = None,
+    fetch_profile: str = 'default',
+    takeout: bool = False,
+) -> TelegramClientWrapper:
     """
     Create a TelegramClientWrapper with config from .env.
 
+    Args:
+        session_name: Session file name in SESSION_DIR
+        text_mode: How message text is stored (one of TEXT_MODES)
+        user_cache_path: Keep the comment author cache in this file
+            (default: in memory for this run only)
+        fetch_profile: Name in FETCH_PROFILES, or AUTO_PROFILE to start from
+            the account's learned profile and keep tuning it
+        takeout: Fetch history through a takeout session when granted
+
     Returns:
         Configured TelegramClientWrapper instance
     """
     config = load_config()
-    return TelegramClientWrapper(config['api_id'], config['api_hash'])
+    if fetch_profile == AUTO_PROFILE:
+        tuner = FetchTuner(auto=True, path=PROFILES_PATH)
+    else:
+        tuner = FetchTuner(FETCH_PROFILES[fetch_profile])
+    return TelegramClientWrapper(
+        config['api_id'], config['api_hash'], session_name, text_mode, UserCache(user_cache_path), tuner,
+        takeout=takeout
+    )
@@ -1,9 +1,16 @@
 """Utility functions for the channel loader."""
+import fcntl
 import json
 import os
+import re
 import sys
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+
+# Words are runs of letters/digits in any script; case is folded
+TOKEN_RE = re.compile(r'\w+')
 
 
 def ensure_dir(path: str) -> None:
@@ -16,6 +23,43 @@ def ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
 
+def replace_file(path: Path, data: bytes) -> None:
+    """
+    Write a file via a temporary file and rename.
+
+    Readers never see a half-written file, and replacing instead of
+    truncating keeps readers that still have the old file mapped working.
+
+    Args:
+        path: File to write
+        data: New contents
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock on a file for the duration of a with block.
+
+    Writers take the lock exclusively and readers shared, so processes
+    updating the same store take turns instead of overwriting each other.
+
+    Args:
+        path: Lock file (created if missing)
+        shared: Take a shared (read) lock instead of an exclusive one
+    """
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
 def format_error(error_type: str, message: str, suggestion: Optional[str] = None) -> str:
     """
     Format an error message for display.
@@ -49,6 +93,58 @@ def save_to_json(data: dict, path: str) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def find_exports(directory: Path, channels: Optional[list[str]] = None) -> list[Path]:
+    """
+    List channel export files.
+
+    Args:
+        directory: Directory with exported JSON files
+        channels: Optional channel names to restrict to (with or without @)
+
+    Returns:
+        Sorted list of export paths
+    """
+    directory = Path(directory)
+    if channels:
+        names = [c.replace('https://t.me/', '').lstrip('@') for c in channels]
+        paths = [directory / f"{name}.json" for name in names]
+        return sorted(p for p in paths if p.exists())
+    return sorted(directory.glob('*.json'))
+
+
+def iter_post_records(paths: Iterable[Path]) -> Iterator[tuple[dict, dict]]:
+    """
+    Stream posts from exports, holding one export in memory at a time.
+
+    Args:
+        paths: Export files to read
+
+    Yields:
+        (channel, post) dicts as stored in the export
+    """
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        channel = data['channel']
+        for post in channel['posts']:
+            yield channel, post
+
+
+def iter_comment_records(paths: Iterable[Path]) -> Iterator[tuple[dict, dict, dict]]:
+    """
+    Stream comments from exports, holding one export in memory at a time.
+
+    Args:
+        paths: Export files to read
+
+    Yields:
+        (channel, post, comment) dicts as stored in the export
+    """
+    for channel, post in iter_post_records(paths):
+        for comment in post['comments']:
+            yield channel, post, comment
+
+
 def print_progress(message: str, end: str = '\n') -> None:
     """
     Print a progress message to stdout.
@@ -68,3 +164,16 @@ def print_error(message: str) -> None:
         message: Error message to print
     """
     print(message, file=sys.stderr)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lower-cased word tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens in order of appearance
+    """
+    return TOKEN_RE.findall(text.casefold())
@@ -0,0 +1,288 @@
+"""Live watch mode: keep a channel export current from update events."""
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.activity import ActivityMatrix
+from src.aggregates import AuthorAggregates
+from src.author_index import AuthorIndex
+from src.models import Comment, OutputFile, Post
+from src.search_index import SearchIndex
+from src.telegram_client import (
+    UPDATE_COMMENT,
+    UPDATE_POST,
+    UPDATE_RECONNECT,
+    TelegramClientWrapper,
+)
+from src.encoder import save_export
+from src.utils import print_progress
+
+
+# Flush after this many new posts/comments, or this long after the first
+# unsaved change, whichever comes first
+WATCH_BATCH_SIZE = 100
+WATCH_FLUSH_SECONDS = 10.0
+
+# After a reconnect, comments of posts younger than this are checked for gaps
+GAP_FILL_DAYS = 7
+
+# Queued by the update pump when the update stream ends
+_END = object()
+
+
+class LiveExport:
+    """
+    In-memory export that new posts and comments are merged into.
+
+    Posts and comments stay ordered newest first, as in a fresh export.
+    Already known ids are ignored, so events and gap-fill results may
+    overlap.
+    """
+
+    def __init__(self, output: OutputFile):
+        self.output = output
+        self.posts = {post.id: post for post in output.channel.posts}
+        self.comment_ids = {
+            post.id: {comment.id for comment in post.comments} for post in output.channel.posts
+        }
+        # Posts with comments not yet passed to the stores
+        self.new_comments: dict[int, list[Comment]] = {}
+
+    def newest_post_id(self) -> int:
+        """Return the highest known post id (0 if none)."""
+        return max(self.posts, default=0)
+
+    def newest_comment_id(self, post_id: int) -> int:
+        """Return the highest known comment id of a post (0 if none)."""
+        return max(self.comment_ids.get(post_id, ()), default=0)
+
+    def add_post(self, post: Post) -> bool:
+        """
+        Add a post with its comments.
+
+        Returns:
+            True if the post was new
+        """
+        if post.id in self.posts:
+            return False
+        self.posts[post.id] = post
+        self.comment_ids[post.id] = {comment.id for comment in post.comments}
+        if post.comments:
+            self.new_comments.setdefault(post.id, []).extend(post.comments)
+        posts = self.output.channel.posts
+        posts.append(post)
+        if len(posts) > 1 and posts[-2].id < post.id:
+            posts.sort(key=lambda p: p.id, reverse=True)
+        return True
+
+    def add_comment(self, post_id: int, comment: Comment) -> bool:
+        """
+        Add a comment to a known post.
+
+        Returns:
+            True if the comment was new and its post is in the export
+        """
+        post = self.posts.get(post_id)
+        if post is None or comment.id in self.comment_ids[post_id]:
+            return False
+        self.comment_ids[post_id].add(comment.id)
+        self.new_comments.setdefault(post_id, []).append(comment)
+        post.comments.insert(0, comment)
+        if len(post.comments) > 1 and post.comments[1].id > comment.id:
+            post.comments.sort(key=lambda c: c.id, reverse=True)
+        return True
+
+
+async def gap_fill(
+    client: TelegramClientWrapper,
+    export: LiveExport,
+    gap_days: int = GAP_FILL_DAYS,
+) -> int:
+    """
+    Fetch what was published while no events were received.
+
+    Loads posts newer than the newest known one with all their comments,
+    and comments newer than the newest known one for recent posts.
+
+    Args:
+        client: Telegram client wrapper
+        export: Export to merge into
+        gap_days: Age in days of posts whose comments are checked
+
+    Returns:
+        Number of posts and comments added
+    """
+    channel = export.output.channel
+    since = datetime.now(timezone.utc) - timedelta(days=gap_days)
+    recent = [post for post in export.posts.values() if post.date is not None and post.date >= since]
+    added = 0
+
+    async for post in client.get_posts(channel, min_id=export.newest_post_id()):
+        comments = []
+        async for comment in client.get_comments(channel, post.id):
+            comments.append(comment)
+        post.comments = comments
+        if export.add_post(post):
+            added += 1 + len(post.comments)
+
+    for post in recent:
+        async for comment in client.get_comments(channel, post.id, min_id=export.newest_comment_id(post.id)):
+            added += export.add_comment(post.id, comment)
+
+    return added
+
+
+def flush(
+    export: LiveExport,
+    output_path: str,
+    index: Optional[SearchIndex] = None,
+    aggregates: Optional[AuthorAggregates] = None,
+    authors: Optional[AuthorIndex] = None,
+    activity: Optional[ActivityMatrix] = None,
+) -> None:
+    """
+    Save the export and update the stores with the changes since the last flush.
+
+    The stores get only the comments added since then, so their work
+    follows the changes rather than the size of the channel.
+
+    Args:
+        export: Export to save
+        output_path: Path to save JSON output
+        index: Search index to update
+        aggregates: Per-author aggregates to update with the new comments
+        authors: Cross-channel author index to update
+        activity: Activity matrix to update
+    """
+    output = export.output
+    channel = output.channel
+    output.exported_at = datetime.now(timezone.utc)
+    output.posts_count = len(channel.posts)
+    output.comments_count = sum(len(post.comments) for post in channel.posts)
+
+    save_export(output, output_path)
+
+    new_comments = {
+        post_id: sorted(comments, key=lambda c: c.id, reverse=True)
+        for post_id, comments in export.new_comments.items()
+    }
+    export.new_comments.clear()
+    if aggregates is not None:
+        for post_id, comments in new_comments.items():
+            aggregates.add_comments(channel, export.posts[post_id], comments)
+    if not new_comments or (index is None and authors is None and activity is None):
+        return
+    data = {'channel': {
+        'id': channel.id,
+        'username': channel.username,
+        'title': channel.title,
+        'posts': [
+            replace(export.posts[post_id], comments=comments).to_dict()
+            for post_id, comments in new_comments.items()
+        ],
+    }}
+    if index is not None:
+        index.add_export(data)
+    if authors is not None:
+        authors.add_export(data, merge=True)
+    if activity is not None:
+        activity.add_export(data, merge=True)
+
+
+async def watch_channel(
+    client: TelegramClientWrapper,
+    output: OutputFile,
+    output_path: str,
+    batch_size: int = WATCH_BATCH_SIZE,
+    flush_seconds: float = WATCH_FLUSH_SECONDS,
+    gap_days: int = GAP_FILL_DAYS,
+    index: Optional[SearchIndex] = None,
+    aggregates: Optional[AuthorAggregates] = None,
+    authors: Optional[AuthorIndex] = None,
+    activity: Optional[ActivityMatrix] = None,
+) -> OutputFile:
+    """
+    Keep an export current until the update stream ends or the task is cancelled.
+
+    Starts with a gap fill covering the time since the export was made,
+    then applies update events, saving in batches. Each reconnect triggers
+    another gap fill. Pending changes are saved on exit.
+
+    Args:
+        client: Telegram client wrapper
+        output: Existing export of the channel
+        output_path: Path to save JSON output
+        batch_size: Save after this many new posts and comments
+        flush_seconds: Save at most this long after the first unsaved change
+        gap_days: Age in days of posts whose comments are checked after a reconnect
+        index: Search index to update on every save
+        aggregates: Per-author aggregates to update on every save
+        authors: Cross-channel author index to update on every save
+        activity: Activity matrix to update on every save
+
+    Returns:
+        The updated OutputFile
+
+    Raises:
+        Whatever ended the update stream with an error, after saving
+    """
+    export = LiveExport(output)
+    stores = {'index': index, 'aggregates': aggregates, 'authors': authors, 'activity': activity}
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> None:
+        # Feed updates through a queue, so waiting for the next one can time
+        # out without cancelling the update stream itself
+        try:
+            async for update in client.iter_updates(output.channel):
+                await queue.put(update)
+        finally:
+            await queue.put(_END)
+
+    pending = await gap_fill(client, export, gap_days)
+    if pending:
+        print_progress(f"Caught up: {pending} new posts and comments")
+        flush(export, output_path, **stores)
+    pending = 0
+    deadline = None
+
+    print_progress(f"Watching @{output.channel.username} for new posts and comments...")
+    pump_task = asyncio.create_task(pump())
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                update = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                update = None
+            if update is _END:
+                # Raises what ended the stream, e.g. NetworkError or an expired session
+                await pump_task
+                break
+
+            if update is not None:
+                if update.kind == UPDATE_POST:
+                    pending += export.add_post(update.post)
+                elif update.kind == UPDATE_COMMENT:
+                    pending += export.add_comment(update.post_id, update.comment)
+                elif update.kind == UPDATE_RECONNECT:
+                    print_progress("Reconnected, fetching missed messages")
+                    pending += await gap_fill(client, export, gap_days)
+
+            if pending and deadline is None:
+                deadline = loop.time() + flush_seconds
+            if pending and (pending >= batch_size or loop.time() >= deadline):
+                flush(export, output_path, **stores)
+                print_progress(f"  Saved {pending} new posts and comments")
+                pending = 0
+                deadline = None
+
+    finally:
+        pump_task.cancel()
+        if pending:
+            flush(export, output_path, **stores)
+            print_progress(f"  Saved {pending} new posts and comments")
+
+    return export.output
@@ -0,0 +1,77 @@
+"""Export builders for testing."""
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.models import Channel, OutputFile, Post
+
+
+EXPORTED_AT = datetime(2026, 3, 1, tzinfo=timezone.utc)
+POST_DATE = '2026-02-01T10:00:00+00:00'
+COMMENT_DATE = '2026-02-01T11:00:00+00:00'
+
+CHANNEL = {'id': 1, 'username': 'c', 'title': 'C'}
+
+
+def make_output(
+    posts: list[Post],
+    channel_id: int = 1,
+    username: str = 'c',
+    title: Optional[str] = None,
+    status: str = 'complete',
+    exported_at: datetime = EXPORTED_AT
+) -> OutputFile:
+    """Create an export of the given posts, as the loader returns it."""
+    return OutputFile(
+        version='1.0',
+        status=status,
+        exported_at=exported_at,
+        posts_count=len(posts),
+        comments_count=sum(len(p.comments) for p in posts),
+        channel=Channel(id=channel_id, username=username, title=title or username, posts=posts),
+    )
+
+
+def make_comment(
+    comment_id: int,
+    user_id: int,
+    text: str = 'x',
+    date: str = COMMENT_DATE,
+    username: Optional[str] = None,
+    reply_to: Optional[int] = None
+) -> dict:
+    """Build a comment dict as it appears in a JSON export."""
+    return {
+        'id': comment_id,
+        'text': text,
+        'date': date,
+        'reply_to': reply_to,
+        'author': {'user_id': user_id, 'username': username, 'first_name': 'U', 'last_name': None},
+    }
+
+
+def make_post(post_id: int, comments: list[dict], text: str = 'P', date: str = POST_DATE) -> dict:
+    """Build a post dict with the given comment dicts."""
+    return {'id': post_id, 'text': text, 'date': date, 'views': 1, 'comments': comments}
+
+
+def make_export(channel_id: int, username: str, comments: list[dict], title: Optional[str] = None) -> dict:
+    """Build an export dict of one channel with the given comment dicts on a single post."""
+    return {
+        'version': '1.0',
+        'status': 'complete',
+        'exported_at': EXPORTED_AT.isoformat(),
+        'posts_count': 1,
+        'comments_count': len(comments),
+        'channel': {
+            'id': channel_id,
+            'username': username,
+            'title': title or username,
+            'posts': [make_post(1, comments)],
+        },
+    }
+
+
+def make_records(comments: list[tuple[int, str]]) -> list[tuple[dict, dict, dict]]:
+    """Build (channel, post, comment) records from (user_id, text) pairs."""
+    post = make_post(1, [])
+    return [(CHANNEL, post, make_comment(i, user_id, text)) for i, (user_id, text) in enumerate(comments, 1)]
@@ -30,15 +30,22 @@ class MockMessage:
         date: Optional[datetime] = None,
         views: Optional[int] = None,
         sender: Optional[MockUser] = None,
-        reply_to: Optional[int] = None
+        reply_to: Optional[int] = None,
+        reply_to_top: Optional[int] = None,
+        replies: Optional[int] = None,
+        entities: Optional[list] = None
     ):
         self.id = id
         self.text = text
+        self.raw_text = text
+        self.entities = entities
         self.date = date or datetime.now(timezone.utc)
         self.views = views
         self.sender = sender
         self.reply_to = MagicMock()
         self.reply_to.reply_to_msg_id = reply_to
+        self.reply_to.reply_to_top_id = reply_to_top
+        self.replies = MagicMock(replies=replies) if replies is not None else None
 
 
 class MockChannel:
@@ -85,15 +92,19 @@ def create_mock_telegram_client(
     client.get_entity = AsyncMock(return_value=channel)
 
     # Mock iter_messages for posts
-    async def mock_iter_messages(entity, limit=None, reply_to=None):
+    async def mock_iter_messages(entity, limit=None, reply_to=None, min_id=0, offset_id=0):
         if reply_to is not None:
             # Return comments for specific post
-            for comment in comments.get(reply_to, []):
-                yield comment
+            messages = comments.get(reply_to, [])
         else:
             # Return posts
-            for post in posts[:limit] if limit else posts:
-                yield post
+            messages = posts
+        # offset_id continues after the previous page (messages must be newest first then)
+        if offset_id:
+            messages = messages[[m.id for m in messages].index(offset_id) + 1:]
+        for message in messages[:limit] if limit else messages:
+            if message.id > min_id:
+                yield message
 
     client.iter_messages = mock_iter_messages
 
@@ -108,6 +119,52 @@ def create_mock_telegram_client(
     return client
 
 
+class MockTakeout:
+    """
+    Mock of TelegramClient.takeout(): an async context manager.
+
+    When granted, entering it returns a takeout client sharing the mock
+    client's history; otherwise entering raises TakeoutInitDelayError.
+    """
+
+    def __init__(self, client, granted: bool = True, delay: int = 3600):
+        self.client = client
+        self.granted = granted
+        self.delay = delay
+        self.entered = False
+        self.exited = False
+        self.takeout_client = MagicMock()
+        self.takeout_client.iter_messages = client.iter_messages
+
+    async def __aenter__(self):
+        from telethon.errors import TakeoutInitDelayError
+
+        if not self.granted:
+            raise TakeoutInitDelayError(request=None, capture=self.delay)
+        self.entered = True
+        return self.takeout_client
+
+    async def __aexit__(self, *exc_info):
+        self.exited = True
+        return False
+
+
+def add_mock_takeout(client, granted: bool = True) -> MockTakeout:
+    """
+    Let a mock client open takeout sessions.
+
+    Args:
+        client: Mock client from create_mock_telegram_client
+        granted: Whether Telegram grants the takeout session
+
+    Returns:
+        The MockTakeout that client.takeout() returns
+    """
+    takeout = MockTakeout(client, granted)
+    client.takeout = MagicMock(return_value=takeout)
+    return takeout
+
+
 def create_sample_data():
     """
     Create sample test data for a channel.
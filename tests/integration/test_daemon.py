@@ -0,0 +1,162 @@
+"""Integration tests for the loader daemon."""
+import asyncio
+import json
+import tempfile
+import pytest
+from pathlib import Path
+
+from tests.fixtures.exports import make_comment, make_export
+from tests.integration.test_loader import MockTelegramClientWrapper, create_sample_data
+
+
+async def start_daemon(tmpdir: str, client=None, stores=None):
+    """Start a LoaderDaemon on a socket in tmpdir and return it with its serving task."""
+    from src.daemon import LoaderDaemon
+
+    if client is None:
+        client = MockTelegramClientWrapper(*create_sample_data())
+    daemon = LoaderDaemon(client, Path(tmpdir) / 'loader.sock', output_dir=Path(tmpdir), stores=stores)
+    task = asyncio.create_task(daemon.serve())
+    while not daemon.socket_path.exists():
+        await asyncio.sleep(0.01)
+    return daemon, task
+
+
+class TestLoaderDaemon:
+    """Tests for LoaderDaemon and the request client."""
+
+    @pytest.mark.asyncio
+    async def test_load_streams_progress_and_result(self):
+        """A load job streams progress and ends with the saved export."""
+        from src.daemon import request
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            daemon, task = await start_daemon(tmpdir)
+            events = []
+            final = await request({'op': 'load', 'channel': '@sample_channel'}, daemon.socket_path, events.append)
+
+            assert final['event'] == 'done' and final['status'] == 'complete'
+            assert (final['posts'], final['comments']) == (2, 3)
+            assert events[0]['event'] == 'queued'
+            assert any(e['event'] == 'progress' and e['message'].startswith('Loading channel') for e in events)
+            with open(final['output_path'], 'r') as f:
+                assert json.load(f)['posts_count'] == 2
+
+            # Without --force or --refresh the existing export is kept
+            again = await request({'op': 'load', 'channel': '@sample_channel'}, daemon.socket_path)
+            assert again['event'] == 'error' and 'already exists' in again['message']
+            refreshed = await request({'op': 'load', 'channel': '@sample_channel', 'refresh': True}, daemon.socket_path)
+            assert refreshed['event'] == 'done'
+
+            status = await request({'op': 'status'}, daemon.socket_path)
+            assert (status['completed'], status['failed'], status['queued']) == (2, 1, [])
+
+            assert (await request({'op': 'stop'}, daemon.socket_path))['event'] == 'stopping'
+            await task
+            assert not daemon.socket_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_identical_waiting_jobs_are_merged(self):
+        """Submitting a channel that is already waiting joins that job."""
+        from src.daemon import request
+
+        class SlowClient(MockTelegramClientWrapper):
+            async def get_channel_info(self, channel_id):
+                self.calls = getattr(self, 'calls', 0) + 1
+                await asyncio.sleep(0.05)
+                return self.channel
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            client = SlowClient(*create_sample_data())
+            daemon, task = await start_daemon(tmpdir, client)
+            first = {'op': 'load', 'channel': '@first', 'force': True}
+            second = {'op': 'load', 'channel': '@sample_channel', 'force': True}
+            results = await asyncio.gather(
+                request(first, daemon.socket_path),
+                request(second, daemon.socket_path),
+                request(second, daemon.socket_path),
+            )
+            daemon.stop()
+            await task
+
+        assert [r['event'] for r in results] == ['done', 'done', 'done']
+        assert results[1]['job'] == results[2]['job']
+        assert client.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_bad_request(self):
+        """Malformed requests get an error instead of a queued job."""
+        from src.daemon import request
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            daemon, task = await start_daemon(tmpdir)
+            missing = await request({'op': 'load'}, daemon.socket_path)
+            unknown = await request({'op': 'load', 'channel': '@x', 'bogus': 1}, daemon.socket_path)
+            internal = await request({'op': 'load', 'channel': '@x', 'subscribers': [], 'queued_at': 0},
+                                     daemon.socket_path)
+            wrong_type = await request({'op': 'load', 'channel': '@x', 'limit': '10'}, daemon.socket_path)
+            status = await request({'op': 'status'}, daemon.socket_path)
+            daemon.stop()
+            await task
+
+        assert {missing['error'], unknown['error'], internal['error'], wrong_type['error']} == {'RequestError'}
+        assert internal['message'] == 'Unknown options: queued_at, subscribers'
+        assert (status['queued'], status['failed']) == ([], 0)
+
+    @pytest.mark.asyncio
+    async def test_sharded_job_with_snapshot(self):
+        """Jobs can save monthly shards and add a snapshot."""
+        from unittest.mock import patch
+        from src.daemon import request
+        from src.snapshots import SnapshotStore
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_path = Path(tmpdir) / 'snapshots.sqlite'
+            with patch('src.loader.SNAPSHOTS_PATH', store_path):
+                daemon, task = await start_daemon(tmpdir)
+                job = {'op': 'load', 'channel': '@sample_channel', 'sharded': True, 'snapshot': True}
+                events = []
+                final = await request(job, daemon.socket_path, events.append)
+                again = await request(job, daemon.socket_path)
+                daemon.stop()
+                await task
+
+            assert final['event'] == 'done'
+            assert final['output_path'].endswith('sample_channel.shards')
+            assert Path(final['output_path'], 'manifest.json').exists()
+            assert any(e['event'] == 'progress' and e['message'].startswith('Snapshot 1') for e in events)
+            assert again['event'] == 'error' and 'already exists' in again['message']
+            store = SnapshotStore(store_path)
+            assert len(store.list_snapshots('sample_channel')) == 1
+            store.close()
+
+    @pytest.mark.asyncio
+    async def test_jobs_keep_other_writers_updates(self):
+        """Stores written by other processes while the daemon runs are not overwritten."""
+        from src.activity import ActivityMatrix
+        from src.daemon import request
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            matrix_path = Path(tmpdir) / 'activity'
+            matrix = ActivityMatrix(matrix_path)
+            daemon, task = await start_daemon(tmpdir, stores={'activity': matrix})
+            ActivityMatrix(matrix_path).add_export(
+                make_export(2, 'other', [make_comment(1, 555, date='2026-02-02T10:00:00+00:00')])
+            )
+            final = await request({'op': 'load', 'channel': '@sample_channel'}, daemon.socket_path)
+            daemon.stop()
+            await task
+
+            assert final['event'] == 'done'
+            reopened = ActivityMatrix(matrix_path)
+            assert reopened.activity(555) == {'other': 1}
+            assert len(reopened.meta['channels']) == 2
+
+    @pytest.mark.asyncio
+    async def test_no_daemon(self):
+        """The client reports a missing daemon as a connection error."""
+        from src.daemon import request
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with pytest.raises(ConnectionError):
+                await request({'op': 'status'}, Path(tmpdir) / 'loader.sock')
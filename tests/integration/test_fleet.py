@@ -0,0 +1,142 @@
+"""Integration tests for the multi-process fleet loader."""
+import json
+import os
+import tempfile
+from pathlib import Path
+import pytest
+
+from src.errors import AccessError
+from src.fetch_tuning import FetchTuner
+from src.models import Channel
+from tests.integration.test_loader import MockTelegramClientWrapper, create_sample_data
+
+
+class MockFleetClient(MockTelegramClientWrapper):
+    """Mock client serving the sample posts for any channel name."""
+
+    def __init__(self, session: str):
+        channel, posts = create_sample_data()
+        super().__init__(channel, posts)
+        self.session = session
+        self.tuner = FetchTuner(auto=True, path=Path('unused.json'))
+
+    async def connect(self):
+        # Sessions s1 and s2 are the same account; s2 hits a FloodWait
+        self.tuner.load('s3' if self.session == 's3' else 's1')
+        if self.session == 's2':
+            self.tuner.record_flood(1)
+
+    async def get_channel_info(self, channel_id: str) -> Channel:
+        name = channel_id.replace('https://t.me/', '').lstrip('@')
+        if name == 'private':
+            raise AccessError(name, 'Channel is private')
+        if name == 'broken':
+            raise RuntimeError('unexpected')
+        return Channel(id=len(name), username=name, title=name.upper(), posts=[])
+
+
+def make_client(session: str) -> MockFleetClient:
+    """Client factory; module level so worker processes can unpickle it."""
+    return MockFleetClient(session)
+
+
+class TestPlanJobs:
+    """Tests for plan_jobs."""
+
+    def test_duplicates_share_one_output(self):
+        """Spellings of the same channel map to a single job."""
+        from src.fleet import plan_jobs
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Path(tmpdir, 'big.json').write_text('x' * 100)
+            jobs = plan_jobs(['@a', 'https://t.me/A', 'b', '@big'], Path(tmpdir))
+            assert [channel for channel, _ in jobs] == ['@big', '@a', 'b']
+            paths = [path for _, path in jobs]
+            assert len(set(paths)) == len(paths)
+
+
+class TestRunFleet:
+    """Tests for run_fleet with worker processes."""
+
+    def test_channels_loaded_once(self):
+        """Every channel is loaded by exactly one worker and errors are reported."""
+        from src.fleet import build_report, run_fleet
+
+        channels = [f'@c{i}' for i in range(7)] + ['@private', '@broken', '@C0']
+        with tempfile.TemporaryDirectory() as tmpdir:
+            reports = run_fleet(channels, ['s1', 's2', 's3'], Path(tmpdir), client_factory=make_client, per_worker=2)
+            report = build_report(reports)
+
+            assert [r['session'] for r in report['workers']] == ['s1', 's2', 's3']
+            assert report['channels'] == 9
+            assert report['failed'] == 2
+            assert [r['error'] for r in report['workers']] == [None, None, None]
+            assert 'RuntimeError: unexpected' in [r['error'] for r in report['results']]
+            assert report['duplicate_outputs'] == []
+            assert report['posts'] == 14
+            assert report['comments'] == 21
+            loaded = sorted(r['channel'] for r in report['results'] if not r['error'])
+            assert loaded == [f'@c{i}' for i in range(7)]
+            assert sorted(f for f in os.listdir(tmpdir) if f.endswith('.json')) == [f'c{i}.json' for i in range(7)]
+
+            with open(os.path.join(tmpdir, 'c3.json'), 'r', encoding='utf-8') as f:
+                assert json.load(f)['channel']['username'] == 'c3'
+
+    def test_fetch_profiles_saved_by_parent(self):
+        """Profiles learned by the workers are merged into one file by the parent."""
+        from src.fetch_tuning import FETCH_PROFILES
+        from src.fleet import run_fleet, save_fetch_profiles
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            reports = run_fleet(['@a', '@b'], ['s1', 's2', 's3'], Path(tmpdir), client_factory=make_client)
+            assert not Path('unused.json').exists()
+            path = Path(tmpdir) / 'profiles.json'
+            path.write_text(json.dumps({'other': {'page_size': 20}}))
+            save_fetch_profiles(reports, path)
+            profiles = json.loads(path.read_text())
+
+        assert sorted(profiles) == ['other', 's1', 's3']
+        assert profiles['s1']['wait_time'] == 0.5
+        assert profiles['s3'] == FETCH_PROFILES['default'].to_dict()
+
+
+class TestInterruptedWorker:
+    """Tests for loads cut short when a sibling loop fails authorization."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_loads_are_not_indexed(self):
+        """Loads cancelled by a sibling's AuthError are reported and skipped by update_stores."""
+        import asyncio
+        from unittest.mock import patch
+        from src.errors import AuthError
+        from src.fleet import WorkerReport, _run_worker, update_stores
+
+        class RevokedClient(MockFleetClient):
+            async def get_channel_info(self, channel_id):
+                if channel_id == '@revoked':
+                    await asyncio.sleep(0.01)
+                    raise AuthError('Session revoked')
+                return await super().get_channel_info(channel_id)
+
+            async def get_comments(self, channel, post_id, min_id=0):
+                await asyncio.sleep(1)
+                async for comment in super().get_comments(channel, post_id, min_id):
+                    yield comment
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            jobs = [('@slow', os.path.join(tmpdir, 'slow.json')), ('@revoked', os.path.join(tmpdir, 'revoked.json'))]
+            claimed = iter(range(len(jobs) + 2))
+            report = WorkerReport(1, 's1')
+            with pytest.raises(AuthError):
+                await _run_worker(report, jobs, lambda: next(claimed), RevokedClient, 2, None, False, 1)
+            report.error = 'Session revoked'
+
+            assert [(r.channel, r.error) for r in report.results] == [('@slow', 'interrupted'), ('@revoked', 'Session revoked')]
+            stores = Path(tmpdir) / 'stores'
+            with patch('src.fleet.INDEX_PATH', stores / 'index.sqlite'), \
+                    patch('src.fleet.AGGREGATES_PATH', stores / 'aggregates.sqlite'), \
+                    patch('src.fleet.AUTHOR_INDEX_PATH', stores / 'authors.sqlite'), \
+                    patch('src.fleet.ACTIVITY_PATH', stores / 'activity'):
+                stores.mkdir()
+                update_stores([report])
+
@@ -1,4 +1,5 @@
 """Integration tests for the channel loader."""
+import asyncio
 import json
 import os
 import tempfile
@@ -6,7 +7,8 @@ import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import datetime, timezone
 
-from src.models import Author, Comment, Post, Channel
+from src.fetch_tuning import FetchProfile, FetchTuner
+from src.models import Author, Comment, OutputFile, Post, Channel
 
 
 class MockTelegramClientWrapper:
@@ -15,6 +17,8 @@ class MockTelegramClientWrapper:
     def __init__(self, channel: Channel, posts: list[Post]):
         self.channel = channel
         self.posts = posts
+        self.comment_requests = []
+        self.tuner = FetchTuner()
 
     async def connect(self):
         pass
@@ -25,15 +29,18 @@ class MockTelegramClientWrapper:
     async def get_channel_info(self, channel_id: str) -> Channel:
         return self.channel
 
-    async def get_posts(self, channel: Channel, limit=None):
+    async def get_posts(self, channel: Channel, limit=None, min_id=0):
         for post in self.posts[:limit] if limit else self.posts:
-            yield post
+            if post.id > min_id:
+                yield post
 
-    async def get_comments(self, channel: Channel, post_id: int):
+    async def get_comments(self, channel: Channel, post_id: int, min_id: int = 0):
+        self.comment_requests.append((post_id, min_id))
         for post in self.posts:
             if post.id == post_id:
                 for comment in post.comments:
-                    yield comment
+                    if comment.id > min_id:
+                        yield comment
                 break
 
 
@@ -170,3 +177,294 @@ class TestChannelLoader:
 
             assert data['posts_count'] == 2
             assert data['comments_count'] == 3  # 2 on post 1, 1 on post 2
+
+    @pytest.mark.asyncio
+    async def test_load_channel_updates_index(self):
+        """Load channel indexes the saved export when an index is given."""
+        from src.loader import load_channel
+        from src.search_index import SearchIndex
+
+        channel, posts = create_sample_data()
+        mock_client = MockTelegramClientWrapper(channel, posts)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = SearchIndex(os.path.join(tmpdir, 'index.sqlite'))
+            await load_channel(
+                client=mock_client,
+                channel_id='@sample_channel',
+                output_path=os.path.join(tmpdir, 'indexed.json'),
+                index=index
+            )
+
+            hits = index.search('interesting')
+            index.close()
+
+        assert [(h.post_id, h.comment_id, h.author_id) for h in hits] == [(2, 201, 1001)]
+
+    @pytest.mark.asyncio
+    async def test_load_channel_updates_aggregates(self):
+        """Reloading a channel only adds new comments to the aggregates."""
+        from src.aggregates import AuthorAggregates
+        from src.loader import load_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            aggregates = AuthorAggregates(os.path.join(tmpdir, 'aggregates.sqlite'))
+            output_path = os.path.join(tmpdir, 'agg.json')
+
+            await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel',
+                               output_path, aggregates=aggregates)
+            posts[1].comments.append(Comment(
+                id=202, text='Again', date=datetime(2026, 2, 3, 9, 0, 0, tzinfo=timezone.utc),
+                author=posts[0].comments[0].author
+            ))
+            await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel',
+                               output_path, aggregates=aggregates)
+
+            alice = aggregates.get(1001)
+            aggregates.close()
+
+        assert alice['comments'] == 3
+        assert alice['per_channel'] == {123456789: 3}
+
+    @pytest.mark.asyncio
+    async def test_load_channel_updates_author_index(self):
+        """Load channel registers its authors in the author index."""
+        from src.author_index import AuthorIndex
+        from src.loader import load_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            authors = AuthorIndex(os.path.join(tmpdir, 'authors.sqlite'))
+            await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel',
+                               os.path.join(tmpdir, 'authors.json'), authors=authors)
+
+            entries = authors.active_in(['@sample_channel'])
+            authors.close()
+
+        assert [(e.user_id, e.channels) for e in entries] == [
+            (1001, ['sample_channel']),
+            (1002, ['sample_channel']),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_load_channel_updates_activity(self):
+        """Load channel replaces the channel's activity columns instead of adding to them."""
+        from src.activity import ActivityMatrix
+        from src.loader import load_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            activity = ActivityMatrix(os.path.join(tmpdir, 'activity'))
+            for _ in range(2):
+                await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel',
+                                   os.path.join(tmpdir, 'activity.json'), activity=activity)
+
+            assert activity.top(5) == [(1001, 2), (1002, 1)]
+
+    @pytest.mark.asyncio
+    async def test_load_channel_columnar(self):
+        """Load channel with columnar=True writes the columns next to the JSON."""
+        from src.columnar import ColumnarExport
+        from src.loader import load_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'sample.json')
+            await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel',
+                               output_path, columnar=True)
+
+            with ColumnarExport(os.path.join(tmpdir, 'sample.columns')) as export:
+                assert list(export.column('comment_author_id')) == [1001, 1002, 1001]
+                assert list(export.strings('post_text')) == ['First post', 'Second post']
+
+
+
+    @pytest.mark.asyncio
+    async def test_load_channel_sharded(self):
+        """With sharded=True the export is saved as monthly shards instead of one file."""
+        from src.loader import load_channel
+        from src.shards import load_shards
+
+        channel, posts = create_sample_data()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'test_channel.json')
+            result = await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel', output_path,
+                                        sharded=True)
+
+            assert not os.path.exists(output_path)
+            assert load_shards(os.path.join(tmpdir, 'test_channel.shards')).to_dict() == result.to_dict()
+
+class TestRefresh:
+    """Integration tests for refreshing an existing export."""
+
+    @pytest.mark.asyncio
+    async def test_refresh_reuses_cold_comments(self):
+        """Only hot posts and posts whose reply counter moved are re-fetched."""
+        from src.loader import load_channel
+
+        channel, posts = create_sample_data()
+        posts[0].replies, posts[1].replies = 2, 1
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'refresh.json')
+            previous = await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel', output_path)
+
+            channel, posts = create_sample_data()
+            author = posts[1].comments[0].author
+            new_comment = Comment(id=202, text='New', date=datetime(2026, 2, 9, tzinfo=timezone.utc), author=author)
+            posts[1].comments.insert(0, new_comment)
+            hot_post = Post(id=3, text='Today', date=datetime.now(timezone.utc), views=1, comments=[
+                Comment(id=301, text='First!', date=datetime.now(timezone.utc), author=author),
+            ], replies=1)
+            posts[0].replies, posts[1].replies = 2, 2
+            client = MockTelegramClientWrapper(channel, posts + [hot_post])
+
+            result = await load_channel(client, '@sample_channel', output_path, previous=previous)
+
+        assert client.comment_requests == [(2, 201), (3, 0)]
+        assert [[c.id for c in p.comments] for p in result.channel.posts] == [[101, 102], [202, 201], [301]]
+        assert result.comments_count == 5
+
+
+class TestPartial:
+    """Integration tests for exports interrupted by a lost connection."""
+
+    @pytest.mark.asyncio
+    async def test_lost_connection_saves_partial_export(self):
+        """Loaded posts and the unreached posts of the previous export survive."""
+        from src.errors import NetworkError
+        from src.loader import load_channel
+
+        class FailingClient(MockTelegramClientWrapper):
+            async def get_posts(self, channel, limit=None, min_id=0):
+                yield self.posts[0]
+                raise NetworkError("Request failed after 6 attempts")
+
+        channel, posts = create_sample_data()
+        posts.reverse()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'partial.json')
+            previous = await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel', output_path)
+
+            channel, posts = create_sample_data()
+            posts.reverse()
+            hot_post = Post(id=3, text='Today', date=datetime.now(timezone.utc), views=1, comments=[])
+            result = await load_channel(
+                FailingClient(channel, [hot_post] + posts), '@sample_channel', output_path, previous=previous
+            )
+
+            with open(output_path, 'r') as f:
+                data = json.load(f)
+
+        assert result.status == 'partial' and data['status'] == 'partial'
+        assert [p.id for p in result.channel.posts] == [3, 2, 1]
+        assert result.comments_count == 3
+
+
+
+class SlowCommentsClient(MockTelegramClientWrapper):
+    """Mock client whose comment fetches take a while and count how many overlap."""
+
+    def __init__(self, channel: Channel, posts: list[Post], profile: FetchProfile):
+        super().__init__(channel, posts)
+        self.tuner = FetchTuner(profile)
+        self.running = 0
+        self.most_running = 0
+
+    async def get_comments(self, channel: Channel, post_id: int, min_id: int = 0):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        async for comment in super().get_comments(channel, post_id, min_id):
+            yield comment
+
+
+class TestConcurrentComments:
+    """Integration tests for fetching comments of several posts at once."""
+
+    async def load(self, profile: FetchProfile) -> tuple[SlowCommentsClient, OutputFile]:
+        """Load ten posts through a SlowCommentsClient with the given profile."""
+        from src.loader import load_channel
+
+        channel, _ = create_sample_data()
+        posts = [
+            Post(id=i, text=f'Post {i}', date=datetime(2024, 1, i, tzinfo=timezone.utc), views=0, comments=[])
+            for i in range(10, 0, -1)
+        ]
+        client = SlowCommentsClient(channel, posts, profile)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = await load_channel(client, '@sample_channel', os.path.join(tmpdir, 'out.json'))
+        return client, result
+
+    @pytest.mark.asyncio
+    async def test_comments_fetched_up_to_max_in_flight(self):
+        """Comment fetches overlap up to max_in_flight; posts keep their order."""
+        client, result = await self.load(FetchProfile(page_size=100, wait_time=0, max_in_flight=3))
+
+        assert client.most_running == 3
+        assert [p.id for p in result.channel.posts] == list(range(10, 0, -1))
+
+    @pytest.mark.asyncio
+    async def test_default_profile_fetches_one_at_a_time(self):
+        """Without an explicit or tuned profile, comments are fetched one post at a time."""
+        from src.fetch_tuning import FETCH_PROFILES
+
+        client, _ = await self.load(FETCH_PROFILES['default'])
+
+        assert client.most_running == 1
+
+
+class TestLoadExport:
+    """Integration tests for reading exports back."""
+
+    @pytest.mark.asyncio
+    async def test_load_export_uses_cache(self):
+        """load_export returns the saved models and reuses the cache until the file changes."""
+        from src.loader import get_cache_path, load_export, load_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'sample.json')
+            saved = await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel', output_path)
+
+            first = load_export(output_path)
+            assert first.to_dict() == saved.to_dict()
+            assert get_cache_path(output_path).exists()
+
+            with patch('src.loader.json.load', side_effect=AssertionError('cache not used')):
+                assert load_export(output_path).to_dict() == saved.to_dict()
+
+            with open(output_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data['channel']['title'] = 'Renamed channel'
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+
+            assert load_export(output_path).channel.title == 'Renamed channel'
+
+    def test_load_export_ignores_corrupt_cache(self):
+        """A damaged cache falls back to parsing the JSON."""
+        from src.loader import get_cache_path, load_export
+
+        channel, posts = create_sample_data()
+        data = {
+            'version': '1.0', 'status': 'complete', 'exported_at': '2026-02-03T00:00:00+00:00',
+            'posts_count': 0, 'comments_count': 0, 'channel': channel.to_dict(),
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'sample.json')
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            get_cache_path(output_path).write_bytes(b'not a pickle')
+
+            assert load_export(output_path).channel.username == 'sample_channel'
+            assert load_export(output_path).to_dict() == data
@@ -0,0 +1,180 @@
+"""Integration tests for the live watch mode."""
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+import pytest
+
+from src.models import Author, Comment, OutputFile, Post
+from src.telegram_client import UPDATE_COMMENT, UPDATE_POST, UPDATE_RECONNECT, Update
+from tests.integration.test_loader import MockTelegramClientWrapper, create_sample_data
+
+
+class MockWatchClient(MockTelegramClientWrapper):
+    """Mock client that emits a scripted stream of update events.
+
+    Script entries are Update objects, or callables run when reached
+    (e.g. to publish messages that no event is emitted for).
+    """
+
+    def __init__(self, channel, posts, script):
+        super().__init__(channel, posts)
+        self.script = script
+
+    async def iter_updates(self, channel):
+        for item in self.script:
+            if callable(item):
+                item()
+            else:
+                yield item
+
+
+AUTHOR = Author(user_id=1003, username='carol', first_name='Carol', last_name=None)
+
+
+def comment(comment_id: int) -> Comment:
+    """Create a comment by AUTHOR dated now."""
+    return Comment(id=comment_id, text=f'c{comment_id}', date=datetime.now(timezone.utc), author=AUTHOR)
+
+
+def post(post_id: int, comments: list[Comment]) -> Post:
+    """Create a post dated now."""
+    return Post(id=post_id, text=f'p{post_id}', date=datetime.now(timezone.utc), views=1, comments=comments)
+
+
+class TestWatchChannel:
+    """Integration tests for watch_channel."""
+
+    @pytest.mark.asyncio
+    async def test_events_gap_fill_and_batching(self):
+        """Events are merged, duplicates ignored, gaps filled after start and reconnect."""
+        from src.aggregates import AuthorAggregates
+        from src.loader import load_channel
+        from src.encoder import save_export
+        from src.watcher import watch_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'watch.json')
+            output = await load_channel(MockTelegramClientWrapper(channel, posts), '@sample_channel', output_path)
+
+            # Post 3 was published while nobody was watching
+            server_posts = [post(3, [comment(301)])] + [Post(p.id, p.text, p.date, p.views, list(p.comments))
+                                                        for p in posts]
+            live_post = post(4, [])
+            script = [
+                Update(UPDATE_COMMENT, 3, comment=comment(302)),
+                Update(UPDATE_POST, 4, post=live_post),
+                Update(UPDATE_COMMENT, 3, comment=comment(301)),
+                Update(UPDATE_COMMENT, 99, comment=comment(9901)),
+                # Comment 401 is missed while disconnected
+                lambda: server_posts.insert(0, post(4, [comment(401)])),
+                Update(UPDATE_RECONNECT),
+            ]
+            client = MockWatchClient(channel, server_posts, script)
+            aggregates = AuthorAggregates(os.path.join(tmpdir, 'aggregates.sqlite'))
+
+            with patch('src.watcher.save_export', wraps=save_export) as save:
+                result = await watch_channel(client, output, output_path, batch_size=2, aggregates=aggregates)
+
+            with open(output_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            carol = aggregates.get(1003)
+            aggregates.close()
+
+        ids = [(p['id'], [c['id'] for c in p['comments']]) for p in saved['channel']['posts']]
+        assert ids == [(4, [401]), (3, [302, 301]), (2, [201]), (1, [101, 102])]
+        assert saved['comments_count'] == 6
+        assert result.posts_count == 4
+        # Catch-up, one batch of two, then the reconnect gap fill
+        assert save.call_count == 3
+        assert carol['comments'] == 3
+
+    @pytest.mark.asyncio
+    async def test_flush_on_exit(self):
+        """Changes below the batch size are saved when the stream ends."""
+        from src.watcher import watch_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'watch.json')
+            channel.posts = posts
+            output = OutputFile('1.0', 'complete', datetime.now(timezone.utc), 2, 3, channel)
+            client = MockWatchClient(channel, posts, [Update(UPDATE_COMMENT, 2, comment=comment(202))])
+
+            await watch_channel(client, output, output_path, batch_size=100, gap_days=0)
+
+            with open(output_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+
+        assert [c['id'] for c in saved['channel']['posts'][1]['comments']] == [202, 201]
+
+    @pytest.mark.asyncio
+    async def test_stream_error_is_raised(self):
+        """An error ending the update stream is raised after pending changes are saved."""
+        from src.errors import NetworkError
+        from src.watcher import watch_channel
+
+        def lose_connection():
+            raise NetworkError('Connection lost')
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'watch.json')
+            channel.posts = posts
+            output = OutputFile('1.0', 'complete', datetime.now(timezone.utc), 2, 3, channel)
+            script = [Update(UPDATE_COMMENT, 2, comment=comment(202)), lose_connection]
+            client = MockWatchClient(channel, posts, script)
+
+            with pytest.raises(NetworkError):
+                await watch_channel(client, output, output_path, batch_size=100, gap_days=0)
+
+            with open(output_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+
+        assert [c['id'] for c in saved['channel']['posts'][1]['comments']] == [202, 201]
+
+    @pytest.mark.asyncio
+    async def test_stores_get_only_new_comments(self):
+        """Each save passes only the new comments to the stores, which keep full counts."""
+        from src.activity import ActivityMatrix
+        from src.author_index import AuthorIndex
+        from src.search_index import SearchIndex
+        from src.watcher import watch_channel
+
+        channel, posts = create_sample_data()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'watch.json')
+            stores = {
+                'index': SearchIndex(os.path.join(tmpdir, 'index.sqlite')),
+                'authors': AuthorIndex(os.path.join(tmpdir, 'authors.sqlite')),
+                'activity': ActivityMatrix(os.path.join(tmpdir, 'activity')),
+            }
+            channel.posts = posts
+            output = OutputFile('1.0', 'complete', datetime.now(timezone.utc), 2, 3, channel)
+            data = output.to_dict()
+            for store in stores.values():
+                store.add_export(data)
+
+            script = [Update(UPDATE_COMMENT, 2, comment=comment(202)), Update(UPDATE_COMMENT, 1, comment=comment(103))]
+            client = MockWatchClient(channel, posts, script)
+            with patch.object(stores['index'], 'add_export', wraps=stores['index'].add_export) as add:
+                await watch_channel(client, output, output_path, batch_size=2, gap_days=0, **stores)
+                added = [[c['id'] for p in call.args[0]['channel']['posts'] for c in p['comments']]
+                         for call in add.call_args_list]
+
+            hits = stores['index'].search('c202 OR c103 OR great')
+            carol = stores['authors'].get(1003)
+            top = stores['activity'].top(10)
+            for store in stores.values():
+                store.close()
+
+        assert [sorted(ids) for ids in added] == [[103, 202]]
+        assert sorted(h.comment_id for h in hits) == [101, 103, 202]
+        assert carol.channels == ['sample_channel']
+        assert sorted(top) == [(1001, 2), (1002, 1), (1003, 2)]
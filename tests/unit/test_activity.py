@@ -0,0 +1,102 @@
+"""Unit tests for the author x channel activity matrix."""
+import json
+import os
+import tempfile
+from pathlib import Path
+import pytest
+
+from tests.fixtures.exports import make_comment, make_export
+
+
+# 2026-01-05 and 2026-02-02 are Mondays
+A = make_export(1, 'a', [
+    make_comment(1, 1, date='2026-01-05T10:00:00+00:00'),
+    make_comment(2, 1, date='2026-01-11T23:00:00+00:00'),
+    make_comment(3, 2, date='2026-02-02T10:00:00+00:00'),
+    make_comment(4, 2, date='2026-02-03T10:00:00+00:00'),
+    make_comment(5, 2, date='2026-02-04T10:00:00+00:00'),
+    make_comment(6, 0, date='2026-02-04T10:00:00+00:00'),
+])
+B = make_export(2, 'b', [
+    make_comment(1, 1, date='2026-02-02T10:00:00+00:00'),
+    make_comment(2, 3, date='2026-02-02T10:00:00+00:00'),
+])
+
+
+class TestActivityMatrix:
+    """Tests for ActivityMatrix."""
+
+    def test_top_all_channels(self):
+        """Counts are summed across channels; anonymous comments are skipped."""
+        from src.activity import ActivityMatrix
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            matrix = ActivityMatrix(Path(tmpdir))
+            assert matrix.add_export(A) == 2
+            matrix.add_export(B)
+
+            assert matrix.top(2) == [(1, 3), (2, 3)]
+            assert matrix.top(10, channels=['@b']) == [(1, 1), (3, 1)]
+            assert matrix.num_authors == 3
+
+    def test_time_window(self):
+        """Windows select whole weeks."""
+        from src.activity import ActivityMatrix
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            matrix = ActivityMatrix(Path(tmpdir))
+            matrix.add_export(A)
+            matrix.add_export(B)
+
+            assert matrix.top(10, until='2026-01-07') == [(1, 2)]
+            assert matrix.top(10, since='2026-02-01', channels=['a']) == [(2, 3)]
+            assert matrix.activity(1, since='2026-02-01') == {'b': 1}
+
+    def test_persisted_and_replaced(self):
+        """Re-adding a channel replaces its counts; state survives reopening."""
+        from src.activity import ActivityMatrix
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ActivityMatrix(Path(tmpdir)).add_export(A)
+            matrix = ActivityMatrix(Path(tmpdir))
+            matrix.add_export(make_export(1, 'a', [make_comment(1, 4, date='2026-02-02T10:00:00+00:00')]))
+
+            reopened = ActivityMatrix(Path(tmpdir))
+            assert reopened.top(10) == [(4, 1)]
+            assert reopened.activity(2) == {}
+            assert reopened.activity(4) == {'a': 1}
+
+    def test_instances_share_matrix(self):
+        """Writes from another instance are picked up, not overwritten."""
+        from src.activity import ActivityMatrix
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            first = ActivityMatrix(Path(tmpdir))
+            second = ActivityMatrix(Path(tmpdir))
+            first.add_export(A)
+            second.add_export(B)
+            first.add_export(make_export(3, 'c', [make_comment(1, 5, date='2026-02-02T10:00:00+00:00')]))
+
+            reopened = ActivityMatrix(Path(tmpdir))
+            assert sorted(reopened.meta['channels']) == ['1', '2', '3']
+            assert reopened.top(10, channels=['b']) == [(1, 1), (3, 1)]
+            assert first.activity(3) == {'b': 1}
+            assert reopened.activity(5) == {'c': 1}
+
+    def test_cli(self, capsys):
+        """build then top --json."""
+        from src.activity import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = os.path.join(tmpdir, 'channels')
+            os.makedirs(exports)
+            for name, data in (('a', A), ('b', B)):
+                with open(os.path.join(exports, f'{name}.json'), 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+            matrix = os.path.join(tmpdir, 'activity')
+
+            assert main(['--matrix', matrix, 'build', '--dir', exports]) == 0
+            capsys.readouterr()
+            assert main(['--matrix', matrix, 'top', '--top', '1', '--json']) == 0
+
+        assert json.loads(capsys.readouterr().out) == [{'user_id': 1, 'comments': 3}]
@@ -0,0 +1,111 @@
+"""Unit tests for per-author aggregates."""
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+import pytest
+
+from src.models import Author, Channel, Comment, Post
+
+
+BASE = datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+ALICE = Author(user_id=1001, username='alice', first_name='Alice', last_name=None)
+BOB = Author(user_id=1002, username='bob', first_name='Bob', last_name=None)
+ANON = Author(user_id=0, username=None, first_name='Anonymous', last_name=None)
+
+
+@pytest.fixture
+def store():
+    """Empty aggregate store in a temporary directory."""
+    from src.aggregates import AuthorAggregates
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        s = AuthorAggregates(os.path.join(tmpdir, 'aggregates.sqlite'))
+        yield s
+        s.close()
+
+
+class TestAddComments:
+    """Tests for AuthorAggregates.add_comments."""
+
+    def test_totals_channels_and_days(self, store):
+        """Batches update totals, per-channel counts and daily buckets."""
+        chan_a = Channel(id=1, username='a', title='A')
+        chan_b = Channel(id=2, username='b', title='B')
+        post_a = Post(id=10, text='P', date=BASE, views=1)
+        post_b = Post(id=20, text='P', date=BASE, views=1)
+
+        store.add_comments(chan_a, post_a, [
+            Comment(id=2, text='x', date=BASE + timedelta(days=1), author=ALICE),
+            Comment(id=1, text='x', date=BASE + timedelta(hours=1), author=ALICE),
+            Comment(id=3, text='x', date=BASE + timedelta(hours=2), author=ANON),
+        ])
+        store.add_comments(chan_b, post_b, [
+            Comment(id=5, text='x', date=BASE + timedelta(hours=3), author=ALICE),
+        ])
+
+        alice = store.get(1001)
+        assert alice['comments'] == 3
+        assert alice['per_channel'] == {1: 2, 2: 1}
+        assert alice['daily'] == {'2026-02-01': 2, '2026-02-02': 1}
+        assert alice['first_seen'] == BASE + timedelta(hours=1)
+        assert alice['last_seen'] == BASE + timedelta(days=1)
+        assert store.get(0) is None
+
+    def test_delta_applies_only_new_comments(self, store):
+        """Re-applying a post only counts comments not applied before, older ones included."""
+        channel = Channel(id=1, username='a', title='A')
+        post = Post(id=10, text='P', date=BASE, views=1)
+        first = [Comment(id=1, text='x', date=BASE + timedelta(hours=1), author=ALICE)]
+        second = first + [Comment(id=5, text='y', date=BASE + timedelta(hours=2), author=BOB)]
+
+        assert store.add_comments(channel, post, first) == 1
+        assert store.add_comments(channel, post, second) == 1
+        assert store.add_comments(channel, post, second) == 0
+        # Found later by a gap fill, below comments already applied
+        gap = [Comment(id=3, text='z', date=BASE + timedelta(minutes=30), author=BOB)]
+        assert store.add_comments(channel, post, gap + second) == 1
+
+        assert store.get(1001)['comments'] == 1
+        assert store.get(1002)['comments'] == 2
+
+    def test_iter_rows(self, store):
+        """Rows carry distinct posts/channels, latency and latest profile."""
+        channel = Channel(id=1, username='a', title='A')
+        renamed = Author(user_id=1001, username='alice2', first_name='Alice', last_name=None)
+
+        store.add_comments(channel, Post(id=10, text='P', date=BASE, views=1), [
+            Comment(id=1, text='x', date=BASE + timedelta(hours=1), author=ALICE),
+            Comment(id=2, text='x', date=BASE + timedelta(hours=3), author=ALICE),
+        ])
+        store.add_comments(channel, Post(id=11, text='P', date=BASE, views=1), [
+            Comment(id=7, text='x', date=BASE + timedelta(hours=5), author=renamed),
+        ])
+
+        rows = list(store.iter_rows())
+        assert len(rows) == 1
+        row = rows[0]
+        assert row['username'] == 'alice2'
+        assert (row['comments'], row['posts'], row['channels']) == (3, 2, 1)
+        assert row['latency_total'] == 9 * 3600
+        assert row['latency_count'] == 3
+
+
+class TestFinderFromAggregates:
+    """Tests for ranking from the aggregate store."""
+
+    def test_stats_from_aggregates(self, store):
+        """Finder builds AuthorStats from aggregate rows."""
+        from src.finder import rank_authors, stats_from_aggregates
+
+        channel = Channel(id=1, username='a', title='A')
+        store.add_comments(channel, Post(id=10, text='P', date=BASE, views=1), [
+            Comment(id=1, text='x', date=BASE + timedelta(hours=1), author=ALICE),
+            Comment(id=2, text='x', date=BASE + timedelta(hours=2), author=ALICE),
+            Comment(id=3, text='x', date=BASE + timedelta(hours=3), author=BOB),
+        ])
+
+        stats = stats_from_aggregates(store)
+        assert stats[1001].comments == 2
+        assert stats[1001].mean_latency == 1.5 * 3600
+        assert [s.user_id for s in rank_authors(stats)] == [1001, 1002]
@@ -0,0 +1,86 @@
+"""Unit tests for the cross-channel author index."""
+import json
+import os
+import tempfile
+import pytest
+
+from tests.fixtures.exports import make_comment, make_export
+
+
+@pytest.fixture
+def index():
+    """Author index with three channels."""
+    from src.author_index import AuthorIndex
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        idx = AuthorIndex(os.path.join(tmpdir, 'authors.sqlite'))
+        idx.add_export(make_export(1, 'a', [
+            make_comment(1, 101, username='alice', date='2026-02-01T10:00:00+00:00'),
+            make_comment(2, 102, username='bob', date='2026-02-01T11:00:00+00:00'),
+            make_comment(3, 0, date='2026-02-01T12:00:00+00:00'),
+        ]))
+        idx.add_export(make_export(2, 'b', [
+            make_comment(1, 101, username='alice_new', date='2026-02-05T10:00:00+00:00'),
+            make_comment(2, 103, username='carol', date='2026-02-05T11:00:00+00:00'),
+        ]))
+        idx.add_export(make_export(3, 'c', [
+            make_comment(1, 101, username='alice_old', date='2026-01-01T10:00:00+00:00'),
+            make_comment(2, 102, username='bob', date='2026-02-06T10:00:00+00:00'),
+        ]))
+        yield idx
+        idx.close()
+
+
+class TestAuthorIndex:
+    """Tests for AuthorIndex."""
+
+    def test_latest_profile_and_channels(self, index):
+        """One entry per user with the newest profile and all channels."""
+        alice = index.get(101)
+        assert alice.username == 'alice_new'
+        assert alice.channels == ['a', 'b', 'c']
+        assert index.get(0) is None
+
+    def test_active_in_min_channels(self, index):
+        """active_in intersects channel bitmaps with a target set."""
+        assert [e.user_id for e in index.active_in(['@a', '@b', '@c'], 2)] == [101, 102]
+        assert [e.user_id for e in index.active_in(['b', 'c'], 2)] == [101]
+        assert [e.user_id for e in index.active_in(None, 3)] == [101]
+        assert index.active_in(['unknown'], 1) == []
+
+    def test_active_in_needs_one_channel(self, index):
+        """min_channels below 1 would match authors outside the targets and is rejected."""
+        with pytest.raises(ValueError):
+            index.active_in(['a'], 0)
+
+    def test_reindex_clears_missing_authors(self, index):
+        """Re-adding a channel removes it from authors no longer in it."""
+        index.add_export(make_export(3, 'c', [make_comment(1, 102, username='bob', date='2026-02-07T10:00:00+00:00')]))
+
+        assert index.get(101).channels == ['a', 'b']
+        assert index.get(102).channels == ['a', 'c']
+
+
+class TestAuthorIndexCli:
+    """Tests for the author index command line."""
+
+    def test_build_and_active(self, capsys):
+        """build indexes exports on disk and active prints JSON."""
+        from src.author_index import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = os.path.join(tmpdir, 'channels')
+            os.makedirs(exports)
+            alice = make_comment(1, 101, username='alice', date='2026-02-01T10:00:00+00:00')
+            bob = make_comment(2, 102, username='bob', date='2026-02-02T11:00:00+00:00')
+            for data in (make_export(1, 'a', [alice]), make_export(2, 'b', [alice, bob])):
+                with open(os.path.join(exports, f"{data['channel']['username']}.json"), 'w') as f:
+                    json.dump(data, f)
+            index_path = os.path.join(tmpdir, 'authors.sqlite')
+
+            assert main(['--index', index_path, 'build', '--dir', exports]) == 0
+            capsys.readouterr()
+            assert main(['--index', index_path, 'active', '--min', '2', '--json']) == 0
+
+        result = json.loads(capsys.readouterr().out)
+        assert [(e['user_id'], e['channels']) for e in result] == [(101, ['a', 'b'])]
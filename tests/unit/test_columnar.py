@@ -0,0 +1,125 @@
+"""Unit tests for the columnar export."""
+import json
+import os
+import tempfile
+from pathlib import Path
+import pytest
+
+
+DATA = {
+    'version': '1.0',
+    'status': 'complete',
+    'exported_at': '2026-02-03T00:00:00+00:00',
+    'posts_count': 2,
+    'comments_count': 3,
+    'channel': {
+        'id': 7,
+        'username': 'c',
+        'title': 'Канал',
+        'posts': [
+            {
+                'id': 2, 'text': 'Второй пост', 'date': '2026-02-02T10:00:00+00:00', 'views': None,
+                'comments': [
+                    {'id': 21, 'text': 'Ответ', 'date': '2026-02-02T10:05:00+00:00', 'reply_to': 20,
+                     'author': {'user_id': 1, 'username': 'alice', 'first_name': 'Alice', 'last_name': None}},
+                    {'id': 20, 'text': '', 'date': '2026-02-02T10:01:00+00:00', 'reply_to': None,
+                     'author': {'user_id': 2, 'username': None, 'first_name': 'Bob', 'last_name': 'B'}},
+                ],
+            },
+            {
+                'id': 1, 'text': 'First', 'date': '2026-02-01T10:00:00+00:00', 'views': 10,
+                'comments': [
+                    {'id': 11, 'text': 'hi', 'date': '2026-02-01T10:00:01+00:00', 'reply_to': None,
+                     'author': {'user_id': 1, 'username': 'alice', 'first_name': 'Alice', 'last_name': None}},
+                ],
+            },
+        ],
+    },
+}
+
+
+class TestColumnar:
+    """Tests for write_columnar and ColumnarExport."""
+
+    def test_round_trip(self):
+        """Columns read back through mmap match the export."""
+        from src.columnar import ColumnarExport, write_columnar
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'c.columns'
+            meta = write_columnar(DATA, directory)
+
+            with ColumnarExport(directory) as export:
+                assert export.channel['title'] == 'Канал'
+                assert export.rows('comments') == 3
+                assert list(export.column('comment_id')) == [21, 20, 11]
+                assert list(export.column('comment_post_id')) == [2, 2, 1]
+                assert list(export.column('comment_reply_to')) == [20, 0, 0]
+                assert export.column('comment_date')[2] == 1769940001
+                assert list(export.strings('comment_text')) == ['Ответ', '', 'hi']
+                assert list(export.column('post_views')) == [-1, 10]
+                assert list(export.column('author_id')) == [1, 2]
+                assert list(export.strings('author_username')) == ['alice', '']
+
+        assert meta['tables']['authors']['rows'] == 2
+
+    def test_rewrite_swaps_directory(self):
+        """Rewriting replaces the whole directory; open readers keep the old columns."""
+        from src.columnar import ColumnarExport, write_columnar
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'c.columns'
+            write_columnar(DATA, directory)
+            with ColumnarExport(directory) as old:
+                comment_ids = old.column('comment_id')
+                posts = DATA['channel']['posts'][1:]
+                write_columnar(dict(DATA, channel=dict(DATA['channel'], posts=posts)), directory)
+                assert list(comment_ids) == [21, 20, 11]
+
+            with ColumnarExport(directory) as new:
+                assert new.rows('comments') == 1
+                assert list(new.column('comment_id')) == [11]
+            assert os.listdir(tmpdir) == ['c.columns']
+
+    def test_little_endian_layout(self):
+        """Numeric files are raw little-endian int64."""
+        from src.columnar import write_columnar
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'c.columns'
+            write_columnar(DATA, directory)
+            raw = (directory / 'comment_id.i8').read_bytes()
+
+        assert [int.from_bytes(raw[i:i + 8], 'little') for i in range(0, len(raw), 8)] == [21, 20, 11]
+
+    def test_empty_channel(self):
+        """A channel without posts gives empty, readable columns."""
+        from src.columnar import ColumnarExport, write_columnar
+
+        data = dict(DATA, channel=dict(DATA['channel'], posts=[]))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_columnar(data, Path(tmpdir))
+            with ColumnarExport(Path(tmpdir)) as export:
+                assert len(export.column('comment_id')) == 0
+                assert len(export.strings('comment_text')) == 0
+
+    def test_numpy_memmap(self):
+        """Columns open directly with numpy.memmap."""
+        np = pytest.importorskip('numpy')
+        from src.columnar import write_columnar
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_columnar(DATA, Path(tmpdir))
+            authors = np.memmap(os.path.join(tmpdir, 'comment_author_id.i8'), dtype='<i8', mode='r')
+            assert np.bincount(authors).tolist() == [0, 2, 1]
+
+    def test_cli_build(self):
+        """build converts every export in the directory."""
+        from src.columnar import ColumnarExport, main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'c.json'), 'w', encoding='utf-8') as f:
+                json.dump(DATA, f)
+            assert main(['build', '--dir', tmpdir]) == 0
+            with ColumnarExport(Path(tmpdir) / 'c.columns') as export:
+                assert export.rows('posts') == 2
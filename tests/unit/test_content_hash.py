@@ -0,0 +1,103 @@
+"""Unit tests for per-post content hashes and snapshot diffs."""
+import copy
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.content_hash import HashManifest, diff_hashes, post_hash
+from src.models import Author, Comment, Post
+from tests.fixtures.exports import make_output
+
+
+def make_posts():
+    """Three posts, two of them with comments."""
+    author = Author(user_id=7, username='u', first_name='U', last_name=None)
+    date = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    return [
+        Post(id=3, text='three', date=date, views=30, comments=[
+            Comment(id=31, text='a', date=date, author=author),
+            Comment(id=32, text='b', date=date, author=author),
+        ]),
+        Post(id=2, text='two', date=date, views=20, comments=[Comment(id=21, text='c', date=date, author=author)]),
+        Post(id=1, text='one', date=date, views=10),
+    ]
+
+
+class TestContentHash:
+    """Tests for post hashes and diff_hashes."""
+
+    def test_hash_is_stable_and_content_sensitive(self):
+        """Equal content hashes equally; text, views and comments change it; profiles do not."""
+        post = make_posts()[0]
+        same = copy.deepcopy(post)
+        assert post_hash(post) == post_hash(same)
+
+        same.comments[0].author.username = 'renamed'
+        assert post_hash(post) == post_hash(same)
+        for change in (
+            lambda p: setattr(p, 'text', 'edited'),
+            lambda p: setattr(p, 'views', 31),
+            lambda p: setattr(p.comments[1], 'text', 'edited'),
+            lambda p: p.comments.pop(),
+        ):
+            changed = copy.deepcopy(post)
+            change(changed)
+            assert post_hash(changed) != post_hash(post)
+
+    def test_diff(self):
+        """New, edited and deleted posts and comments are reported by id."""
+        old = HashManifest.from_export(make_output(make_posts()))
+
+        posts = make_posts()
+        posts[0].text = 'edited'
+        posts[0].comments[1].text = 'edited'
+        posts[1].views = 99
+        posts[0].comments.append(Comment(id=33, text='new', date=posts[0].date, author=posts[0].comments[0].author))
+        posts[1].comments.clear()
+        posts.pop()
+        posts.insert(0, Post(id=4, text='four', date=posts[0].date, views=0, comments=[
+            Comment(id=41, text='first', date=posts[0].date, author=posts[0].comments[0].author),
+        ]))
+        diff = diff_hashes(old, HashManifest.from_export(make_output(posts)))
+
+        assert diff.to_dict() == {
+            'new_posts': [4],
+            'edited_posts': [3],
+            'deleted_posts': [1],
+            'new_comments': [33, 41],
+            'edited_comments': [32],
+            'deleted_comments': [21],
+        }
+        assert not diff_hashes(old, old)
+
+    def test_counters_are_not_edits(self):
+        """Views and replies change the hash but do not make a post edited."""
+        old = HashManifest.from_export(make_output(make_posts()))
+        posts = make_posts()
+        for post in posts:
+            post.views += 100
+            post.replies = 7
+        new = HashManifest.from_export(make_output(posts))
+
+        assert new.hashes() != old.hashes()
+        assert not diff_hashes(old, new)
+
+    def test_diff_cli_uses_saved_manifest(self):
+        """diff reads saved manifests, and hashes exports newer than theirs."""
+        from src.content_hash import get_hashes_path, load_hashes, main, write_hashes
+        from src.encoder import save_export
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old_path, new_path = Path(tmpdir) / 'old.json', Path(tmpdir) / 'new.json'
+            save_export(make_output(make_posts()), str(old_path))
+            write_hashes(HashManifest.from_export(make_output(make_posts())), get_hashes_path(str(old_path)))
+            posts = make_posts()
+            posts[2].text = 'edited'
+            save_export(make_output(posts), str(new_path))
+            # A stale manifest is ignored
+            write_hashes(HashManifest.from_export(make_output(make_posts())), get_hashes_path(str(new_path)))
+            os.utime(get_hashes_path(str(new_path)), ns=(0, 0))
+
+            assert main(['diff', str(old_path), str(new_path), '--json']) == 0
+            assert diff_hashes(load_hashes(old_path), load_hashes(new_path)).edited_posts == [1]
@@ -0,0 +1,105 @@
+"""Unit tests for near-duplicate detection."""
+import json
+import os
+import tempfile
+import pytest
+
+from tests.fixtures.exports import make_records
+
+
+SPAM = 'Earn 500$ a day from home, write to me in private messages now'
+
+
+SAMPLE = [
+    (1, SPAM),
+    (1, SPAM.upper() + '!!!'),
+    (1, 'Earn 500$ a day from home, write to me in private messages today'),
+    (2, 'We tried three CRMs last year and ended up building our own'),
+    (2, 'Thanks!'),
+    (2, 'Thanks!'),
+    (3, 'I would pay for a tool that syncs Notion with our sales pipeline'),
+    (3, 'Has anyone compared the pricing of the two plans in detail?'),
+]
+
+
+class TestMinhash:
+    """Tests for shingling and MinHash signatures."""
+
+    def test_signature_deterministic(self):
+        """Equal texts give equal signatures across calls."""
+        from src.dedup import NUM_PERM, minhash, shingles
+
+        a = minhash(shingles(SPAM))
+        b = minhash(shingles(SPAM.lower()))
+        assert a == b
+        assert len(a) == NUM_PERM
+
+    def test_short_text_skipped(self):
+        """Short generic comments are not shingled."""
+        from src.dedup import shingles
+
+        assert shingles('Thanks!') is None
+
+    def test_shingles_are_characters(self):
+        """Non-Latin text is cut into whole characters, not bytes."""
+        from src.dedup import SHINGLE_SIZE, shingles
+
+        items = shingles('Заработок от 500$ в день, пишите в личные сообщения')
+        assert all(len(item.decode('utf-8')) == SHINGLE_SIZE for item in items)
+        assert 'зараб'.encode('utf-8') in items
+
+
+class TestFindDuplicates:
+    """Tests for find_duplicates function."""
+
+    def test_clusters_near_duplicates(self):
+        """Copy-paste variants end up in one cluster; distinct texts do not."""
+        from src.dedup import find_duplicates
+
+        result = find_duplicates(make_records(SAMPLE))
+
+        assert len(result.clusters) == 1
+        assert sorted(ref[2] for ref in result.clusters[0]) == [1, 2, 3]
+
+    def test_flags_spam_authors(self):
+        """Authors whose comments are mostly duplicates are flagged."""
+        from src.dedup import find_duplicates
+
+        result = find_duplicates(make_records(SAMPLE))
+
+        assert [a.user_id for a in result.flagged()] == [1]
+        assert result.authors[2].duplicates == 0
+        assert result.authors[1].ratio == 1.0
+
+    def test_cross_author_spam(self):
+        """The same text posted by different bots flags each of them."""
+        from src.dedup import find_duplicates
+
+        records = make_records([(10, SPAM), (11, SPAM), (10, SPAM + ' now'), (11, SPAM + '!')])
+        result = find_duplicates(records)
+
+        assert [a.user_id for a in result.flagged()] == [10, 11]
+
+
+class TestFinderExcludeSpam:
+    """Tests for --exclude-spam in the finder."""
+
+    def test_exclude_spam(self, capsys):
+        """Flagged authors are left out of the finder ranking."""
+        from src.finder import main
+
+        records = make_records(SAMPLE)
+        channel = dict(records[0][0])
+        channel['posts'] = [dict(records[0][1], views=1, comments=[c for _, _, c in records])]
+        data = {
+            'version': '1.0', 'status': 'complete', 'exported_at': '2026-02-01T12:00:00+00:00',
+            'posts_count': 1, 'comments_count': len(records), 'channel': channel,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'c.json'), 'w') as f:
+                json.dump(data, f)
+            assert main(['--dir', tmpdir, '--json', '--exclude-spam']) == 0
+
+        ranked = json.loads(capsys.readouterr().out)
+        assert sorted(a['user_id'] for a in ranked) == [2, 3]
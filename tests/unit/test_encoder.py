@@ -0,0 +1,69 @@
+"""Unit tests for the direct export encoder."""
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from src.models import Author, Channel, Comment, OutputFile, Post
+
+
+def make_output(posts: list[Post]) -> OutputFile:
+    """Wrap posts in an OutputFile."""
+    return OutputFile(
+        version='1.0',
+        status='complete',
+        exported_at=datetime(2026, 2, 6, 16, 0, 0, tzinfo=timezone.utc),
+        posts_count=len(posts),
+        comments_count=sum(len(p.comments) for p in posts),
+        channel=Channel(id=1, username=None, title='Канал "test"', posts=posts)
+    )
+
+
+def sample_output() -> OutputFile:
+    """An export covering optional fields, entities, unicode and odd timestamps."""
+    base = datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc)
+    alice = Author(user_id=1, username='alice', first_name='Алиса', last_name=None)
+    anonymous = Author(user_id=0, username=None, first_name='Anonymous', last_name=None)
+    comments = [
+        Comment(id=11, text='line\nbreak \\ "quoted" ✓', date=base + timedelta(seconds=5), author=alice),
+        Comment(id=12, text='', date=base.replace(microsecond=123), author=anonymous, reply_to=11,
+                entities=[['bold', 0, 4], ['text_url', 5, 3, 'https://example.com']]),
+        Comment(id=13, text='tz', date=datetime(2026, 2, 1, 13, 0, tzinfo=timezone(timedelta(hours=3))),
+                author=alice, entities=[]),
+    ]
+    return make_output([
+        Post(id=2, text='**Hi**', date=base, views=None, comments=comments, replies=3, entities=[['bold', 0, 2]]),
+        Post(id=1, text='', date=base - timedelta(days=400), views=10, comments=[]),
+    ])
+
+
+class TestExportEncoder:
+    """Tests for ExportEncoder."""
+
+    def test_pretty_matches_json_dump(self):
+        """Pretty output is byte-identical to json.dump(indent=2)."""
+        from src.encoder import ExportEncoder
+
+        for output in (sample_output(), make_output([])):
+            expected = json.dumps(output.to_dict(), ensure_ascii=False, indent=2)
+            assert ExportEncoder().encode(output) == expected
+
+    def test_compact(self):
+        """Compact output has no whitespace and the same content."""
+        from src.encoder import ExportEncoder
+
+        output = sample_output()
+        expected = json.dumps(output.to_dict(), ensure_ascii=False, separators=(',', ':'))
+        assert ExportEncoder(pretty=False).encode(output) == expected
+
+    def test_save_export(self):
+        """save_export writes the same file as save_to_json."""
+        from src.encoder import save_export
+        from src.utils import save_to_json
+
+        output = sample_output()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_to_json(output.to_dict(), os.path.join(tmpdir, 'a.json'))
+            save_export(output, os.path.join(tmpdir, 'b.json'))
+            with open(os.path.join(tmpdir, 'a.json'), 'rb') as a, open(os.path.join(tmpdir, 'b.json'), 'rb') as b:
+                assert a.read() == b.read()
@@ -0,0 +1,126 @@
+"""Unit tests for fetch profiles and auto-tuning."""
+import json
+import tempfile
+from pathlib import Path
+import pytest
+
+from src.fetch_tuning import CALM_PAGES, FETCH_PROFILES, FetchProfile, FetchTuner
+from tests.fixtures.mock_telegram import MockChannel, MockMessage, create_mock_telegram_client
+
+
+class TestFetchTuner:
+    """Tests for FetchTuner."""
+
+    def test_fixed_profile(self):
+        """Without auto mode the profile only collects statistics."""
+        tuner = FetchTuner(FETCH_PROFILES['gentle'])
+        tuner.record_flood(30)
+        tuner.record_page(5.0)
+        assert tuner.profile == FETCH_PROFILES['gentle']
+        assert tuner.profile is not FETCH_PROFILES['gentle']
+        assert (tuner.stats()['floods'], tuner.stats()['pages']) == (1, 1)
+
+    def test_flood_backoff_and_recovery(self):
+        """FloodWaits back off multiplicatively; calm pages recover additively."""
+        tuner = FetchTuner(FetchProfile(page_size=100, wait_time=0.0, max_in_flight=4), auto=True)
+        tuner.record_flood(10)
+        tuner.record_flood(10)
+        assert (tuner.profile.wait_time, tuner.profile.max_in_flight) == (1.0, 1)
+
+        for _ in range(CALM_PAGES):
+            tuner.record_page(0.1)
+        assert (tuner.profile.wait_time, tuner.profile.max_in_flight) == (0.5, 2)
+
+    def test_page_size_follows_latency(self):
+        """Slow pages halve the page size, fast ones grow it back."""
+        tuner = FetchTuner(auto=True)
+        tuner.record_page(8.0)
+        assert tuner.profile.page_size == 50
+        tuner.record_page(3.0)
+        assert tuner.profile.page_size == 25
+        tuner.record_page(0.05)
+        tuner.record_page(0.05)
+        assert tuner.profile.page_size == 100
+
+    def test_persisted_per_account(self):
+        """Learned profiles are saved and loaded per account."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'profiles.json'
+            tuner = FetchTuner(auto=True, path=path)
+            tuner.load('1')
+            tuner.record_flood(5)
+            tuner.save()
+            other = FetchTuner(auto=True, path=path)
+            other.load('2')
+            other.save()
+
+            again = FetchTuner(auto=True, path=path)
+            again.load('1')
+            assert again.profile == tuner.profile
+            assert set(json.loads(path.read_text())) == {'1', '2'}
+
+
+class TestPagedHistory:
+    """Tests for the wrapper's paged history requests."""
+
+    @pytest.mark.asyncio
+    async def test_pages_limit_and_flood_retry(self):
+        """Pages follow the profile; a FloodWait is recorded and the page retried."""
+        from unittest.mock import patch
+        from telethon.errors import FloodWaitError
+        from src.models import Channel
+        from tests.unit.test_telegram_client import make_wrapper
+
+        posts = [MockMessage(id=i, text=str(i)) for i in range(10, 0, -1)]
+        client = create_mock_telegram_client(posts=posts)
+        iter_messages = client.iter_messages
+        calls = []
+
+        def flaky(entity, **kwargs):
+            calls.append((kwargs['limit'], kwargs['offset_id']))
+            if len(calls) == 2:
+                raise FloodWaitError(request=None, capture=3)
+            return iter_messages(entity, **kwargs)
+        client.iter_messages = flaky
+
+        tuner = FetchTuner(FetchProfile(page_size=4, max_in_flight=2), auto=True)
+        wrapper = make_wrapper(client, tuner=tuner)
+        with patch('src.telegram_client.asyncio.sleep') as sleep:
+            result = [p.id async for p in wrapper.get_posts(Channel(id=1, username=None, title=''), limit=9)]
+
+        assert result == list(range(10, 1, -1))
+        # The fast first page doubles the page size; the limit caps it
+        assert calls[:3] == [(4, 0), (5, 7), (5, 7)]
+        assert tuner.floods == 1 and tuner.flood_seconds == 3
+        assert tuner.profile.max_in_flight == 1
+        assert any(call.args == (3,) for call in sleep.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_flood_on_other_requests(self):
+        """FloodWaits outside history pages are waited out too, not raised or swallowed."""
+        from unittest.mock import AsyncMock, patch
+        from telethon.errors import FloodWaitError
+        from telethon.tl.types import PeerUser, User
+        from src.models import Channel
+        from tests.unit.test_telegram_client import make_wrapper
+
+        channel = MockChannel(id=1, username='c', title='C')
+        message = MockMessage(id=11, text='hi')
+        message.from_id = PeerUser(5)
+        message.peer_id = 'discussion'
+        client = create_mock_telegram_client(channel, [MockMessage(id=1)], {1: [message]})
+        client.get_entity = AsyncMock(side_effect=[FloodWaitError(request=None, capture=2), channel])
+        client.get_input_entity = AsyncMock(return_value='chat')
+        client.side_effect = [FloodWaitError(request=None, capture=4), [User(id=5, first_name='Eve')]]
+
+        tuner = FetchTuner(auto=True)
+        wrapper = make_wrapper(client, tuner=tuner)
+        with patch('src.telegram_client.TelethonChannel', MockChannel), \
+                patch('src.telegram_client.asyncio.sleep', new=AsyncMock()) as sleep:
+            info = await wrapper.get_channel_info('@c')
+            comments = [c async for c in wrapper.get_comments(Channel(id=1, username=None, title=''), 1)]
+
+        assert info.id == 1
+        assert comments[0].author.first_name == 'Eve'
+        assert tuner.floods == 2 and tuner.flood_seconds == 6
+        assert [call.args for call in sleep.await_args_list] == [(2,), (4,)]
@@ -0,0 +1,149 @@
+"""Unit tests for the early-adopter finder."""
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+import pytest
+
+from src.models import Author, Comment, Post
+from src.utils import save_to_json
+from tests.fixtures.exports import make_output
+
+
+BASE = datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+ALICE = Author(user_id=1001, username='alice', first_name='Alice', last_name=None)
+BOB = Author(user_id=1002, username='bob', first_name='Bob', last_name=None)
+ANON = Author(user_id=0, username=None, first_name='Anonymous', last_name=None)
+
+
+def write_sample_exports(directory: str) -> None:
+    """Write two channel exports with overlapping authors."""
+    posts_a = [
+        Post(id=1, text='Launch', date=BASE, views=100, comments=[
+            Comment(id=11, text='Nice', date=BASE + timedelta(minutes=5), author=ALICE),
+            Comment(id=12, text='Me too', date=BASE + timedelta(minutes=6), author=ALICE),
+            Comment(id=13, text='Hmm', date=BASE + timedelta(hours=5), author=BOB),
+            Comment(id=14, text='...', date=BASE + timedelta(hours=1), author=ANON),
+        ]),
+        Post(id=2, text='Update', date=BASE + timedelta(days=1), views=50, comments=[
+            Comment(id=21, text='Cool', date=BASE + timedelta(days=1, minutes=10), author=ALICE),
+        ]),
+    ]
+    posts_b = [
+        Post(id=7, text='Other', date=BASE + timedelta(days=2), views=10, comments=[
+            Comment(id=71, text='Hello', date=BASE + timedelta(days=2, minutes=1), author=ALICE),
+        ]),
+    ]
+    save_to_json(make_output(posts_a, 1, 'chan_a', exported_at=BASE).to_dict(), os.path.join(directory, 'chan_a.json'))
+    save_to_json(make_output(posts_b, 2, 'chan_b', exported_at=BASE).to_dict(), os.path.join(directory, 'chan_b.json'))
+
+
+class TestAggregateAuthors:
+    """Tests for aggregate_authors function."""
+
+    def test_counts_features(self):
+        """Aggregation counts comments, distinct posts and channels."""
+        from src.finder import aggregate_authors
+        from src.utils import find_exports, iter_comment_records
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_sample_exports(tmpdir)
+            stats = aggregate_authors(iter_comment_records(find_exports(tmpdir)))
+
+        alice = stats[1001]
+        assert alice.comments == 4
+        assert alice.posts == 3
+        assert alice.channels == 2
+        assert alice.first_seen == BASE + timedelta(minutes=5)
+        assert alice.last_seen == BASE + timedelta(days=2, minutes=1)
+
+        bob = stats[1002]
+        assert bob.comments == 1
+        assert bob.mean_latency == 5 * 3600
+
+    def test_skips_anonymous(self):
+        """Anonymous comments are not ranked."""
+        from src.finder import aggregate_authors
+        from src.utils import find_exports, iter_comment_records
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_sample_exports(tmpdir)
+            stats = aggregate_authors(iter_comment_records(find_exports(tmpdir)))
+
+        assert 0 not in stats
+
+    def test_latest_profile_wins(self):
+        """Profile fields come from the latest comment."""
+        from src.finder import aggregate_authors
+
+        renamed = Author(user_id=1001, username='alice_new', first_name='Alice', last_name=None)
+        post = Post(id=1, text='P', date=BASE, views=1, comments=[
+            Comment(id=2, text='new', date=BASE + timedelta(days=1), author=renamed),
+            Comment(id=1, text='old', date=BASE + timedelta(hours=1), author=ALICE),
+        ])
+        data = make_output([post], exported_at=BASE).to_dict()
+        records = [(data['channel'], p, c) for p in data['channel']['posts'] for c in p['comments']]
+
+        stats = aggregate_authors(records)
+        assert stats[1001].username == 'alice_new'
+
+
+class TestRankAuthors:
+    """Tests for rank_authors function."""
+
+    def test_top_k_order(self):
+        """Most engaged author ranks first and top_k limits output."""
+        from src.finder import aggregate_authors, rank_authors
+        from src.utils import find_exports, iter_comment_records
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_sample_exports(tmpdir)
+            stats = aggregate_authors(iter_comment_records(find_exports(tmpdir)))
+
+        ranked = rank_authors(stats, top_k=1)
+        assert len(ranked) == 1
+        assert ranked[0].user_id == 1001
+        assert ranked[0].score > stats[1002].score
+
+    def test_empty(self):
+        """Ranking without authors returns an empty list."""
+        from src.finder import rank_authors
+
+        assert rank_authors({}) == []
+
+
+class TestFinderCli:
+    """Tests for the finder command line."""
+
+    def test_main_json(self, capsys):
+        """--json prints ranked authors as JSON."""
+        from src.finder import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_sample_exports(tmpdir)
+            exit_code = main(['--dir', tmpdir, '--top', '5', '--json'])
+
+        assert exit_code == 0
+        data = json.loads(capsys.readouterr().out)
+        assert [a['user_id'] for a in data] == [1001, 1002]
+
+    def test_main_channel_filter(self, capsys):
+        """--channel restricts ranking to the given exports."""
+        from src.finder import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_sample_exports(tmpdir)
+            exit_code = main(['--dir', tmpdir, '--channel', '@chan_b', '--json'])
+
+        assert exit_code == 0
+        data = json.loads(capsys.readouterr().out)
+        assert [a['user_id'] for a in data] == [1001]
+        assert data[0]['comments'] == 1
+
+    def test_main_no_exports(self):
+        """Missing exports is an error."""
+        from src.finder import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert main(['--dir', tmpdir]) == 1
@@ -87,6 +87,21 @@ class TestComment:
         assert d['text'] == 'Hello'
         assert d['date'] == '2026-02-06T12:00:00+00:00'
         assert d['author']['user_id'] == 1
+        assert d['reply_to'] is None
+
+    def test_comment_reply_to(self):
+        """Comment keeps the id of the comment it replies to."""
+        from src.models import Author, Comment
+
+        author = Author(user_id=1, username='u', first_name='F', last_name=None)
+        comment = Comment(
+            id=101,
+            text='Agreed',
+            date=datetime(2026, 2, 6, 12, 0, 0, tzinfo=timezone.utc),
+            author=author,
+            reply_to=100
+        )
+        assert comment.to_dict()['reply_to'] == 100
 
 
 class TestPost:
@@ -234,3 +249,22 @@ class TestOutputFile:
         assert d['status'] == 'complete'
         assert d['exported_at'] == '2026-02-06T15:00:00+00:00'
         assert d['channel']['id'] == 1
+
+    def test_output_file_from_dict_round_trip(self):
+        """from_dict rebuilds the models that to_dict produced."""
+        from src.models import Author, Channel, Comment, OutputFile, Post
+
+        author = Author(user_id=1, username=None, first_name='A', last_name='B')
+        comment = Comment(id=11, text='c', date=datetime(2026, 2, 6, 15, 5, 0, tzinfo=timezone.utc),
+                          author=author, reply_to=10, entities=[['bold', 0, 1]])
+        post = Post(id=1, text='p', date=datetime(2026, 2, 6, 15, 0, 0, tzinfo=timezone.utc),
+                    views=None, comments=[comment])
+        output = OutputFile(
+            version='1.0',
+            status='complete',
+            exported_at=datetime(2026, 2, 6, 16, 0, 0, tzinfo=timezone.utc),
+            posts_count=1,
+            comments_count=1,
+            channel=Channel(id=1, username='c', title='C', posts=[post])
+        )
+        assert OutputFile.from_dict(output.to_dict()) == output
@@ -0,0 +1,108 @@
+"""Unit tests for the process-pool analysis runner."""
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import pytest
+
+from src.models import Author, Channel, Comment, OutputFile, Post
+from src.utils import save_to_json
+
+
+BASE = datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def write_exports(directory: str, count: int) -> list[Path]:
+    """Write `count` channel exports where user 1 comments everywhere and user 100+i in channel i."""
+    paths = []
+    for i in range(count):
+        regular = Author(user_id=1, username=f'regular{i}', first_name='R', last_name=None)
+        local = Author(user_id=100 + i, username=None, first_name='L', last_name=None)
+        posts = [
+            Post(id=p, text='P', date=BASE + timedelta(days=i), views=1, comments=[
+                Comment(id=10 * p + 1, text='crm please', date=BASE + timedelta(days=i, hours=1), author=regular),
+                Comment(id=10 * p + 2, text='hello', date=BASE + timedelta(days=i, hours=2), author=local),
+            ])
+            for p in range(1, i + 2)
+        ]
+        channel = Channel(id=i + 1, username=f'c{i}', title='C', posts=posts)
+        output = OutputFile(
+            version='1.0', status='complete', exported_at=BASE,
+            posts_count=len(posts), comments_count=2 * len(posts), channel=channel
+        )
+        path = os.path.join(directory, f'c{i}.json')
+        save_to_json(output.to_dict(), path)
+        paths.append(Path(path))
+    return paths
+
+
+class TestShardPaths:
+    """Tests for shard_paths function."""
+
+    def test_balances_by_size(self):
+        """Every file lands in exactly one shard and shards are non-empty."""
+        from src.parallel import shard_paths
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_exports(tmpdir, 7)
+            shards = shard_paths(paths, 3)
+
+        assert len(shards) == 3
+        assert sorted(p for shard in shards for p in shard) == sorted(paths)
+
+    def test_more_shards_than_files(self):
+        """Shard count is capped by the number of files."""
+        from src.parallel import shard_paths
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_exports(tmpdir, 2)
+            assert len(shard_paths(paths, 8)) == 2
+
+
+class TestParallelAggregation:
+    """Parallel results match the single-process ones."""
+
+    def test_finder_shards_match_serial(self):
+        """Merged finder shards equal a single-pass aggregation."""
+        from src.finder import aggregate_authors, aggregate_shard, merge_shards
+        from src.parallel import map_shards
+        from src.utils import iter_comment_records
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_exports(tmpdir, 6)
+            serial = aggregate_authors(iter_comment_records(paths))
+            parallel = merge_shards(map_shards(aggregate_shard, paths, workers=3))
+
+        assert serial.keys() == parallel.keys()
+        for user_id, expected in serial.items():
+            assert parallel[user_id].to_dict() == expected.to_dict()
+        assert parallel[1].username == 'regular5'
+
+    def test_relevance_shards_match_serial(self):
+        """Merged term statistics equal a single-pass build."""
+        from functools import partial
+        from src.parallel import map_shards
+        from src.relevance import build_term_stats, merge_term_stats, term_stats_shard
+        from src.utils import iter_comment_records
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = write_exports(tmpdir, 4)
+            serial = build_term_stats(iter_comment_records(paths), ['crm'])
+            parallel = merge_term_stats(map_shards(partial(term_stats_shard, terms=['crm']), paths, workers=2), ['crm'])
+
+        as_dict = lambda s: {u: (s.doc_len[i], s.tf['crm'][i]) for i, u in enumerate(s.user_ids)}
+        assert as_dict(parallel) == as_dict(serial)
+
+    def test_finder_cli_workers(self, capsys):
+        """finder --workers gives the same ranking."""
+        import json
+        from src.finder import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_exports(tmpdir, 4)
+            assert main(['--dir', tmpdir, '--json']) == 0
+            serial = json.loads(capsys.readouterr().out)
+            assert main(['--dir', tmpdir, '--json', '--workers', '2']) == 0
+            parallel = json.loads(capsys.readouterr().out)
+
+        assert parallel == serial
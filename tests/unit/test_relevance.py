@@ -0,0 +1,92 @@
+"""Unit tests for BM25 relevance ranking."""
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+import pytest
+
+from tests.fixtures.exports import make_records
+
+
+SAMPLE = [
+    (1, 'We moved our sales pipeline to a new CRM last month'),
+    (1, 'The CRM integrates with Notion, which is great'),
+    (2, 'Does anyone know a good CRM?'),
+    (3, 'Nice weather today'),
+    (3, 'I like cats and dogs and long walks'),
+    (0, 'CRM CRM CRM'),
+]
+
+
+class TestBuildTermStats:
+    """Tests for build_term_stats function."""
+
+    def test_counts_query_terms_per_author(self):
+        """Term frequencies and document lengths are accumulated per author."""
+        from src.relevance import build_term_stats
+
+        stats = build_term_stats(make_records(SAMPLE), ['crm', 'notion'])
+
+        assert list(stats.user_ids) == [1, 2, 3]
+        assert list(stats.tf['crm']) == [2, 1, 0]
+        assert list(stats.tf['notion']) == [1, 0, 0]
+        assert stats.doc_len[2] == 11
+
+    def test_query_terms_unique(self):
+        """Query text is tokenized into unique terms."""
+        from src.relevance import query_terms
+
+        assert query_terms('CRM, notion, crm') == ['crm', 'notion']
+
+
+class TestRankByRelevance:
+    """Tests for rank_by_relevance function."""
+
+    def test_ranks_matching_authors(self):
+        """Authors mentioning more query terms rank higher; others are omitted."""
+        from src.relevance import build_term_stats, rank_by_relevance
+
+        stats = build_term_stats(make_records(SAMPLE), ['crm', 'notion'])
+        ranked = rank_by_relevance(stats, top_k=10)
+
+        assert [r.user_id for r in ranked] == [1, 2]
+        assert ranked[0].matches == {'crm': 2, 'notion': 1}
+        assert ranked[0].score > ranked[1].score > 0
+
+    def test_no_authors(self):
+        """Ranking without comments returns an empty list."""
+        from src.relevance import build_term_stats, rank_by_relevance
+
+        assert rank_by_relevance(build_term_stats([], ['crm'])) == []
+
+
+class TestRelevanceCli:
+    """Tests for the relevance command line."""
+
+    def test_main_json(self, capsys):
+        """CLI ranks authors from exports on disk."""
+        from src.relevance import main
+
+        records = make_records(SAMPLE)
+        channel = dict(records[0][0])
+        post = dict(records[0][1], views=1, comments=[c for _, _, c in records])
+        channel['posts'] = [post]
+        data = {
+            'version': '1.0', 'status': 'complete', 'exported_at': '2026-02-01T12:00:00+00:00',
+            'posts_count': 1, 'comments_count': len(records), 'channel': channel,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'c.json'), 'w') as f:
+                json.dump(data, f)
+            exit_code = main(['notion', '--dir', tmpdir, '--json'])
+
+        assert exit_code == 0
+        result = json.loads(capsys.readouterr().out)
+        assert [r['user_id'] for r in result] == [1]
+
+    def test_main_empty_query(self):
+        """Empty query is an error."""
+        from src.relevance import main
+
+        assert main(['  ,, ']) == 1
@@ -0,0 +1,117 @@
+"""Unit tests for the reply graph analysis."""
+import json
+import os
+import tempfile
+import pytest
+
+from tests.fixtures.exports import CHANNEL, make_comment, make_post
+
+
+# Two groups: {1, 2, 3} replying to 1, and {4, 5} replying to each other
+POSTS = [
+    make_post(1, [
+        make_comment(10, 1), make_comment(11, 2, reply_to=10), make_comment(12, 3, reply_to=10),
+        make_comment(13, 2, reply_to=10), make_comment(14, 1, reply_to=11), make_comment(15, 1, reply_to=15),
+    ]),
+    make_post(2, [
+        make_comment(20, 4), make_comment(21, 5, reply_to=20), make_comment(22, 4, reply_to=21),
+        make_comment(23, 0, reply_to=20), make_comment(24, 4, reply_to=999),
+    ]),
+]
+
+
+class TestBuildReplyGraph:
+    """Tests for build_reply_graph function."""
+
+    def test_edges_and_weights(self):
+        """Replies become weighted author edges; self, anonymous and unknown targets are skipped."""
+        from src.reply_graph import build_reply_graph
+
+        graph = build_reply_graph((CHANNEL, p) for p in POSTS)
+
+        edges = {}
+        for i in range(graph.num_nodes):
+            for k in range(graph.indptr[i], graph.indptr[i + 1]):
+                edges[(graph.user_ids[i], graph.user_ids[graph.indices[k]])] = graph.weights[k]
+
+        assert edges == {(2, 1): 2.0, (3, 1): 1.0, (1, 2): 1.0, (5, 4): 1.0, (4, 5): 1.0}
+        assert graph.num_edges == 5
+
+    def test_transpose(self):
+        """Transpose reverses every edge."""
+        from src.reply_graph import build_reply_graph
+
+        graph = build_reply_graph((CHANNEL, p) for p in POSTS)
+        reverse = graph.transpose()
+
+        assert reverse.num_edges == graph.num_edges
+        i = list(graph.user_ids).index(1)
+        sources = {graph.user_ids[reverse.indices[k]] for k in range(reverse.indptr[i], reverse.indptr[i + 1])}
+        assert sources == {2, 3}
+
+
+class TestAnalysis:
+    """Tests for PageRank and label propagation."""
+
+    def test_pagerank(self):
+        """The most replied-to author has the highest rank; ranks sum to 1."""
+        from src.reply_graph import build_reply_graph, pagerank
+
+        graph = build_reply_graph((CHANNEL, p) for p in POSTS)
+        ranks = pagerank(graph)
+
+        assert sum(ranks) == pytest.approx(1.0)
+        best = max(range(graph.num_nodes), key=ranks.__getitem__)
+        assert graph.user_ids[best] == 1
+
+    def test_pagerank_single_edge(self):
+        """One reply: the author replied to outranks the replier."""
+        from src.reply_graph import build_reply_graph, pagerank
+
+        graph = build_reply_graph([(CHANNEL, make_post(1, [make_comment(10, 1), make_comment(11, 2, reply_to=10)]))])
+        ranks = pagerank(graph)
+
+        assert graph.num_edges == 1
+        assert sum(ranks) == pytest.approx(1.0)
+        assert ranks[graph.user_ids.index(1)] > ranks[graph.user_ids.index(2)]
+
+    def test_communities(self):
+        """Disconnected groups get different labels."""
+        from src.reply_graph import build_reply_graph, label_propagation
+
+        graph = build_reply_graph((CHANNEL, p) for p in POSTS)
+        labels = dict(zip(graph.user_ids, label_propagation(graph)))
+
+        assert labels[1] == labels[2] == labels[3]
+        assert labels[4] == labels[5]
+        assert labels[1] != labels[4]
+
+    def test_empty_graph(self):
+        """Exports without replies give an empty graph."""
+        from src.reply_graph import build_reply_graph, label_propagation, pagerank
+
+        graph = build_reply_graph([])
+        assert len(pagerank(graph)) == 0
+        assert len(label_propagation(graph)) == 0
+
+
+class TestReplyGraphCli:
+    """Tests for the reply graph command line."""
+
+    def test_main_json(self, capsys):
+        """CLI prints graph size and top authors."""
+        from src.reply_graph import main
+
+        data = {
+            'version': '1.0', 'status': 'complete', 'exported_at': '2026-02-01T12:00:00+00:00',
+            'posts_count': 2, 'comments_count': 11, 'channel': dict(CHANNEL, posts=POSTS),
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'c.json'), 'w') as f:
+                json.dump(data, f)
+            assert main(['--dir', tmpdir, '--json', '--top', '1']) == 0
+
+        result = json.loads(capsys.readouterr().out)
+        assert (result['nodes'], result['edges'], result['communities']) == (5, 5, 2)
+        assert result['authors'][0]['user_id'] == 1
+        assert result['authors'][0]['community_size'] == 3
@@ -0,0 +1,155 @@
+"""Unit tests for the retry policy and the client's transient-failure handling."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.fetch_tuning import FetchProfile, FetchTuner
+from src.retry import RetryPolicy, is_transient
+from tests.fixtures.mock_telegram import MockMessage, create_mock_telegram_client
+from tests.unit.test_telegram_client import make_wrapper
+
+
+class TestRetryPolicy:
+    """Tests for is_transient and RetryPolicy."""
+
+    def test_is_transient(self):
+        """Connection failures and server errors are transient; other errors are fatal."""
+        from telethon.errors import ChannelPrivateError, RpcCallFailError, TimedOutError
+
+        assert is_transient(ConnectionResetError())
+        assert is_transient(asyncio.TimeoutError())
+        assert is_transient(RpcCallFailError(request=None))
+        assert is_transient(TimedOutError(request=None, message='Timeout'))
+        assert not is_transient(ChannelPrivateError(request=None))
+        assert not is_transient(ValueError('no such user'))
+
+    def test_delays(self):
+        """Delays are jittered below an exponentially growing cap."""
+        policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=4.0)
+        with patch('src.retry.random.uniform', side_effect=lambda low, high: high):
+            assert list(policy.delays()) == [1.0, 2.0, 4.0, 4.0]
+        assert all(0 <= d <= 4.0 for d in policy.delays())
+
+
+def make_flaky_client(failures: int):
+    """Mock client with ten posts whose page after post 7 fails this many times."""
+    posts = [MockMessage(id=i, text=str(i)) for i in range(10, 0, -1)]
+    client = create_mock_telegram_client(posts=posts)
+    client.is_connected = MagicMock(return_value=False)
+    iter_messages = client.iter_messages
+    calls = []
+
+    def flaky(entity, **kwargs):
+        calls.append(kwargs['offset_id'])
+        if kwargs['offset_id'] == 7 and calls.count(7) <= failures:
+            raise ConnectionResetError('Connection lost')
+        return iter_messages(entity, **kwargs)
+    client.iter_messages = flaky
+    return client, calls
+
+
+class TestClientRetry:
+    """Tests for retries in TelegramClientWrapper."""
+
+    @pytest.mark.asyncio
+    async def test_resumes_at_interrupted_page(self):
+        """A dropped connection reconnects and re-requests only the page it interrupted."""
+        from src.models import Channel
+
+        client, calls = make_flaky_client(failures=2)
+        wrapper = make_wrapper(client, tuner=FetchTuner(FetchProfile(page_size=4)))
+        with patch('src.telegram_client.asyncio.sleep', new=AsyncMock()):
+            result = [p.id async for p in wrapper.get_posts(Channel(id=1, username=None, title=''))]
+
+        assert result == list(range(10, 0, -1))
+        assert calls == [0, 7, 7, 7, 3]
+        assert wrapper.retries == 2
+        assert client.connect.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_with_network_error(self):
+        """After the last attempt the failure surfaces as NetworkError."""
+        from src.errors import NetworkError
+        from src.models import Channel
+
+        client, calls = make_flaky_client(failures=10)
+        wrapper = make_wrapper(client, tuner=FetchTuner(FetchProfile(page_size=4)), retry=RetryPolicy(attempts=3))
+        received = []
+        with patch('src.telegram_client.asyncio.sleep', new=AsyncMock()):
+            with pytest.raises(NetworkError):
+                async for post in wrapper.get_posts(Channel(id=1, username=None, title='')):
+                    received.append(post.id)
+
+        assert received == [10, 9, 8, 7]
+        assert calls == [0, 7, 7, 7]
+
+    @pytest.mark.asyncio
+    async def test_fatal_errors_are_not_retried(self):
+        """A fatal error is raised at once."""
+        from telethon.errors import ChannelPrivateError
+        from src.errors import AccessError
+
+        client = create_mock_telegram_client()
+        client.get_entity = AsyncMock(side_effect=ChannelPrivateError(request=None))
+        wrapper = make_wrapper(client)
+        with pytest.raises(AccessError):
+            await wrapper.get_channel_info('@private')
+        assert client.get_entity.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_connect_retries(self):
+        """Connecting is retried while it fails transiently."""
+        client = create_mock_telegram_client()
+        client.connect = AsyncMock(side_effect=[OSError('Network is unreachable'), None])
+        wrapper = make_wrapper(client)
+        with patch('src.telegram_client.asyncio.sleep', new=AsyncMock()):
+            await wrapper.connect()
+        assert client.connect.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_author_lookup_retries(self):
+        """A dropped author lookup is retried, and raises NetworkError instead of leaving authors anonymous."""
+        from telethon.tl.types import PeerUser, User
+        from src.errors import NetworkError
+        from src.models import Channel
+
+        message = MockMessage(id=11, text='hi')
+        message.from_id = PeerUser(5)
+        message.peer_id = 'discussion'
+        channel = Channel(id=1, username=None, title='')
+
+        client = create_mock_telegram_client(posts=[MockMessage(id=1)], comments={1: [message]})
+        client.get_input_entity = AsyncMock(return_value='chat')
+        client.side_effect = [ConnectionResetError('Connection lost'), [User(id=5, first_name='Eve')]]
+        wrapper = make_wrapper(client)
+        with patch('src.telegram_client.asyncio.sleep', new=AsyncMock()):
+            comments = [c async for c in wrapper.get_comments(channel, 1)]
+        assert comments[0].author.first_name == 'Eve'
+        assert wrapper.retries == 1
+
+        client.side_effect = ConnectionResetError('Connection lost')
+        wrapper = make_wrapper(client, retry=RetryPolicy(attempts=2))
+        with patch('src.telegram_client.asyncio.sleep', new=AsyncMock()):
+            with pytest.raises(NetworkError):
+                [c async for c in wrapper.get_comments(channel, 1)]
+
+    @pytest.mark.asyncio
+    async def test_watch_setup_retries(self):
+        """Looking up the discussion group for live updates is retried."""
+        from src.models import Channel
+
+        client = create_mock_telegram_client()
+        client.side_effect = [TimeoutError('timed out'), MagicMock(full_chat=MagicMock(linked_chat_id=None))]
+        client.add_event_handler = MagicMock()
+        client.remove_event_handler = MagicMock()
+        wrapper = make_wrapper(client, retry=RetryPolicy(base_delay=0))
+        updates = wrapper.iter_updates(Channel(id=1, username='c', title='C'))
+        waiting = asyncio.ensure_future(updates.__anext__())
+        while not client.add_event_handler.called:
+            await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert client.await_count == 2
+        assert wrapper.retries == 1
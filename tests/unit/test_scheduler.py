@@ -0,0 +1,211 @@
+"""Unit tests for the refresh scheduler."""
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import pytest
+
+from src.errors import AccessError, AuthError
+from src.models import Channel, OutputFile, Post
+from src.scheduler import (
+    ChannelStats,
+    ChannelStatsStore,
+    Scheduler,
+    SimulatedClock,
+    estimate_requests,
+    plan_refreshes,
+)
+
+DAY = 86400
+NOW = 100 * DAY
+
+
+def make_output(username: str, posts_per_day: int, days: int, exported_at: datetime) -> OutputFile:
+    """Build an export with a steady posting rate over the given days."""
+    posts = [
+        Post(id=i, text='p', date=exported_at - timedelta(days=days * i / (posts_per_day * days)), views=1, comments=[])
+        for i in range(1, posts_per_day * days + 1)
+    ]
+    return OutputFile(
+        version='1.0',
+        status='complete',
+        exported_at=exported_at,
+        posts_count=len(posts),
+        comments_count=0,
+        channel=Channel(id=1, username=username, title=username, posts=posts)
+    )
+
+
+class TestPlanRefreshes:
+    """Tests for plan_refreshes."""
+
+    def test_order_by_yield_per_request(self):
+        """New channels first, then by expected items per request."""
+        stats = [
+            ChannelStats('slow', posts_per_day=1, posts_total=100, last_refresh=NOW - DAY),
+            ChannelStats('busy', posts_per_day=5, comments_per_day=50, posts_total=100, last_refresh=NOW - DAY),
+            ChannelStats('new'),
+        ]
+        plan = plan_refreshes(stats, NOW, hot_days=7)
+        assert [p.channel for p in plan] == ['new', 'busy', 'slow']
+        assert plan[1].expected_items == pytest.approx(55)
+        assert plan[1].requests == 1 + 1 + 35
+
+    def test_error_backoff(self):
+        """Failed channels wait an exponentially growing time."""
+        failed = ChannelStats('failed', posts_per_day=100, last_refresh=0, errors=2, last_error_at=NOW - 3600)
+        plan = plan_refreshes([failed, ChannelStats('ok', last_refresh=NOW)], NOW)
+        assert [p.channel for p in plan] == ['ok', 'failed']
+        assert plan[1].not_before == NOW + 3600
+
+        plan = plan_refreshes([failed], NOW + 3600)
+        assert plan[0].not_before is None
+
+    def test_estimate_requests(self):
+        """Empty channels still cost a lookup and one listing page."""
+        assert estimate_requests(ChannelStats('x')) == 2
+        assert estimate_requests(ChannelStats('x', posts_per_day=0.5, posts_total=250), hot_days=4) == 1 + 3 + 2
+
+
+class TestScheduler:
+    """Tests for Scheduler.run with a simulated clock."""
+
+    def test_rate_budget_and_stats(self):
+        """Refreshes are paced by the request budget and their stats recorded."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ChannelStatsStore(Path(tmpdir) / 'stats.sqlite')
+            clock = SimulatedClock(NOW)
+            scheduler = Scheduler(store, clock=clock, hot_days=0)
+            started = {}
+
+            async def refresh(channel):
+                started[channel] = clock.time()
+                await clock.sleep(5)
+                return make_output(channel, 2, 10, datetime.fromtimestamp(clock.time(), timezone.utc))
+
+            plan = scheduler.plan(['@a', 'b', 'https://t.me/c'], Path(tmpdir))
+            # 2 requests each, 1 request per second
+            results = asyncio.run(scheduler.run(plan, refresh, concurrency=2, requests_per_minute=60,
+                                                export_dir=Path(tmpdir)))
+
+            assert results == {'a': None, 'b': None, 'c': None}
+            assert sorted(started.values()) == [NOW, NOW + 2, NOW + 5]
+            stats = store.get('a')
+            assert stats.posts_total == 20
+            assert stats.posts_per_day == pytest.approx(2)
+            assert stats.last_refresh == started['a']
+            assert stats.last_duration == 5
+            store.close()
+
+    def test_errors(self):
+        """Channel errors are recorded without stopping the others; auth errors stop the run."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ChannelStatsStore(Path(tmpdir) / 'stats.sqlite')
+            scheduler = Scheduler(store, clock=SimulatedClock(NOW))
+
+            async def private(channel):
+                raise AccessError(channel, 'Channel is private')
+
+            plan = scheduler.plan(['a'], Path(tmpdir))
+            results = asyncio.run(scheduler.run(plan, private, export_dir=Path(tmpdir)))
+            assert 'private' in results['a']
+            assert store.get('a').errors == 1
+            assert scheduler.plan(['a'], Path(tmpdir))[0].not_before == NOW + 3600
+
+            async def expired(channel):
+                raise AuthError('Session expired.')
+
+            async def broken(channel):
+                if channel == 'c':
+                    raise RuntimeError('unexpected')
+                return make_output(channel, 1, 1, datetime.fromtimestamp(NOW, timezone.utc))
+
+            plan = scheduler.plan(['c', 'd'], Path(tmpdir))
+            results = asyncio.run(scheduler.run(plan, broken, export_dir=Path(tmpdir)))
+            assert results == {'c': 'RuntimeError: unexpected', 'd': None}
+            assert store.get('c').errors == 1
+
+            plan = scheduler.plan(['b'], Path(tmpdir))
+            with pytest.raises(AuthError):
+                asyncio.run(scheduler.run(plan, expired, export_dir=Path(tmpdir)))
+            store.close()
+
+    def test_stats_from_existing_export(self):
+        """Channels without stats are measured from their export."""
+        from src.utils import save_to_json
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exported_at = datetime.fromtimestamp(NOW - 2 * DAY, timezone.utc)
+            save_to_json(make_output('a', 3, 60, exported_at).to_dict(), str(Path(tmpdir) / 'a.json'))
+            store = ChannelStatsStore(Path(tmpdir) / 'stats.sqlite')
+            scheduler = Scheduler(store, clock=SimulatedClock(NOW))
+
+            stats = scheduler.stats_for('a', Path(tmpdir))
+            assert stats.last_refresh == NOW - 2 * DAY
+            assert stats.posts_per_day == pytest.approx(3, rel=0.05)
+            assert scheduler.plan(['a'], Path(tmpdir))[0].expected_items == pytest.approx(6, rel=0.05)
+            store.close()
+
+
+class TestSchedulerCli:
+    """Tests for the scheduler command line."""
+
+    def test_refresh_in_export_dir(self):
+        """Channels planned from --dir are refreshed into --dir."""
+        from unittest.mock import patch
+        from src.scheduler import main
+        from src.utils import save_to_json
+        from tests.integration.test_loader import MockTelegramClientWrapper, create_sample_data
+
+        channel, posts = create_sample_data()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = Path(tmpdir) / 'exports'
+            exports.mkdir()
+            save_to_json(make_output('sample_channel', 1, 1, datetime.now(timezone.utc)).to_dict(),
+                         str(exports / 'sample_channel.json'))
+            stores = {
+                'INDEX_PATH': Path(tmpdir) / 'index.sqlite',
+                'AGGREGATES_PATH': Path(tmpdir) / 'aggregates.sqlite',
+                'AUTHOR_INDEX_PATH': Path(tmpdir) / 'authors.sqlite',
+                'ACTIVITY_PATH': Path(tmpdir) / 'activity',
+            }
+            with patch.multiple('src.scheduler', **stores), \
+                    patch('src.scheduler.create_client', return_value=MockTelegramClientWrapper(channel, posts)):
+                code = main(['--dir', str(exports), '--stats', str(Path(tmpdir) / 'stats.sqlite')])
+
+            with open(exports / 'sample_channel.json', 'r', encoding='utf-8') as f:
+                refreshed = json.load(f)
+
+        assert code == 0
+        assert refreshed['channel']['title'] == 'Sample Channel'
+
+    def test_connect_failure_reported(self, capsys):
+        """A connection that cannot be made is reported as an error, not a traceback."""
+        from unittest.mock import patch
+        from src.errors import NetworkError
+        from src.scheduler import main
+        from src.utils import save_to_json
+        from tests.integration.test_loader import MockTelegramClientWrapper, create_sample_data
+
+        class OfflineClient(MockTelegramClientWrapper):
+            async def connect(self):
+                raise NetworkError("Request failed after 6 attempts")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = Path(tmpdir) / 'exports'
+            exports.mkdir()
+            save_to_json(make_output('sample_channel', 1, 1, datetime.now(timezone.utc)).to_dict(),
+                         str(exports / 'sample_channel.json'))
+            stores = {
+                'INDEX_PATH': Path(tmpdir) / 'index.sqlite',
+                'AGGREGATES_PATH': Path(tmpdir) / 'aggregates.sqlite',
+                'AUTHOR_INDEX_PATH': Path(tmpdir) / 'authors.sqlite',
+                'ACTIVITY_PATH': Path(tmpdir) / 'activity',
+            }
+            with patch.multiple('src.scheduler', **stores), \
+                    patch('src.scheduler.create_client', return_value=OfflineClient(*create_sample_data())):
+                code = main(['--dir', str(exports), '--stats', str(Path(tmpdir) / 'stats.sqlite')])
+
+        assert code == 1
+        assert 'NetworkError' in capsys.readouterr().err
@@ -0,0 +1,129 @@
+"""Unit tests for the inverted search index."""
+import json
+import os
+import tempfile
+import pytest
+
+from tests.fixtures.exports import make_comment, make_export
+
+
+CHANNEL_A = make_export(1, 'chan_a', [
+    make_comment(11, 101, 'We use a CRM for sales', date='2026-02-01T10:00:00+00:00'),
+    make_comment(12, 102, 'Notion is my second brain', date='2026-02-03T10:00:00+00:00'),
+    make_comment(13, 103, 'Looking for a CRM with Notion sync', date='2026-02-05T10:00:00+00:00'),
+])
+CHANNEL_B = make_export(2, 'chan_b', [
+    make_comment(21, 104, 'looking for feedback on my crm', date='2026-02-04T10:00:00+00:00'),
+    make_comment(22, 105, 'feedback looking for', date='2026-02-06T10:00:00+00:00'),
+])
+
+
+@pytest.fixture
+def index():
+    """Search index with two channels indexed."""
+    from src.search_index import SearchIndex
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        idx = SearchIndex(os.path.join(tmpdir, 'index.sqlite'))
+        idx.add_export(CHANNEL_A)
+        idx.add_export(CHANNEL_B)
+        yield idx
+        idx.close()
+
+
+class TestParseQuery:
+    """Tests for parse_query function."""
+
+    def test_and_or_phrase(self):
+        """OR splits groups, words are ANDed, quotes make phrases."""
+        from src.search_index import parse_query
+
+        assert parse_query('crm AND notion OR "Looking for" sales') == [
+            [['crm'], ['notion']],
+            [['looking', 'for'], ['sales']],
+        ]
+
+
+class TestSearch:
+    """Tests for SearchIndex.search."""
+
+    def test_or(self, index):
+        """OR returns comments matching any term."""
+        hits = index.search('crm OR notion')
+        assert sorted(h.comment_id for h in hits) == [11, 12, 13, 21]
+
+    def test_and(self, index):
+        """Implicit AND requires all terms."""
+        hits = index.search('crm notion')
+        assert [h.comment_id for h in hits] == [13]
+
+    def test_phrase(self, index):
+        """Phrase matches consecutive tokens only."""
+        hits = index.search('"looking for"')
+        assert sorted(h.comment_id for h in hits) == [13, 21, 22]
+
+        hits = index.search('"for looking"')
+        assert hits == []
+
+    def test_date_and_channel_filters(self, index):
+        """since/until and channel filters narrow the result."""
+        hits = index.search('crm', since='2026-02-02', until='2026-02-05')
+        assert [h.comment_id for h in hits] == [21]
+
+        hits = index.search('crm', channels=['@chan_a'])
+        assert sorted(h.comment_id for h in hits) == [11, 13]
+
+    def test_reindex_adds_new_comments(self, index):
+        """Re-adding a channel export indexes only its new comments; rebuild replaces the channel."""
+        updated = make_export(2, 'chan_b', [
+            make_comment(22, 105, 'feedback looking for', date='2026-02-06T10:00:00+00:00'),
+            make_comment(23, 106, 'notion only', date='2026-02-07T10:00:00+00:00'),
+        ])
+        assert index.add_export(updated) == 1
+        assert index.add_export(updated) == 0
+        assert sorted(h.comment_id for h in index.search('feedback')) == [21, 22]
+        assert sorted(h.comment_id for h in index.search('notion')) == [12, 13, 23]
+
+        assert index.add_export(updated, rebuild=True) == 2
+        assert [h.comment_id for h in index.search('feedback')] == [22]
+
+
+class TestSearchIndexCli:
+    """Tests for the search index command line."""
+
+    def test_build_and_query(self, capsys):
+        """build indexes exports on disk and query prints authors."""
+        from src.search_index import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = os.path.join(tmpdir, 'channels')
+            os.makedirs(exports)
+            for data in (CHANNEL_A, CHANNEL_B):
+                with open(os.path.join(exports, f"{data['channel']['username']}.json"), 'w') as f:
+                    json.dump(data, f)
+            index_path = os.path.join(tmpdir, 'index.sqlite')
+
+            assert main(['--index', index_path, 'build', '--dir', exports]) == 0
+            capsys.readouterr()
+            assert main(['--index', index_path, 'query', 'crm', '--authors', '--json']) == 0
+
+        assert json.loads(capsys.readouterr().out) == [103, 104, 101]
+
+    def test_errors_reported(self, capsys):
+        """A corrupt export is reported as unreadable, only bad dates as invalid dates."""
+        from src.search_index import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exports = os.path.join(tmpdir, 'channels')
+            os.makedirs(exports)
+            with open(os.path.join(exports, 'broken.json'), 'w') as f:
+                f.write('{"channel": ')
+            index_path = os.path.join(tmpdir, 'index.sqlite')
+
+            assert main(['--index', index_path, 'build', '--dir', exports]) == 1
+            err = capsys.readouterr().err
+            assert 'broken.json' in err
+            assert 'Invalid date' not in err
+
+            assert main(['--index', index_path, 'query', 'crm', '--since', 'yesterday']) == 1
+            assert 'Invalid date' in capsys.readouterr().err
@@ -0,0 +1,96 @@
+"""Unit tests for monthly sharded exports."""
+import json
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.models import Author, Comment, OutputFile, Post
+from tests.fixtures.exports import make_output
+
+
+def make_posts():
+    """Posts over three months, newest first, one with a comment."""
+    author = Author(user_id=7, username='u', first_name='U', last_name=None)
+    comment = Comment(id=100, text='hi', date=datetime(2026, 1, 5, 12, tzinfo=timezone.utc), author=author)
+    return [
+        Post(id=5, text='march', date=datetime(2026, 3, 2, tzinfo=timezone.utc), views=1),
+        Post(id=4, text='feb b', date=datetime(2026, 2, 20, tzinfo=timezone.utc), views=1),
+        Post(id=3, text='feb a', date=datetime(2026, 2, 1, tzinfo=timezone.utc), views=1),
+        Post(id=1, text='jan', date=datetime(2026, 1, 5, tzinfo=timezone.utc), views=1, comments=[comment]),
+    ]
+
+
+class TestShards:
+    """Tests for write_shards and the shard readers."""
+
+    def test_layout_and_manifest(self):
+        """One regular export per month; the manifest has counts, id ranges and checksums."""
+        import hashlib
+        from src.shards import read_manifest, write_shards
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'sharded.shards'
+            manifest, written = write_shards(make_output(make_posts()), directory)
+
+            assert written == ['2026-03', '2026-02', '2026-01']
+            assert sorted(p.name for p in directory.iterdir()) == [
+                '2026-01.json', '2026-02.json', '2026-03.json', 'manifest.json'
+            ]
+            feb = manifest.shards[1]
+            assert (feb.posts, feb.comments, feb.min_id, feb.max_id) == (2, 0, 3, 4)
+            assert manifest.shards[2].comments == 1
+            assert feb.sha256 == hashlib.sha256((directory / feb.file).read_bytes()).hexdigest()
+            with open(directory / feb.file, 'r', encoding='utf-8') as f:
+                assert OutputFile.from_dict(json.load(f)).posts_count == 2
+            assert read_manifest(directory).to_dict() == manifest.to_dict()
+
+    def test_update_rewrites_changed_shards_only(self):
+        """Saving again rewrites the months whose posts changed and drops vanished months."""
+        from src.shards import write_shards
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'sharded.shards'
+            first, _ = write_shards(make_output(make_posts()), directory)
+            feb_mtime = (directory / '2026-02.json').stat().st_mtime_ns
+
+            posts = make_posts()[:3]
+            posts[0].views = 50
+            later = datetime(2026, 3, 5, 8, 30, tzinfo=timezone.utc)
+            manifest, written = write_shards(make_output(posts, exported_at=later), directory)
+
+            assert written == ['2026-03']
+            assert manifest.shards[1] == first.shards[1]
+            assert manifest.shards[0].exported_at == later.isoformat()
+            assert (directory / '2026-02.json').stat().st_mtime_ns == feb_mtime
+            assert not (directory / '2026-01.json').exists()
+            assert [s.month for s in manifest.shards] == ['2026-03', '2026-02']
+
+    def test_date_range_reads(self):
+        """Readers open only the shards of the requested range."""
+        from src.shards import load_shards, shard_paths, verify_shards, write_shards
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            directory = Path(tmpdir) / 'sharded.shards'
+            write_shards(make_output(make_posts()), directory)
+            (directory / '2026-03.json').unlink()
+
+            since = datetime(2026, 1, 10, tzinfo=timezone.utc)
+            until = datetime(2026, 2, 28, tzinfo=timezone.utc)
+            assert [p.name for p in shard_paths(directory, since, until)] == ['2026-02.json', '2026-01.json']
+            output = load_shards(directory, since, until)
+            assert [p.id for p in output.channel.posts] == [4, 3]
+            assert output.posts_count == 2
+            assert verify_shards(directory) == ['2026-03']
+
+    def test_split_cli(self):
+        """split converts existing exports next to them."""
+        from src.encoder import save_export
+        from src.shards import load_shards, main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_export(make_output(make_posts()), str(Path(tmpdir) / 'sharded.json'))
+            assert main(['split', '--dir', tmpdir]) == 0
+            assert main(['verify', '--dir', tmpdir]) == 0
+            output = load_shards(Path(tmpdir) / 'sharded.shards')
+
+        assert output.to_dict() == make_output(make_posts()).to_dict()
@@ -0,0 +1,100 @@
+"""Unit tests for the deduplicated snapshot store."""
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.models import Author, Comment, Post
+from src.snapshots import SnapshotStore
+from tests.fixtures.exports import make_output
+
+
+def make_posts(count=20):
+    """Posts with two comments each, newest first."""
+    author = Author(user_id=7, username='u', first_name='U', last_name=None)
+    date = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    return [
+        Post(id=i, text=f'post {i} ' * 20, date=date, views=i * 10, replies=2, comments=[
+            Comment(id=i * 100 + 1, text=f'comment {i} a', date=date, author=author),
+            Comment(id=i * 100 + 2, text=f'comment {i} b', date=date, author=author, reply_to=i * 100 + 1),
+        ])
+        for i in range(count, 0, -1)
+    ]
+
+
+@pytest.fixture
+def store():
+    """Snapshot store in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = SnapshotStore(Path(tmpdir) / 'snapshots' / 'store.sqlite')
+        yield store
+        store.close()
+
+
+class TestSnapshotStore:
+    """Tests for SnapshotStore."""
+
+    def test_materialize_round_trip(self, store):
+        """A snapshot materializes to the export it was taken of."""
+        posts = make_posts(3)
+        posts[0].entities = [['bold', 0, 4]]
+        posts[1].views = None
+        output = make_output(posts, status='partial')
+        info, objects, size = store.add(output)
+
+        assert objects == 9 and size > 0
+        assert store.materialize(info.id).to_dict() == output.to_dict()
+        with pytest.raises(KeyError):
+            store.materialize(info.id + 1)
+
+    def test_growth_follows_changes(self, store):
+        """Counters are kept per snapshot; only changed posts and new comments add objects."""
+        first, objects, first_size = store.add(make_output(make_posts()), taken_at=1.0)
+        assert objects == 60
+
+        posts = make_posts()
+        for post in posts:
+            post.views += 5
+        posts[0].text = 'edited'
+        posts[1].comments.append(Comment(id=9999, text='new', date=posts[1].date, author=posts[1].comments[0].author))
+        second, objects, size = store.add(make_output(posts), taken_at=2.0)
+
+        assert objects == 3
+        assert size < first_size / 5
+        assert store.materialize(second.id).to_dict() == make_output(posts).to_dict()
+        assert store.materialize(first.id).to_dict() == make_output(make_posts()).to_dict()
+        assert [s.id for s in store.list_snapshots('@C')] == [first.id, second.id]
+
+    def test_gc(self, store):
+        """gc deletes only objects no remaining snapshot refers to."""
+        first, _, _ = store.add(make_output(make_posts()))
+        posts = make_posts()
+        posts[0].text = 'edited'
+        second, _, _ = store.add(make_output(posts))
+
+        assert store.gc() == (0, 0)
+        assert store.delete(first.id) and not store.delete(first.id)
+        count, size = store.gc()
+
+        assert count == 1 and size > 0
+        assert store.stats()['objects'] == 60
+        assert store.materialize(second.id).to_dict() == make_output(posts).to_dict()
+
+    def test_cli(self):
+        """add, materialize and diff through the command line."""
+        import json
+        from src.encoder import save_export
+        from src.snapshots import main
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_path = str(Path(tmpdir) / 'store.sqlite')
+            save_export(make_output(make_posts(3)), str(Path(tmpdir) / 'snap.json'))
+            assert main(['--store', store_path, 'add', '--dir', tmpdir]) == 0
+            assert main(['--store', store_path, 'add', '--dir', tmpdir]) == 0
+            assert main(['--store', store_path, 'diff', '1', '2']) == 0
+            out = Path(tmpdir) / 'out.json'
+            assert main(['--store', store_path, 'materialize', '2', '--output', str(out)]) == 0
+            assert main(['--store', store_path, 'materialize', '3', '--output', str(out)]) == 1
+            with open(out, 'r', encoding='utf-8') as f:
+                assert json.load(f) == make_output(make_posts(3)).to_dict()
@@ -0,0 +1,301 @@
+"""Unit tests for the Telegram client wrapper."""
+import asyncio
+import pytest
+
+from tests.fixtures.mock_telegram import MockMessage, create_mock_telegram_client, create_sample_data
+
+
+def make_wrapper(client, text_mode='markdown', tuner=None, retry=None):
+    """Create a TelegramClientWrapper around a mock Telethon client."""
+    from unittest.mock import patch
+    from src.telegram_client import TelegramClientWrapper
+
+    with patch('src.telegram_client.TelethonClient', return_value=client):
+        return TelegramClientWrapper(1, 'hash', text_mode=text_mode, tuner=tuner, retry=retry)
+
+
+class TestGetComments:
+    """Tests for TelegramClientWrapper.get_comments."""
+
+    @pytest.mark.asyncio
+    async def test_reply_target(self):
+        """Replies to other comments keep their target; replies to the post do not."""
+        from src.models import Channel
+
+        channel, posts, comments = create_sample_data()
+        comments[1].append(MockMessage(id=103, text='Agreed', reply_to=101, reply_to_top=1))
+        wrapper = make_wrapper(create_mock_telegram_client(channel, posts, comments))
+
+        result = [c async for c in wrapper.get_comments(Channel(id=channel.id, username=None, title=''), 1)]
+
+        assert [(c.id, c.reply_to) for c in result] == [(101, None), (102, None), (103, 101)]
+
+    @pytest.mark.asyncio
+    async def test_min_id(self):
+        """min_id skips comments that are already stored."""
+        from src.models import Channel
+
+        channel, posts, comments = create_sample_data()
+        wrapper = make_wrapper(create_mock_telegram_client(channel, posts, comments))
+
+        result = [c async for c in wrapper.get_comments(Channel(id=channel.id, username=None, title=''), 1, min_id=101)]
+
+        assert [c.id for c in result] == [102]
+
+    @pytest.mark.asyncio
+    async def test_sender_hydration(self):
+        """Senders missing from a page come from the cache or one batched request."""
+        from unittest.mock import AsyncMock
+        from telethon.tl.functions.users import GetUsersRequest
+        from src.fetch_tuning import FetchProfile, FetchTuner
+        from telethon.tl.types import PeerUser, User
+        from src.models import Channel
+
+        eve = User(id=5, username='eve', first_name='Eve')
+        channel, posts, _ = create_sample_data()
+        messages = [MockMessage(id=i, text=str(i), sender=eve if i == 1 else None) for i in range(1, 7)]
+        for message, user_id in zip(messages, [5, 5, 6, 7, 6, None]):
+            message.from_id = PeerUser(user_id) if user_id else None
+            message.peer_id = 'discussion'
+
+        client = create_mock_telegram_client(channel, posts, {1: messages})
+        client.get_input_entity = AsyncMock(return_value='chat')
+        requests = []
+
+        def get_users(request):
+            requests.append(request)
+            assert isinstance(request, GetUsersRequest)
+            return [User(id=u.user_id, first_name=f'User {u.user_id}') for u in request.id]
+        client.side_effect = get_users
+        wrapper = make_wrapper(client, tuner=FetchTuner(FetchProfile(page_size=2)))
+
+        result = [c async for c in wrapper.get_comments(Channel(id=channel.id, username=None, title=''), 1)]
+
+        assert [c.author.user_id for c in result] == [5, 5, 6, 7, 6, 0]
+        assert [c.author.first_name for c in result[2:]] == ['User 6', 'User 7', 'User 6', 'Anonymous']
+        assert [[(u.user_id, u.msg_id) for u in r.id] for r in requests] == [[(6, 3), (7, 4)]]
+        stats = wrapper.users.stats()
+        assert (stats['hits'], stats['misses'], stats['requests'], stats['lookups_saved']) == (2, 2, 1, 3)
+
+    def test_user_cache_on_disk(self):
+        """A cache with a path survives between runs."""
+        import tempfile
+        from pathlib import Path
+        from src.models import Author
+        from src.telegram_client import UserCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = UserCache(Path(tmpdir) / 'users.json')
+            cache.add(Author(user_id=5, username=None, first_name='Eve', last_name='X'))
+            cache.save()
+
+            loaded = UserCache(Path(tmpdir) / 'users.json')
+        assert loaded.lookup(5) == Author(user_id=5, username=None, first_name='Eve', last_name='X')
+        assert loaded.stats()['hit_rate'] == 1.0
+
+
+class TestGetPosts:
+    """Tests for TelegramClientWrapper.get_posts."""
+
+    @pytest.mark.asyncio
+    async def test_reply_counter(self):
+        """Posts carry Telegram's reply counter, or None when comments are disabled."""
+        from src.models import Channel
+
+        channel, posts, comments = create_sample_data()
+        posts[0].replies = MockMessage(id=0, replies=2).replies
+        wrapper = make_wrapper(create_mock_telegram_client(channel, posts, comments))
+
+        result = [p async for p in wrapper.get_posts(Channel(id=channel.id, username=None, title=''))]
+
+        assert [p.replies for p in result] == [2, None]
+
+    @pytest.mark.asyncio
+    async def test_text_modes(self):
+        """Raw modes store the unformatted text; raw+entities adds compact entities."""
+        from telethon.tl.types import MessageEntityBold, MessageEntityTextUrl
+        from src.models import Channel
+
+        channel, posts, comments = create_sample_data()
+        posts[0].text = '**Hello** [world](https://example.com)'
+        posts[0].raw_text = 'Hello world'
+        posts[0].entities = [MessageEntityBold(0, 5), MessageEntityTextUrl(6, 5, 'https://example.com')]
+        target = Channel(id=channel.id, username=None, title='')
+
+        markdown = [p async for p in make_wrapper(create_mock_telegram_client(channel, posts, comments)).get_posts(target)]
+        assert (markdown[0].text, markdown[0].entities) == ('**Hello** [world](https://example.com)', None)
+        assert 'entities' not in markdown[0].to_dict()
+
+        wrapper = make_wrapper(create_mock_telegram_client(channel, posts, comments), 'raw')
+        raw = [p async for p in wrapper.get_posts(target)]
+        assert (raw[0].text, raw[0].entities) == ('Hello world', None)
+
+        wrapper = make_wrapper(create_mock_telegram_client(channel, posts, comments), 'raw+entities')
+        result = [p async for p in wrapper.get_posts(target)]
+        assert result[0].text == 'Hello world'
+        assert result[0].entities == [['bold', 0, 5], ['text_url', 6, 5, 'https://example.com']]
+        assert result[1].entities == []
+
+
+class TestIterUpdates:
+    """Tests for TelegramClientWrapper.iter_updates."""
+
+    @pytest.mark.asyncio
+    async def test_posts_and_comments(self):
+        """Channel messages become posts; discussion replies are mapped to their channel post."""
+        from unittest.mock import AsyncMock, MagicMock
+        from src.models import Channel
+        from src.telegram_client import UPDATE_COMMENT, UPDATE_POST
+        from tests.fixtures.mock_telegram import MockUser
+
+        channel_id, discussion_id = 100, 200
+        client = create_mock_telegram_client()
+        client.return_value = MagicMock(full_chat=MagicMock(linked_chat_id=discussion_id))
+        handlers = []
+        client.add_event_handler = MagicMock(side_effect=lambda handler, _: handlers.append(handler))
+        client.remove_event_handler = MagicMock()
+        # Thread 51 was forwarded before watching started and is looked up
+        client.get_messages = AsyncMock(return_value=MagicMock(fwd_from=MagicMock(saved_from_msg_id=7)))
+
+        def message(id, chat, reply_to=None, forwarded_from=None, sender=None):
+            msg = MockMessage(id=id, text=f'm{id}', sender=sender, reply_to=reply_to)
+            msg.peer_id = MagicMock(channel_id=chat)
+            msg.fwd_from = MagicMock(saved_from_msg_id=forwarded_from) if forwarded_from else None
+            if reply_to is None:
+                msg.reply_to = None
+            return msg
+
+        user = MockUser(id=1, username='u')
+        events = [
+            message(8, channel_id),
+            message(50, discussion_id, forwarded_from=8),
+            message(52, discussion_id, reply_to=50, sender=user),
+            message(53, discussion_id, reply_to=51, sender=user),
+        ]
+
+        wrapper = make_wrapper(client)
+        updates = wrapper.iter_updates(Channel(id=channel_id, username='c', title='C'))
+        first = asyncio.ensure_future(updates.__anext__())
+        while not handlers:
+            await asyncio.sleep(0)
+        for msg in events:
+            await handlers[0](MagicMock(message=msg))
+        received = [await first] + [await updates.__anext__() for _ in range(2)]
+        await updates.aclose()
+
+        assert (received[0].kind, received[0].post_id, received[0].post.text) == (UPDATE_POST, 8, 'm8')
+        assert [(u.kind, u.post_id, u.comment.id) for u in received[1:]] == [
+            (UPDATE_COMMENT, 8, 52),
+            (UPDATE_COMMENT, 7, 53),
+        ]
+        client.get_messages.assert_awaited_once_with(discussion_id, ids=51)
+        client.remove_event_handler.assert_called_once()
+
+
+    @pytest.mark.asyncio
+    async def test_short_reconnect_reported(self):
+        """A reconnect too short for is_connected() to catch is still reported."""
+        from unittest.mock import AsyncMock, MagicMock
+        from src.models import Channel
+        from src.telegram_client import UPDATE_POST, UPDATE_RECONNECT
+
+        client = create_mock_telegram_client()
+        client.return_value = MagicMock(full_chat=MagicMock(linked_chat_id=None))
+        handlers = []
+        client.add_event_handler = MagicMock(side_effect=lambda handler, _: handlers.append(handler))
+        client.remove_event_handler = MagicMock()
+        telethon_callback = AsyncMock()
+        client._sender = MagicMock(_auto_reconnect_callback=telethon_callback)
+
+        def post(id):
+            msg = MockMessage(id=id, text=f'm{id}')
+            msg.peer_id = MagicMock(channel_id=100)
+            return MagicMock(message=msg)
+
+        wrapper = make_wrapper(client)
+        updates = wrapper.iter_updates(Channel(id=100, username='c', title='C'))
+        first = asyncio.ensure_future(updates.__anext__())
+        while not handlers:
+            await asyncio.sleep(0)
+        await handlers[0](post(1))
+        received = [await first]
+        await client._sender._auto_reconnect_callback()
+        await handlers[0](post(2))
+        received += [await updates.__anext__() for _ in range(2)]
+        await updates.aclose()
+
+        assert [(u.kind, u.post_id) for u in received] == [(UPDATE_POST, 1), (UPDATE_RECONNECT, 0), (UPDATE_POST, 2)]
+        telethon_callback.assert_awaited_once()
+
+
+class TestTakeout:
+    """Tests for fetching history through a takeout session."""
+
+    def make_takeout_wrapper(self, granted):
+        """Create a takeout-mode wrapper around a mock client with ten posts."""
+        from src.telegram_client import TelegramClientWrapper
+        from unittest.mock import patch
+        from tests.fixtures.mock_telegram import add_mock_takeout
+
+        posts = [MockMessage(id=i, text=str(i)) for i in range(10, 0, -1)]
+        client = create_mock_telegram_client(posts=posts)
+        takeout = add_mock_takeout(client, granted)
+        with patch('src.telegram_client.TelethonClient', return_value=client):
+            wrapper = TelegramClientWrapper(1, 'hash', takeout=True)
+        return wrapper, client, takeout
+
+    @pytest.mark.asyncio
+    async def test_history_through_takeout(self):
+        """A granted takeout session carries the history requests and is finished on disconnect."""
+        from src.models import Channel
+
+        wrapper, client, takeout = self.make_takeout_wrapper(granted=True)
+        await wrapper.connect()
+        result = [p.id async for p in wrapper.get_posts(Channel(id=1, username=None, title=''))]
+        await wrapper.disconnect()
+
+        assert result == list(range(10, 0, -1))
+        assert wrapper.takeout_fallback is None
+        assert (wrapper.history['takeout'].messages, wrapper.history['normal'].messages) == (10, 0)
+        assert client.takeout.call_args.kwargs == {'finalize': True, 'channels': True, 'megagroups': True}
+        assert takeout.entered and takeout.exited
+
+    @pytest.mark.asyncio
+    async def test_fallback_when_not_granted(self):
+        """Without a takeout session history goes through the normal client."""
+        from src.models import Channel
+
+        wrapper, client, takeout = self.make_takeout_wrapper(granted=False)
+        await wrapper.connect()
+        result = [p.id async for p in wrapper.get_posts(Channel(id=1, username=None, title=''))]
+        await wrapper.disconnect()
+
+        assert len(result) == 10
+        assert wrapper.takeout_fallback == 'not granted yet, allowed in 3600s'
+        assert (wrapper.history['takeout'].messages, wrapper.history['normal'].messages) == (0, 10)
+        assert not takeout.exited
+
+    @pytest.mark.asyncio
+    async def test_fallback_when_takeout_ends(self):
+        """A takeout session rejected part way is finished and the page re-requested normally."""
+        from telethon.errors import TakeoutInvalidError
+        from src.fetch_tuning import FetchProfile, FetchTuner
+        from src.models import Channel
+
+        wrapper, client, takeout = self.make_takeout_wrapper(granted=True)
+        wrapper.tuner = FetchTuner(FetchProfile(page_size=4))
+        iter_messages = client.iter_messages
+
+        def expiring(entity, **kwargs):
+            if kwargs['offset_id']:
+                raise TakeoutInvalidError(request=None)
+            return iter_messages(entity, **kwargs)
+        takeout.takeout_client.iter_messages = expiring
+
+        await wrapper.connect()
+        result = [p.id async for p in wrapper.get_posts(Channel(id=1, username=None, title=''))]
+
+        assert result == list(range(10, 0, -1))
+        assert wrapper.takeout_fallback.startswith('ended by Telegram')
+        assert (wrapper.history['takeout'].messages, wrapper.history['normal'].messages) == (4, 6)
+        assert takeout.exited
@@ -25,6 +25,22 @@ class TestEnsureDir:
             assert os.path.isdir(tmpdir)
 
 
+class TestReplaceFile:
+    """Tests for replace_file function."""
+
+    def test_replace_file_leaves_no_temporary_file(self):
+        """replace_file swaps in the new contents and removes its temporary file."""
+        from pathlib import Path
+        from src.utils import replace_file
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'data.json'
+            path.write_bytes(b'old')
+            replace_file(path, b'new')
+            assert path.read_bytes() == b'new'
+            assert os.listdir(tmpdir) == ['data.json']
+
+
 class TestFormatError:
     """Tests for format_error function."""
 
@@ -44,3 +60,19 @@ class TestFormatError:
         assert 'ConfigError' in result
         assert 'Missing API_ID' in result
         assert 'Check your .env file' in result
+
+
+class TestTokenize:
+    """Tests for tokenize function."""
+
+    def test_tokenize_folds_case_and_punctuation(self):
+        """tokenize lower-cases words and drops punctuation."""
+        from src.utils import tokenize
+
+        assert tokenize('Hello, CRM-world!') == ['hello', 'crm', 'world']
+
+    def test_tokenize_unicode(self):
+        """tokenize keeps non-latin words."""
+        from src.utils import tokenize
+
+        assert tokenize('Ищу CRM для команды') == ['ищу', 'crm', 'для', 'команды']